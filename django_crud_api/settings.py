@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -139,4 +140,47 @@ REST_FRAMEWORK = {
         'socios.authentication.JWTAuthentication',
     ],
 }
-VALOR_CUOTA_BASE = 15000.00  # Valor base de la cuota mensual
\ No newline at end of file
+VALOR_CUOTA_BASE = 15000.00  # Valor base de la cuota mensual
+CUOTAS_HISTORICAS_CHECKPOINT = BASE_DIR / 'cuotas_historicas.checkpoint.json'  # Avance de generar_cuotas_historicas
+PAGOS_WEBHOOK_SECRETO = os.environ.get('PAGOS_WEBHOOK_SECRETO', '')  # Clave HMAC compartida con el proveedor; vacía = webhook deshabilitado
+PAGOS_NOTIFICACIONES_LOTE = 200  # Notificaciones que aplica cada worker por transacción
+PAGOS_NOTIFICACIONES_MAXIMO_INTENTOS = 5  # Lotes fallidos antes de dejar la notificación en 'error'
+
+# Control de acceso (molinete)
+CREDENCIALES_TTL_SEGUNDOS = 300  # Recarga completa del índice de credenciales en memoria
+REGISTRO_ACCESOS_ASINCRONO = True  # Escribir los RegistroAcceso en lotes desde un hilo en segundo plano
+REGISTRO_ACCESOS_TAMANO_LOTE = 200
+REGISTRO_ACCESOS_INTERVALO_SEGUNDOS = 2
+REGISTRO_ACCESOS_CAPACIDAD = 50000  # Máximo de registros en cola antes de descartar
+CONTROL_ACCESO_LOTE_MAXIMO = 10000  # Escaneos por pedido en la conciliación sin conexión
+EVENTOS_PROXIMOS_TTL_SEGUNDOS = 300  # Recarga del próximo evento por categoría (saludo TTS)
+REGISTRO_ACCESOS_ARCHIVO_DIR = BASE_DIR / 'archivo_accesos'  # Meses archivados del historial (JSONL + gzip)
+REGISTRO_ACCESOS_MESES_ACTIVOS = 3  # Meses que quedan en la tabla antes de archivarse
+
+# Autenticación
+AUTH_PRINCIPALES_TTL_SEGUNDOS = 30  # Cache de usuario y roles por token (0 = sin cache)
+AUTH_PRINCIPALES_MAXIMO = 5000  # Entradas máximas de esa cache (LRU)
+AUTH_ROLES_DESDE_TOKEN = True  # RolePermission confía en los roles del token (verificados por firma y 'rv')
+AUTH_ACCESS_TOKEN_MINUTOS = 15  # Vida del token de acceso
+AUTH_REFRESH_TOKEN_DIAS = 7  # Vida del refresh token (/socios/auth/refresh/)
+REVOCACION_SYNC_SEGUNDOS = 5  # Cada cuánto se traen las revocaciones hechas por otros procesos
+LOGIN_THROTTLE_BACKEND = 'socios.throttling.CubetasEnMemoria'  # o 'socios.throttling.CubetasEnCache' (compartido)
+LOGIN_THROTTLE_CACHE = 'default'  # Cache que usa CubetasEnCache
+LOGIN_THROTTLE_MAXIMO = 100000  # Claves (IP o email) que se recuerdan en memoria (LRU)
+LOGIN_THROTTLE_IP_CAPACIDAD = 30  # Intentos seguidos por IP...
+LOGIN_THROTTLE_IP_POR_MINUTO = 10  # ...y cuántos se recuperan por minuto
+LOGIN_THROTTLE_EMAIL_CAPACIDAD = 5  # Intentos seguidos contra una misma cuenta...
+LOGIN_THROTTLE_EMAIL_POR_MINUTO = 1  # ...y cuántos se recuperan por minuto
+
+# Contraseñas
+PASSWORD_HASHERS = [
+    'socios.hashers.PBKDF2IteracionesHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+]
+CONTRASENAS_ITERACIONES = 1_000_000  # Costo de PBKDF2; al cambiarlo se re-hashea en el próximo login
+CONTRASENAS_WORKERS = 2  # Procesos para el hashing (0 = en el hilo del request)
+CONTRASENAS_MAX_PENDIENTES = 16  # Logins en curso o en espera antes de responder 503
+CONTRASENAS_ESPERA_SEGUNDOS = 10
@@ -1,6 +1,6 @@
 from django.contrib import admin
-from .models import Usuario, Rol, NivelSocio, UsuarioRol, SocioInfo, Disciplina
-from .models.registro_acceso import RegistroAcceso
+from .models import Usuario, Rol, NivelSocio, UsuarioRol, SocioInfo, Disciplina, ElegibilidadAcceso, TokenRevocado, NotificacionPago
+from .models.registro_acceso import RegistroAcceso, ResumenAccesoHora, ResumenAccesoDia, ArchivoRegistroAcceso
 
 # Register your models here.
 admin.site.register(Usuario)
@@ -10,3 +10,9 @@ admin.site.register(UsuarioRol)
 admin.site.register(SocioInfo)
 admin.site.register(Disciplina)
 admin.site.register(RegistroAcceso)
+admin.site.register(ElegibilidadAcceso)
+admin.site.register(ResumenAccesoHora)
+admin.site.register(ResumenAccesoDia)
+admin.site.register(ArchivoRegistroAcceso)
+admin.site.register(TokenRevocado)
+admin.site.register(NotificacionPago)
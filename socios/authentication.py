@@ -3,7 +3,39 @@ from rest_framework.authentication import BaseAuthentication
 from rest_framework.exceptions import AuthenticationFailed
 from django.conf import settings
 import jwt
+import uuid
+from datetime import datetime, timedelta
 from .models import Usuario
+from .services.principales import cache_principales
+from .services.revocacion import revocacion_tokens
+
+def _emitir(payload, duracion):
+    payload = {**payload, "jti": uuid.uuid4().hex, "exp": datetime.utcnow() + duracion}
+    return jwt.encode(payload, settings.SECRET_KEY, algorithm="HS256")
+
+
+def generar_token(usuario):
+    """Emite el token de acceso (corto) con los roles del usuario y su versión de roles."""
+    return _emitir({
+        "id": usuario.id,
+        "email": usuario.email,
+        "roles": list(usuario.roles.values_list('nombre', flat=True)),
+        "rv": usuario.roles_version,
+        "typ": "access",
+    }, timedelta(minutes=getattr(settings, 'AUTH_ACCESS_TOKEN_MINUTOS', 15)))
+
+
+def generar_refresh_token(usuario):
+    """Emite el refresh token (largo): solo sirve para pedir tokens de acceso nuevos."""
+    return _emitir({
+        "id": usuario.id,
+        "typ": "refresh",
+    }, timedelta(days=getattr(settings, 'AUTH_REFRESH_TOKEN_DIAS', 7)))
+
+
+def emitir_tokens(usuario):
+    return {"token": generar_token(usuario), "refresh": generar_refresh_token(usuario)}
+
 
 class JWTAuthentication(BaseAuthentication):
     def authenticate(self, request):
@@ -35,12 +67,27 @@ class JWTAuthentication(BaseAuthentication):
                 #print(f"❌ Error decodificando: {e}")  # 👈 DEBUG
                 raise AuthenticationFailed('Token inválido')
             
+            if payload.get('typ') == 'refresh':
+                raise AuthenticationFailed('Un refresh token no sirve como token de acceso')
+            if 'jti' in payload and revocacion_tokens.esta_revocado(payload['jti'], payload['exp']):
+                raise AuthenticationFailed('Token revocado')
+
+            # Tokens con versión de roles ('rv'): los roles se toman del token ya verificado.
+            # Los tokens viejos sin 'rv' siguen consultando los roles en la base.
+            roles_del_token = None
+            if getattr(settings, 'AUTH_ROLES_DESDE_TOKEN', True) and 'rv' in payload:
+                roles_del_token = payload.get('roles') or []
+
             try:
-                usuario = Usuario.objects.get(id=payload['id'])
+                # Cache de pocos segundos: evita leer el usuario y sus roles en cada request
+                usuario = cache_principales.obtener(payload['id'], token, roles=roles_del_token)
                 #print(f"✅ Usuario encontrado: {usuario.email}")  # 👈 DEBUG
             except Usuario.DoesNotExist:
                 #print(f"❌ Usuario no existe: {payload['id']}")  # 👈 DEBUG
                 raise AuthenticationFailed('Usuario no encontrado')
+
+            if roles_del_token is not None and payload['rv'] != usuario.roles_version:
+                raise AuthenticationFailed('Los roles del usuario cambiaron. Inicie sesión nuevamente.')
             
             return (usuario, token)
             
@@ -0,0 +1,27 @@
+# socios/hashers.py
+import base64
+import hashlib
+
+from django.conf import settings
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+
+
+class PBKDF2IteracionesHasher(PBKDF2PasswordHasher):
+    """
+    PBKDF2-SHA256 con costo configurable (CONTRASENAS_ITERACIONES).
+    Usa el mismo formato que el hasher de Django, así que las contraseñas existentes
+    siguen validando; las que tienen otro costo se re-hashean al iniciar sesión.
+    """
+
+    @property
+    def iterations(self):
+        return getattr(settings, 'CONTRASENAS_ITERACIONES', None) or PBKDF2PasswordHasher.iterations
+
+
+def pbkdf2_base64(contrasena, salt, iteraciones, digest):
+    """
+    Cálculo puro de PBKDF2 (solo hashlib), para correr en los procesos del pool
+    sin cargar Django. Devuelve el hash en base64, como lo guarda Django.
+    """
+    crudo = hashlib.pbkdf2_hmac(digest, contrasena.encode(), salt.encode(), iteraciones)
+    return base64.b64encode(crudo).decode('ascii').strip()
@@ -0,0 +1,31 @@
+# socios/management/commands/actualizar_elegibilidad.py
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from socios.services.elegibilidad import recalcular_elegibilidad, actualizar_elegibilidad_vencida
+
+
+class Command(BaseCommand):
+    help = """
+    Mantiene la tabla de elegibilidad de acceso del molinete.
+    Pensado para correr una vez por día (cron) apenas cambia la fecha.
+    Ejemplo: manage.py actualizar_elegibilidad --todos
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--todos',
+            action='store_true',
+            help='Recalcula las filas de todos los socios, no solo las que quedaron desactualizadas.'
+        )
+
+    def handle(self, *args, **options):
+        hoy = timezone.now().date()
+        self.stdout.write(self.style.WARNING(f'Actualizando elegibilidad de acceso al {hoy.strftime("%d/%m/%Y")}...'))
+
+        if options['todos']:
+            filas = recalcular_elegibilidad(hoy=hoy)
+        else:
+            filas = actualizar_elegibilidad_vencida(hoy=hoy)
+
+        self.stdout.write(self.style.SUCCESS(f'✅ ÉXITO: {filas} fila(s) de elegibilidad recalculadas.'))
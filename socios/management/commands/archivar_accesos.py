@@ -0,0 +1,70 @@
+# socios/management/commands/archivar_accesos.py
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from socios.models.registro_acceso import RegistroAcceso, ArchivoRegistroAcceso
+from socios.services.archivo_accesos import archivar_mes, mes_siguiente
+
+
+class Command(BaseCommand):
+    help = """
+    Mueve los meses viejos del historial del molinete a archivos comprimidos (JSONL + gzip).
+    Quedan en la tabla los últimos REGISTRO_ACCESOS_MESES_ACTIVOS meses (incluido el actual).
+    El historial sigue mostrando los meses archivados cuando el rango los pide.
+    Ejemplo: manage.py archivar_accesos --meses 6
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--meses',
+            type=int,
+            default=None,
+            help='Cantidad de meses a conservar en la tabla (incluido el actual).'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Muestra los meses que se archivarían sin modificar nada.'
+        )
+
+    def handle(self, *args, **options):
+        meses = options['meses'] or getattr(settings, 'REGISTRO_ACCESOS_MESES_ACTIVOS', 3)
+        if meses < 1:
+            raise CommandError('Se debe conservar al menos el mes actual (--meses 1).')
+
+        # --- 1. Primer mes que queda en la tabla ---
+        hoy = timezone.localdate()
+        anio, mes = hoy.year, hoy.month
+        for _ in range(meses - 1):
+            anio, mes = (anio - 1, 12) if mes == 1 else (anio, mes - 1)
+        limite = (anio, mes)
+
+        mas_antiguo = RegistroAcceso.objects.order_by('fecha_hora').values_list('fecha_hora', flat=True).first()
+        if mas_antiguo is None:
+            self.stdout.write(self.style.WARNING('No hay registros de acceso en la tabla.'))
+            return
+
+        # --- 2. Meses a archivar, del más antiguo al más reciente ---
+        mas_antiguo = timezone.localtime(mas_antiguo)
+        periodo = (mas_antiguo.year, mas_antiguo.month)
+        archivados = set(ArchivoRegistroAcceso.objects.values_list('periodo', flat=True))
+        total = 0
+
+        while periodo < limite:
+            nombre = f'{periodo[0]:04d}-{periodo[1]:02d}'
+            if nombre in archivados:
+                self.stdout.write(self.style.WARNING(f'   ⚠️  {nombre} ya estaba archivado, se omite.'))
+            elif options['dry_run']:
+                self.stdout.write(f'   - {nombre} se archivaría.')
+            else:
+                archivo = archivar_mes(*periodo)
+                if archivo:
+                    total += archivo.cantidad
+                    self.stdout.write(f'   📦 {nombre}: {archivo.cantidad} registro(s) -> {archivo.ruta}')
+            periodo = mes_siguiente(*periodo)
+
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING('Simulación: no se modificó nada.'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'✅ ÉXITO: {total} registro(s) archivados.'))
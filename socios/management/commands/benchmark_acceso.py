@@ -0,0 +1,269 @@
+# socios/management/commands/benchmark_acceso.py
+
+import random
+import statistics
+import time
+import uuid
+from collections import defaultdict
+from datetime import timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from socios.models import Usuario, SocioInfo, NivelSocio, Cuota, Pago
+from socios.services.credenciales import indice_credenciales
+from socios.services.elegibilidad import recalcular_elegibilidad
+from socios.services.saldos import recalcular_saldos
+from socios.services.eventos_proximos import eventos_proximos
+from socios.services.registro_accesos import registrador_accesos
+from socios.views.acceso import validar_acceso
+
+# Mezcla de escaneos del molinete: (tipo, peso)
+MEZCLA = [
+    ('qr_valido', 45),
+    ('dni_valido', 25),
+    ('desconocido', 10),
+    ('deudor', 12),
+    ('inactivo', 8),
+]
+
+
+class Command(BaseCommand):
+    help = """
+    Benchmark del molinete: carga N socios con historial de cuotas y pagos, reproduce
+    una mezcla de escaneos (QR, DNI, código desconocido, deudor, inactivo) contra
+    validar_acceso en el mismo proceso, e informa escaneos por segundo, latencias
+    p50/p90/p99 y consultas por escaneo.
+    Todo corre dentro de una transacción que se revierte al final.
+    Ejemplo: manage.py benchmark_acceso --socios 2000 --escaneos 5000 --max-p99-ms 20
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument('--socios', type=int, default=500, help='Socios a generar.')
+        parser.add_argument('--escaneos', type=int, default=2000, help='Escaneos a reproducir.')
+        parser.add_argument('--meses', type=int, default=12, help='Meses de historial de cuotas por socio.')
+        parser.add_argument('--calentamiento', type=int, default=50, help='Escaneos previos que no se miden.')
+        parser.add_argument('--semilla', type=int, default=42, help='Semilla para que las corridas sean comparables.')
+        parser.add_argument('--max-p99-ms', type=float, default=None, help='Falla si el p99 supera este valor.')
+        parser.add_argument('--max-consultas', type=float, default=None, help='Falla si el promedio de consultas por escaneo lo supera.')
+
+    def handle(self, *args, **options):
+        if options['socios'] < 10 or options['escaneos'] < 1:
+            raise CommandError('Se necesitan al menos 10 socios y 1 escaneo.')
+        self.random = random.Random(options['semilla'])
+
+        try:
+            with transaction.atomic():
+                resultado = self._correr(options)
+                transaction.set_rollback(True)
+        finally:
+            # El índice y la cache quedaron con datos de la transacción revertida
+            indice_credenciales.invalidar()
+            eventos_proximos.invalidar()
+
+        self._informar(resultado, options)
+
+    # --- 1. Datos de prueba ---
+
+    def _cargar_datos(self, cantidad, meses):
+        hoy = timezone.now().date()
+        contrasena = make_password('benchmark')
+        nivel, _ = NivelSocio.objects.get_or_create(nivel=1, defaults={'descuento': 0})
+        prefijo = uuid.uuid4().hex[:8]
+
+        portero = Usuario.objects.create(
+            email=f'portero-{prefijo}@benchmark.local', nombre='Portero', apellido='Benchmark', contrasena=contrasena
+        )
+        usuarios = Usuario.objects.bulk_create([
+            Usuario(
+                email=f'socio-{prefijo}-{i}@benchmark.local',
+                nombre=f'Socio{i}', apellido='Benchmark',
+                nro_documento=f'BM{prefijo}{i:07d}',
+                contrasena=contrasena,
+            )
+            for i in range(cantidad)
+        ], batch_size=1000)
+        if usuarios[0].pk is None:
+            # Motores que no devuelven IDs en bulk_create
+            usuarios = list(Usuario.objects.filter(email__startswith=f'socio-{prefijo}-').order_by('id'))
+
+        # ~8% inactivos, ~12% con cuotas vencidas impagas, el resto al día
+        perfiles = {}
+        socios = []
+        for usuario in usuarios:
+            sorteo = self.random.random()
+            perfil = 'inactivo' if sorteo < 0.08 else 'deudor' if sorteo < 0.20 else 'al_dia'
+            perfiles[usuario.pk] = perfil
+            socios.append(SocioInfo(
+                usuario=usuario, nivel_socio=nivel,
+                estado='inactivo' if perfil == 'inactivo' else 'activo'
+            ))
+        SocioInfo.objects.bulk_create(socios, batch_size=1000)
+
+        cuotas = []
+        for usuario in usuarios:
+            for atras in range(meses - 1, -1, -1):
+                anio, mes = divmod(hoy.year * 12 + hoy.month - 1 - atras, 12)
+                vencimiento = hoy.replace(year=anio, month=mes + 1, day=5)
+                cuotas.append(Cuota(
+                    usuario=usuario, periodo=vencimiento.strftime('%Y-%m'),
+                    monto=15000, saldo=15000, vencimiento=vencimiento
+                ))
+        Cuota.objects.bulk_create(cuotas, batch_size=2000)
+        if cuotas[0].pk is None:
+            cuotas = list(Cuota.objects.filter(usuario__in=usuarios).order_by('usuario_id', 'vencimiento'))
+
+        # Los deudores no pagaron sus últimas 1 a 3 cuotas vencidas
+        impagas = {}
+        pagos = []
+        for cuota in cuotas:
+            if cuota.vencimiento >= hoy:
+                continue
+            if perfiles[cuota.usuario_id] == 'deudor':
+                pendientes = impagas.setdefault(cuota.usuario_id, self.random.randint(1, 3))
+                if cuota.vencimiento >= hoy - timedelta(days=30 * pendientes):
+                    continue
+            pagos.append(Pago(
+                cuota=cuota, monto=cuota.monto, estado='completado',
+                medio_pago=self.random.choice(['efectivo', 'transferencia', 'mercadopago'])
+            ))
+        Pago.objects.bulk_create(pagos, batch_size=2000)
+
+        # bulk_create no dispara señales: se recalculan los saldos y la elegibilidad de todos
+        recalcular_saldos([p.cuota_id for p in pagos])
+        recalcular_elegibilidad([u.pk for u in usuarios], hoy=hoy)
+        return portero, usuarios, perfiles, len(cuotas), len(pagos)
+
+    def _armar_escaneos(self, usuarios, perfiles, cantidad):
+        por_perfil = defaultdict(list)
+        for usuario in usuarios:
+            por_perfil[perfiles[usuario.pk]].append(usuario)
+
+        tipos, pesos = zip(*MEZCLA)
+        escaneos = []
+        for tipo in self.random.choices(tipos, weights=pesos, k=cantidad):
+            if tipo == 'desconocido':
+                codigo = self.random.choice([str(uuid.uuid4()), f'{self.random.randint(10**9, 10**10)}'])
+            elif tipo in ('deudor', 'inactivo') and por_perfil[tipo]:
+                usuario = self.random.choice(por_perfil[tipo])
+                codigo = self.random.choice([str(usuario.qr_token), usuario.nro_documento])
+            else:
+                usuario = self.random.choice(por_perfil['al_dia'])
+                codigo = usuario.nro_documento if tipo == 'dni_valido' else str(usuario.qr_token)
+            escaneos.append((tipo, codigo))
+        return escaneos
+
+    # --- 2. Reproducción ---
+
+    def _correr(self, options):
+        inicio = time.perf_counter()
+        portero, usuarios, perfiles, total_cuotas, total_pagos = self._cargar_datos(options['socios'], options['meses'])
+        carga_datos = time.perf_counter() - inicio
+
+        factory = APIRequestFactory()
+        consultas = [0]
+
+        def contar_consultas(execute, sql, params, many, context):
+            consultas[0] += 1
+            return execute(sql, params, many, context)
+
+        def escanear(codigo):
+            request = factory.post('/socios/api/control-acceso/', {'qr_data': codigo}, format='json')
+            force_authenticate(request, user=portero)
+            return validar_acceso(request)
+
+        # Arranque en frío: carga completa del índice de credenciales
+        indice_credenciales.invalidar()
+        eventos_proximos.invalidar()
+        inicio = time.perf_counter()
+        indice_credenciales.buscar(usuarios[0].nro_documento)
+        carga_indice = time.perf_counter() - inicio
+
+        with registrador_accesos.en_primer_plano():
+            for _, codigo in self._armar_escaneos(usuarios, perfiles, options['calentamiento']):
+                escanear(codigo)
+
+            medidos = []
+            estados = defaultdict(int)
+            with connection.execute_wrapper(contar_consultas):
+                inicio_total = time.perf_counter()
+                for tipo, codigo in self._armar_escaneos(usuarios, perfiles, options['escaneos']):
+                    consultas_antes = consultas[0]
+                    inicio = time.perf_counter()
+                    response = escanear(codigo)
+                    medidos.append((tipo, time.perf_counter() - inicio, consultas[0] - consultas_antes))
+                    estados[response.data.get('estado')] += 1
+                duracion_total = time.perf_counter() - inicio_total
+
+            inicio = time.perf_counter()
+        escritura_registros = time.perf_counter() - inicio
+
+        return {
+            'socios': len(usuarios), 'cuotas': total_cuotas, 'pagos': total_pagos,
+            'carga_datos': carga_datos, 'carga_indice': carga_indice,
+            'medidos': medidos, 'estados': dict(estados),
+            'duracion_total': duracion_total, 'escritura_registros': escritura_registros,
+            'registrador': registrador_accesos.estadisticas(),
+        }
+
+    # --- 3. Informe ---
+
+    def _informar(self, r, options):
+        latencias = sorted(ms * 1000 for _, ms, _ in r['medidos'])
+        total_consultas = [c for _, _, c in r['medidos']]
+        p99 = _percentil(latencias, 99)
+        consultas_promedio = statistics.mean(total_consultas)
+
+        self.stdout.write(self.style.SUCCESS('\n📊 BENCHMARK DEL MOLINETE'))
+        self.stdout.write(
+            f"   Datos: {r['socios']} socios, {r['cuotas']} cuotas, {r['pagos']} pagos "
+            f"(cargados en {r['carga_datos']:.2f}s)"
+        )
+        self.stdout.write(f"   Carga inicial del índice: {r['carga_indice'] * 1000:.1f} ms")
+        self.stdout.write(
+            f"   Escaneos: {len(latencias)} en {r['duracion_total']:.2f}s -> "
+            f"{len(latencias) / r['duracion_total']:.0f} escaneos/s"
+        )
+        self.stdout.write(
+            f"   Latencia (ms): p50={_percentil(latencias, 50):.2f}  p90={_percentil(latencias, 90):.2f}  "
+            f"p99={p99:.2f}  máx={latencias[-1]:.2f}"
+        )
+        self.stdout.write(f"   Consultas por escaneo: promedio={consultas_promedio:.2f}  máx={max(total_consultas)}")
+        self.stdout.write(f"   Resultados: {r['estados']}")
+        self.stdout.write(
+            f"   Registros de acceso escritos en lote: {r['registrador']['escritos']} "
+            f"en {r['escritura_registros'] * 1000:.1f} ms (descartados: {r['registrador']['descartados']})"
+        )
+
+        self.stdout.write('\n   Por tipo de escaneo:')
+        por_tipo = defaultdict(list)
+        for tipo, segundos, cantidad in r['medidos']:
+            por_tipo[tipo].append((segundos * 1000, cantidad))
+        for tipo, _ in MEZCLA:
+            filas = por_tipo.get(tipo)
+            if not filas:
+                continue
+            ms = sorted(f[0] for f in filas)
+            self.stdout.write(
+                f"   - {tipo:<12} n={len(filas):<6} p50={_percentil(ms, 50):.2f} ms  "
+                f"p99={_percentil(ms, 99):.2f} ms  consultas={statistics.mean(f[1] for f in filas):.2f}"
+            )
+
+        errores = []
+        if options['max_p99_ms'] is not None and p99 > options['max_p99_ms']:
+            errores.append(f"p99 {p99:.2f} ms > {options['max_p99_ms']} ms")
+        if options['max_consultas'] is not None and consultas_promedio > options['max_consultas']:
+            errores.append(f"consultas por escaneo {consultas_promedio:.2f} > {options['max_consultas']}")
+        if errores:
+            raise CommandError('❌ Regresión de rendimiento: ' + '; '.join(errores))
+        self.stdout.write(self.style.SUCCESS('\n✅ Benchmark completado (los datos de prueba se revirtieron).'))
+
+
+def _percentil(valores_ordenados, percentil):
+    if not valores_ordenados:
+        return 0.0
+    posicion = min(len(valores_ordenados) - 1, int(round(percentil / 100 * (len(valores_ordenados) - 1))))
+    return valores_ordenados[posicion]
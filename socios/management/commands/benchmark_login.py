@@ -0,0 +1,74 @@
+# socios/management/commands/benchmark_login.py
+
+import os
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test import override_settings
+from socios.services.contrasenas import PoolContrasenas
+
+
+class Command(BaseCommand):
+    help = """
+    Mide cuántos inicios de sesión por segundo soporta la verificación de contraseñas
+    según la cantidad de procesos del pool de hashing.
+    Simula N hilos de requests verificando contraseñas en simultáneo.
+    Ejemplo: manage.py benchmark_login --workers 0,1,2,4 --logins 200 --concurrencia 16
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=str, default='0,1,2,4', help='Cantidades de procesos a comparar, separadas por coma.')
+        parser.add_argument('--logins', type=int, default=100, help='Verificaciones por corrida.')
+        parser.add_argument('--concurrencia', type=int, default=8, help='Hilos de request simultáneos.')
+        parser.add_argument('--iteraciones', type=int, default=None, help='Costo de PBKDF2 (por defecto, CONTRASENAS_ITERACIONES).')
+
+    def handle(self, *args, **options):
+        try:
+            cantidades = [int(w) for w in options['workers'].split(',')]
+        except ValueError:
+            raise CommandError("--workers debe ser una lista de enteros, ej: 0,1,2,4")
+        if options['logins'] < 1 or options['concurrencia'] < 1:
+            raise CommandError('--logins y --concurrencia deben ser mayores a 0.')
+
+        iteraciones = options['iteraciones'] or getattr(settings, 'CONTRASENAS_ITERACIONES', None)
+        with override_settings(CONTRASENAS_ITERACIONES=iteraciones):
+            # Un hash de referencia, calculado con el costo a medir
+            codificado = PoolContrasenas(workers=0).hashear('benchmark-login')
+            self.stdout.write(self.style.WARNING(
+                f'Benchmark de login: {options["logins"]} verificaciones, {options["concurrencia"]} hilos, '
+                f'{codificado.split("$")[1]} iteraciones, {os.cpu_count()} CPU(s).'
+            ))
+
+            for workers in cantidades:
+                self._correr(workers, codificado, options['logins'], options['concurrencia'])
+
+        self.stdout.write(self.style.SUCCESS('✅ Benchmark completado.'))
+
+    def _correr(self, workers, codificado, logins, concurrencia):
+        pool = PoolContrasenas(workers=workers, max_pendientes=max(concurrencia, 1), espera=300)
+        try:
+            pool.verificar('benchmark-login', codificado)  # Arranque de los procesos, fuera de la medición
+
+            def verificar(_):
+                inicio = time.perf_counter()
+                valida, _rehash = pool.verificar('benchmark-login', codificado)
+                if not valida:
+                    raise CommandError('La verificación de la contraseña falló.')
+                return time.perf_counter() - inicio
+
+            inicio = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=concurrencia) as hilos:
+                latencias = sorted(ms * 1000 for ms in hilos.map(verificar, range(logins)))
+            duracion = time.perf_counter() - inicio
+        finally:
+            pool.cerrar()
+
+        modo = 'en el hilo del request' if workers <= 0 else f'{workers} proceso(s)'
+        p99 = latencias[min(len(latencias) - 1, int(round(0.99 * (len(latencias) - 1))))]
+        self.stdout.write(
+            f'   - {modo:<24} {logins / duracion:8.1f} logins/s   '
+            f'p50={statistics.median(latencias):.1f} ms   p99={p99:.1f} ms'
+        )
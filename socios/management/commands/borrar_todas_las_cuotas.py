@@ -1,14 +1,18 @@
 # socios/management/commands/borrar_todas_las_cuotas.py
 
-import sys
+import re
+
 from django.core.management.base import BaseCommand, CommandError
-from django.db import transaction
 from socios.models import Cuota, Pago
+from socios.services.facturacion import TAMANO_LOTE, borrar_cuotas, truncar_cuotas
 
 class Command(BaseCommand):
     help = """
-    ELIMINA TODAS LAS CUOTAS Y PAGOS ASOCIADOS DE LA BASE DE DATOS.
+    ELIMINA TODAS LAS CUOTAS Y PAGOS ASOCIADOS DE LA BASE DE DATOS
+    (o solo las de un período / anteriores a un período, con --periodo y --antes-de).
     ¡¡¡ADVERTENCIA: ESTA ACCIÓN ES IRREVERSIBLE Y DEBE USARSE SOLO EN ENTORNOS DE DESARROLLO!!!
+    Borra por lotes, cada uno en su propia transacción; con --truncar vacía las tablas de una vez.
+    Ejemplo: manage.py borrar_todas_las_cuotas --antes-de 2024-01 --batch-size 10000
     """
 
     def add_arguments(self, parser):
@@ -18,24 +22,67 @@ class Command(BaseCommand):
             action='store_true',
             help='Salta la confirmación interactiva. Útil para scripts automáticos.'
         )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=TAMANO_LOTE,
+            help='Cuotas borradas por transacción.'
+        )
+        parser.add_argument(
+            '--periodo',
+            type=str,
+            help='Solo las cuotas de este período (AAAA-MM).'
+        )
+        parser.add_argument(
+            '--antes-de',
+            type=str,
+            help='Solo las cuotas de períodos anteriores a este (AAAA-MM, no incluido).'
+        )
+        parser.add_argument(
+            '--truncar',
+            action='store_true',
+            help='Vacía las tablas con TRUNCATE en vez de borrar por lotes. No admite filtros.'
+        )
 
     def handle(self, *args, **options):
         """Lógica principal del comando."""
         forzar = options['forzar']
-        
-        # --- 1. Contar los registros a eliminar para informar al usuario ---
-        total_cuotas = Cuota.objects.count()
-        total_pagos = Pago.objects.count()
+        periodo, antes_de = options['periodo'], options['antes_de']
+
+        # --- 1. Validar argumentos y armar el filtro ---
+        for nombre, valor in (('--periodo', periodo), ('--antes-de', antes_de)):
+            if valor and not re.fullmatch(r'\d{4}-(0[1-9]|1[0-2])', valor):
+                raise CommandError(f"'{nombre}' debe tener el formato AAAA-MM.")
+        if options['batch_size'] < 1:
+            raise CommandError("'--batch-size' debe ser mayor a 0.")
+        if options['truncar'] and (periodo or antes_de):
+            raise CommandError("'--truncar' borra todo: no se puede combinar con --periodo ni --antes-de.")
+
+        cuotas = Cuota.objects.all()
+        if periodo:
+            cuotas = cuotas.filter(periodo=periodo)
+        if antes_de:
+            # Los períodos 'AAAA-MM' se ordenan bien como texto
+            cuotas = cuotas.filter(periodo__lt=antes_de)
+        descripcion = "todas las cuotas"
+        if periodo or antes_de:
+            descripcion = "las cuotas" + (f" del período {periodo}" if periodo else "") + (
+                f" anteriores a {antes_de}" if antes_de else ""
+            )
+
+        # --- 2. Contar los registros a eliminar para informar al usuario ---
+        total_cuotas = cuotas.count()
+        total_pagos = Pago.objects.filter(cuota__in=cuotas).count()
 
         if total_cuotas == 0 and total_pagos == 0:
             self.stdout.write(self.style.SUCCESS("✅ No hay cuotas ni pagos para borrar."))
             return
 
-        # --- 2. Advertencia y Confirmación ---
+        # --- 3. Advertencia y Confirmación ---
         self.stdout.write(self.style.WARNING("======================================================"))
         self.stdout.write(self.style.ERROR("           ¡¡¡ATENCIÓN: OPERACIÓN DESTRUCTIVA!!!"))
         self.stdout.write(self.style.WARNING("======================================================"))
-        self.stdout.write(f"Este script eliminará permanentemente:")
+        self.stdout.write(f"Este script eliminará permanentemente {descripcion}:")
         self.stdout.write(self.style.WARNING(f"  - {total_cuotas} cuota(s)"))
         self.stdout.write(self.style.WARNING(f"  - {total_pagos} pago(s) asociados"))
         self.stdout.write("Esta acción no se puede deshacer.")
@@ -48,22 +95,36 @@ class Command(BaseCommand):
                 self.stdout.write(self.style.ERROR("\n❌ Operación cancelada. No se ha borrado nada."))
                 return
 
-        # --- 3. Ejecución de la eliminación ---
+        # --- 4. Ejecución de la eliminación ---
         self.stdout.write(self.style.WARNING("\nProcediendo con la eliminación..."))
-        
-        try:
-            # Usamos una transacción para asegurar que todo se borre o nada se borre
-            with transaction.atomic():
-                # Primero borramos los pagos para evitar problemas de Foreign Key
-                pagos_borrados, _ = Pago.objects.all().delete()
-                # Luego borramos las cuotas
-                cuotas_borradas, _ = Cuota.objects.all().delete()
-            
-            self.stdout.write(self.style.SUCCESS("======================================================"))
-            self.stdout.write(self.style.SUCCESS("✅ ÉXITO: Todos los registros han sido eliminados."))
-            self.stdout.write(self.style.SUCCESS(f"   - Pagos eliminados: {pagos_borrados}"))
-            self.stdout.write(self.style.SUCCESS(f"   - Cuotas eliminadas: {cuotas_borradas}"))
-            self.stdout.write(self.style.SUCCESS("======================================================"))
 
+        avance = {'cuotas': 0, 'pagos': 0}
+
+        def informar_lote(ultimo_id, cuotas_lote, pagos_lote):
+            avance['cuotas'] += cuotas_lote
+            avance['pagos'] += pagos_lote
+            self.stdout.write(
+                f"   ... hasta la cuota ID {ultimo_id}: {avance['cuotas']}/{total_cuotas} cuotas, "
+                f"{avance['pagos']} pagos"
+            )
+
+        try:
+            if options['truncar']:
+                cuotas_borradas, pagos_borrados = truncar_cuotas()
+            else:
+                cuotas_borradas, pagos_borrados = borrar_cuotas(
+                    cuotas, tamano_lote=options['batch_size'], al_confirmar_lote=informar_lote
+                )
         except Exception as e:
-            raise CommandError(f"❌ Error durante la eliminación. La operación fue revertida. Detalle: {str(e)}")
\ No newline at end of file
+            if options['truncar']:
+                raise CommandError(f"❌ Error durante la eliminación. La operación fue revertida. Detalle: {str(e)}")
+            raise CommandError(
+                f"❌ Error durante la eliminación: {e}. Los lotes anteriores ya quedaron borrados "
+                f"({avance['cuotas']} cuotas, {avance['pagos']} pagos); vuelva a ejecutar el comando para completar."
+            )
+
+        self.stdout.write(self.style.SUCCESS("======================================================"))
+        self.stdout.write(self.style.SUCCESS("✅ ÉXITO: Todos los registros han sido eliminados."))
+        self.stdout.write(self.style.SUCCESS(f"   - Pagos eliminados: {pagos_borrados}"))
+        self.stdout.write(self.style.SUCCESS(f"   - Cuotas eliminadas: {cuotas_borradas}"))
+        self.stdout.write(self.style.SUCCESS("======================================================"))
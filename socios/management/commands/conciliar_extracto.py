@@ -0,0 +1,69 @@
+# socios/management/commands/conciliar_extracto.py
+
+import csv
+import time
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from socios.services.conciliacion_bancaria import conciliar_extracto, formato_de, leer_extracto
+
+
+class Command(BaseCommand):
+    help = """
+    Concilia un extracto bancario (CSV u OFX) contra las cuotas pendientes y registra
+    los pagos por transferencia. Cada crédito se imputa por el código de cuota de la
+    referencia ("CUOTA 123"), por el DNI del socio o por un monto que no se repita.
+    Volver a importar el mismo extracto no duplica pagos.
+    Ejemplo: manage.py conciliar_extracto extracto_marzo.csv --simular
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument('archivo', type=str, help='Ruta del extracto (.csv, .ofx o .qfx).')
+        parser.add_argument('--formato', choices=['csv', 'ofx'], help='Por defecto, según la extensión.')
+        parser.add_argument('--encoding', type=str, default='utf-8-sig', help='Codificación del archivo.')
+        parser.add_argument('--simular', action='store_true', help='Muestra el resultado sin registrar pagos.')
+        parser.add_argument('--reporte', type=str, help='CSV donde guardar las líneas sin conciliar.')
+
+    def handle(self, *args, **options):
+        ruta = Path(options['archivo'])
+        if not ruta.is_file():
+            raise CommandError(f"No existe el archivo '{ruta}'.")
+        try:
+            formato = options['formato'] or formato_de(ruta.name)
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        inicio = time.perf_counter()
+        try:
+            # El archivo se lee línea por línea: nunca está entero en memoria
+            with ruta.open(encoding=options['encoding'], newline='') as archivo:
+                resultado = conciliar_extracto(
+                    leer_extracto(archivo, formato), simular=options['simular'], nombre_archivo=ruta.name
+                )
+        except (ValueError, UnicodeDecodeError) as e:
+            raise CommandError(f"❌ No se pudo leer el extracto: {e}")
+        segundos = time.perf_counter() - inicio
+
+        prefijo = "🔎 SIMULACIÓN: " if options['simular'] else "✅ "
+        self.stdout.write(self.style.SUCCESS(
+            f"{prefijo}{resultado.conciliadas} de {resultado.lineas} movimientos conciliados: "
+            f"{resultado.pagos} pagos por ${resultado.total} en {segundos:.2f}s."
+        ))
+        if resultado.ya_registradas:
+            self.stdout.write(self.style.WARNING(f"Se saltearon {resultado.ya_registradas} comprobantes ya importados."))
+        if resultado.ignoradas:
+            self.stdout.write(f"Se ignoraron {resultado.ignoradas} débitos o movimientos en cero.")
+
+        if resultado.sin_conciliar:
+            self.stdout.write(self.style.WARNING(f"⚠️ {len(resultado.sin_conciliar)} líneas sin conciliar:"))
+            for linea in resultado.sin_conciliar[:20]:
+                self.stdout.write(f"   línea {linea.linea}: ${linea.monto} '{linea.referencia}' -> {linea.motivo}")
+            if len(resultado.sin_conciliar) > 20:
+                self.stdout.write("   ...")
+
+        if options['reporte']:
+            with open(options['reporte'], 'w', encoding='utf-8', newline='') as reporte:
+                escritor = csv.writer(reporte)
+                escritor.writerow(['linea', 'monto', 'referencia', 'descripcion', 'motivo'])
+                escritor.writerows(resultado.sin_conciliar)
+            self.stdout.write(f"Reporte de líneas sin conciliar en '{options['reporte']}'.")
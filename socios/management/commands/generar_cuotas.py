@@ -1,81 +1,76 @@
 # socios/management/commands/generar_cuotas.py
 
-from django.core.management.base import BaseCommand
+import re
+
+from django.core.management.base import BaseCommand, CommandError
 from django.utils import timezone
-from datetime import timedelta
-from django.db import transaction
-from django.conf import settings
-from socios.models import SocioInfo, Cuota
+from socios.services.facturacion import TAMANO_LOTE, generar_cuotas_en_paralelo, generar_cuotas_periodo
+
 
 class Command(BaseCommand):
-    help = 'Genera cuotas mensuales para todos los socios activos de forma atómica y masiva.'
-    
-    def handle(self, *args, **options):
-        periodo_actual = timezone.now().date().strftime("%Y-%m")
-        self.stdout.write(self.style.SUCCESS(f'Iniciando generación de cuotas para el período {periodo_actual}...'))
-        
-        try:
-            cuotas_a_crear = []
-            socios_activos_ids = set() # Para evitar procesar duplicados si los hubiera
-            
-            # --- Inicia la transacción ---
-            # Si algo falla aquí, todos los cambios se revierten.
-            with transaction.atomic():
-                
-                # 1. Parámetros desde settings para mayor flexibilidad
-                MONTO_BASE = getattr(settings, 'VALOR_CUOTA_BASE', 15000.00)
-                DIA_VENCIMIENTO = getattr(settings, 'DIA_VENCIMIENTO_CUOTA', 5)
-                
-                hoy = timezone.now().date()
-                vencimiento = (hoy + timedelta(days=35)).replace(day=DIA_VENCIMIENTO)
-                
-                # 2. Obtener socios activos que aún NO tienen cuota este mes
-                socios_activos = SocioInfo.objects.filter(estado='activo') \
-                                                  .exclude(usuario__cuotas__periodo=periodo_actual) \
-                                                  .select_related('usuario', 'nivel_socio')
-                
-                total_socios_a_procesar = socios_activos.count()
-                if total_socios_a_procesar == 0:
-                    self.stdout.write(self.style.WARNING('No hay socios activos a los que generarles cuotas.'))
-                    return
+    help = """
+    Genera la cuota mensual de todos los socios activos, con el descuento de su nivel.
+    Cada lote de socios se inserta con una sola consulta (INSERT ... SELECT). Se puede
+    volver a correr: los socios que ya tienen la cuota del período se saltean.
+    Con --workers N los socios se reparten en N tramos de ID que se generan en
+    procesos separados (pensado para PostgreSQL; SQLite serializa las escrituras).
+    Ejemplo: manage.py generar_cuotas --periodo 2025-03 --lote 10000 --workers 4
+    """
 
-                self.stdout.write(self.style.WARNING(f'Procesando {total_socios_a_procesar} socios...'))
-                
-                for socio_info in socios_activos:
-                    descuento = socio_info.nivel_socio.descuento if socio_info.nivel_socio else 0
-                    monto_final = MONTO_BASE * (1 - descuento / 100)
-                    
-                    # 3. Preparar objetos para bulk_create
-                    cuotas_a_crear.append(
-                        Cuota(
-                            usuario=socio_info.usuario,
-                            periodo=periodo_actual,
-                            monto=monto_final,
-                            vencimiento=vencimiento,
-                            descuento_aplicado=descuento
-                        )
-                    )
-                
-                # 4. Ejecutar una sola consulta masiva a la base de datos
-                if cuotas_a_crear:
-                    Cuota.objects.bulk_create(cuotas_a_crear)
+    def add_arguments(self, parser):
+        parser.add_argument('--periodo', type=str, help='Período a facturar (AAAA-MM). Por defecto, el mes actual.')
+        parser.add_argument('--lote', type=int, default=TAMANO_LOTE, help='Socios por consulta de inserción.')
+        parser.add_argument('--workers', type=int, default=1, help='Procesos en paralelo, uno por tramo de socios.')
 
-            # --- Fin de la transacción ---
-            
-            # Mensajes de éxito solo si la transacción fue completada
-            self.stdout.write(
-                self.style.SUCCESS(
-                    f'✅ ÉXITO: {len(cuotas_a_crear)} cuotas generadas para {periodo_actual}.'
-                )
-            )
-            self.stdout.write(
-                self.style.SUCCESS(
-                    f'📅 Vencimiento establecido para: {vencimiento.strftime("%d/%m/%Y")}.'
+    def handle(self, *args, **options):
+        periodo = options['periodo'] or timezone.now().date().strftime("%Y-%m")
+        if not re.fullmatch(r'\d{4}-(0[1-9]|1[0-2])', periodo):
+            raise CommandError(f"Período inválido: '{periodo}'. Use AAAA-MM.")
+        if options['lote'] < 1:
+            raise CommandError("'--lote' debe ser mayor a 0.")
+        if options['workers'] < 1:
+            raise CommandError("'--workers' debe ser mayor a 0.")
+
+        self.stdout.write(self.style.SUCCESS(f'Iniciando generación de cuotas para el período {periodo}...'))
+        errores = []
+        try:
+            if options['workers'] > 1:
+                resultado, tramos, errores = generar_cuotas_en_paralelo(
+                    periodo, options['workers'], tamano_lote=options['lote']
                 )
+                self._informar_tramos(tramos, errores)
+            else:
+                resultado = generar_cuotas_periodo(periodo, tamano_lote=options['lote'])
+        except Exception as e:
+            # Los lotes ya confirmados quedan; una nueva corrida completa el resto
+            raise CommandError(f'❌ Error durante la generación: {e}. Vuelva a correr el comando para completar el período.')
+
+        if errores:
+            raise CommandError(
+                f'❌ Fallaron {len(errores)} tramo(s); se generaron {resultado.creadas} cuotas en el resto. '
+                'Vuelva a correr el comando: las cuotas existentes se saltean.'
             )
 
-        except Exception as e:
-            # Si la transacción falló, se notifica el error.
+        if resultado.socios == 0:
+            self.stdout.write(self.style.WARNING('No hay socios activos a los que generarles cuotas.'))
+            return
+
+        self.stdout.write(self.style.SUCCESS(
+            f'✅ ÉXITO: {resultado.creadas} cuotas generadas para {periodo} '
+            f'({resultado.existentes} socio(s) ya la tenían).'
+        ))
+        self.stdout.write(self.style.SUCCESS(
+            f'📅 Vencimiento establecido para: {resultado.vencimiento.strftime("%d/%m/%Y")}.'
+        ))
+        self.stdout.write(
+            f'⏱️  {resultado.socios} socios en {resultado.segundos:.2f}s '
+            f'-> {resultado.cuotas_por_segundo:.0f} cuotas/s'
+        )
+
+    def _informar_tramos(self, tramos, errores):
+        for (desde, hasta), r in tramos:
             self.stdout.write(
-                self.style.ERROR(f'❌ Error durante la generación. La operación fue revertida. Detalle: {str(e)}')
-            )
\ No newline at end of file
+                f'   - Tramo ID {desde + 1}-{hasta}: {r.creadas}/{r.socios} cuotas en {r.segundos:.2f}s'
+            )
+        for (desde, hasta), error in errores:
+            self.stdout.write(self.style.ERROR(f'   - Tramo ID {desde + 1}-{hasta}: ❌ {error}'))
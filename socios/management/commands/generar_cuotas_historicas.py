@@ -1,28 +1,34 @@
 # socios/management/commands/generar_cuotas_historicas.py
 
-import sys
+import json
+import os
 from datetime import date
+from pathlib import Path
+
 from django.core.management.base import BaseCommand, CommandError
 from django.utils import timezone
-from django.db import transaction, models
 from django.conf import settings
 from socios.models import SocioInfo, Cuota, Usuario
+from socios.services.facturacion import TAMANO_LOTE, generar_cuotas_historicas, periodos_entre
+
 
 class Command(BaseCommand):
     help = """
-    Genera cuotas histÃ³ricas para socios activos en un rango de fechas.
-    ÃšTIL PARA TESTING Y DESARROLLO. No debe usarse en producciÃ³n sin supervisiÃ³n.
+    Genera cuotas históricas para socios activos en un rango de fechas.
+    ÚTIL PARA TESTING Y DESARROLLO. No debe usarse en producción sin supervisión.
+    Inserta por lotes, cada uno en su propia transacción, y guarda un checkpoint:
+    si la corrida se corta, volver a ejecutar el mismo comando la retoma donde quedó.
     Ejemplo: manage.py generar_cuotas_historicas --ano-inicio 2025 --mes-inicio 1
     """
 
     def add_arguments(self, parser):
-        """AÃ±ade argumentos personalizables al comando."""
+        """Añade argumentos personalizables al comando."""
         hoy = timezone.now().date()
         parser.add_argument(
             '--ano-inicio',
             type=int,
             default=hoy.year,
-            help='AÃ±o de inicio para generar cuotas (por defecto: aÃ±o actual).'
+            help='Año de inicio para generar cuotas (por defecto: año actual).'
         )
         parser.add_argument(
             '--mes-inicio',
@@ -34,7 +40,7 @@ class Command(BaseCommand):
             '--ano-fin',
             type=int,
             default=hoy.year,
-            help='AÃ±o de fin para generar cuotas (por defecto: aÃ±o actual).'
+            help='Año de fin para generar cuotas (por defecto: año actual).'
         )
         parser.add_argument(
             '--mes-fin',
@@ -46,33 +52,52 @@ class Command(BaseCommand):
             '--usuario',
             type=str,
             required=False,
-            help='Email o ID del usuario especÃ­fico para generar cuotas.'
+            help='Email o ID del usuario específico para generar cuotas.'
         )
         parser.add_argument(
             '--forzar',
             action='store_true',
-            help='Salta la confirmaciÃ³n antes de crear las cuotas.'
+            help='Salta la confirmación antes de crear las cuotas.'
+        )
+        parser.add_argument(
+            '--lote',
+            type=int,
+            default=TAMANO_LOTE,
+            help='Cuotas por transacción (aproximado).'
+        )
+        parser.add_argument(
+            '--checkpoint',
+            type=str,
+            default=str(getattr(settings, 'CUOTAS_HISTORICAS_CHECKPOINT', 'cuotas_historicas.checkpoint.json')),
+            help='Archivo donde se guarda el avance para poder retomar.'
+        )
+        parser.add_argument(
+            '--reiniciar',
+            action='store_true',
+            help='Ignora el checkpoint existente y empieza desde el primer socio.'
         )
 
     def handle(self, *args, **options):
-        """LÃ³gica principal del comando."""
+        """Lógica principal del comando."""
         # --- 1. Extraer y validar argumentos ---
         ano_inicio, mes_inicio = options['ano_inicio'], options['mes_inicio']
         ano_fin, mes_fin = options['ano_fin'], options['mes_fin']
         email_o_id_usuario = options['usuario']
         forzar = options['forzar']
-        
+
         try:
             fecha_inicio = date(ano_inicio, mes_inicio, 1)
             fecha_fin = date(ano_fin, mes_fin, 1)
         except ValueError:
-            raise CommandError("Fechas invÃ¡lidas. Verifica el aÃ±o y el mes.")
+            raise CommandError("Fechas inválidas. Verifica el año y el mes.")
 
         if fecha_inicio > fecha_fin:
             raise CommandError("La fecha de inicio no puede ser posterior a la fecha de fin.")
+        if options['lote'] < 1:
+            raise CommandError("'--lote' debe ser mayor a 0.")
 
         # --- 2. Obtener los socios a procesar ---
-        socios_a_procesar = SocioInfo.objects.filter(estado='activo').select_related('usuario', 'nivel_socio')
+        socios_a_procesar = SocioInfo.objects.filter(estado='activo')
 
         if email_o_id_usuario:
             try:
@@ -81,85 +106,93 @@ class Command(BaseCommand):
                     usuario = Usuario.objects.get(email=email_o_id_usuario)
                 else:
                     usuario = Usuario.objects.get(id=int(email_o_id_usuario))
-                
+
                 socios_a_procesar = socios_a_procesar.filter(usuario=usuario)
                 if not socios_a_procesar.exists():
-                    raise CommandError(f"No se encontrÃ³ un socio activo con el identificador '{email_o_id_usuario}'.")
+                    raise CommandError(f"No se encontró un socio activo con el identificador '{email_o_id_usuario}'.")
             except Usuario.DoesNotExist:
                 raise CommandError(f"El usuario '{email_o_id_usuario}' no existe.")
             except ValueError:
-                raise CommandError("El ID de usuario debe ser un nÃºmero.")
+                raise CommandError("El ID de usuario debe ser un número.")
+
+        # --- 3. Checkpoint de una corrida anterior ---
+        periodos = periodos_entre(fecha_inicio, fecha_fin)
+        ruta_checkpoint = Path(options['checkpoint'])
+        parametros = {'desde': periodos[0], 'hasta': periodos[-1], 'usuario': email_o_id_usuario}
+        avance = {**parametros, 'ultimo_usuario_id': 0, 'creadas': 0, 'existentes': 0}
 
-        if not socios_a_procesar.exists():
+        if ruta_checkpoint.exists() and not options['reiniciar']:
+            guardado = json.loads(ruta_checkpoint.read_text(encoding='utf-8'))
+            if {clave: guardado.get(clave) for clave in parametros} != parametros:
+                raise CommandError(
+                    f"El checkpoint '{ruta_checkpoint}' es de otra corrida "
+                    f"({guardado.get('desde')} a {guardado.get('hasta')}). Use --reiniciar o --checkpoint."
+                )
+            avance = guardado
+            self.stdout.write(self.style.WARNING(
+                f"Retomando desde el socio con ID > {avance['ultimo_usuario_id']} "
+                f"({avance['creadas']} cuotas ya generadas)."
+            ))
+
+        pendientes = socios_a_procesar.filter(usuario_id__gt=avance['ultimo_usuario_id'])
+        cantidad_socios = pendientes.count()
+        if cantidad_socios == 0:
             self.stdout.write(self.style.WARNING("No hay socios activos que cumplan los criterios para procesar."))
+            ruta_checkpoint.unlink(missing_ok=True)
             return
 
-        # --- 3. Preparar las cuotas a crear ---
-        MONTO_BASE = getattr(settings, 'VALOR_CUOTA_BASE', 15000.00)
-        DIA_VENCIMIENTO = getattr(settings, 'DIA_VENCIMIENTO_CUOTA', 5)
-        
-        cuotas_a_crear = []
-        cuotas_duplicadas = 0
-
-        # Iterar por cada socio
-        for socio_info in socios_a_procesar:
-            # Iterar por cada mes en el rango
-            fecha_actual = fecha_inicio
-            while fecha_actual <= fecha_fin:
-                periodo = fecha_actual.strftime("%Y-%m")
-                
-                # Comprobar si la cuota ya existe
-                if Cuota.objects.filter(usuario=socio_info.usuario, periodo=periodo).exists():
-                    cuotas_duplicadas += 1
-                else:
-                    descuento = socio_info.nivel_socio.descuento if socio_info.nivel_socio else 0
-                    monto_final = MONTO_BASE * (1 - descuento / 100)
-                    
-                    # Calcular vencimiento (dÃ­a 5 del mes siguiente al perÃ­odo)
-                    vencimiento_mes = fecha_actual.month + 1
-                    vencimiento_ano = fecha_actual.year
-                    if vencimiento_mes > 12:
-                        vencimiento_mes = 1
-                        vencimiento_ano += 1
-                    vencimiento = date(vencimiento_ano, vencimiento_mes, DIA_VENCIMIENTO)
-
-                    cuotas_a_crear.append(
-                        Cuota(
-                            usuario=socio_info.usuario,
-                            periodo=periodo,
-                            monto=monto_final,
-                            vencimiento=vencimiento,
-                            descuento_aplicado=descuento
-                        )
-                    )
-                
-                # Avanzar al siguiente mes
-                if fecha_actual.month == 12:
-                    fecha_actual = date(fecha_actual.year + 1, 1, 1)
-                else:
-                    fecha_actual = date(fecha_actual.year, fecha_actual.month + 1, 1)
-
-        # --- 4. ConfirmaciÃ³n y ejecuciÃ³n ---
-        if not cuotas_a_crear:
-            self.stdout.write(self.style.SUCCESS("No hay cuotas nuevas para generar. Todos los socios ya tienen sus cuotas para los perÃ­odos especificados."))
-            if cuotas_duplicadas > 0:
-                self.stdout.write(self.style.WARNING(f"Se omitieron {cuotas_duplicadas} cuotas que ya existÃ­an."))
+        # --- 4. Confirmación y ejecución ---
+        # Una sola consulta para estimar: el detalle por socio se resuelve lote por lote
+        ya_existentes = Cuota.objects.filter(
+            usuario_id__in=pendientes.values('usuario_id'), periodo__in=periodos
+        ).count()
+        a_generar = cantidad_socios * len(periodos) - ya_existentes
+        if a_generar == 0:
+            self.stdout.write(self.style.SUCCESS("No hay cuotas nuevas para generar. Todos los socios ya tienen sus cuotas para los períodos especificados."))
+            if ya_existentes > 0:
+                self.stdout.write(self.style.WARNING(f"Se omitieron {ya_existentes} cuotas que ya existían."))
+            ruta_checkpoint.unlink(missing_ok=True)
             return
 
-        self.stdout.write(self.style.WARNING(f"Se van a generar {len(cuotas_a_crear)} nuevas cuotas."))
-        if cuotas_duplicadas > 0:
-            self.stdout.write(self.style.WARNING(f"Se omitirÃ¡n {cuotas_duplicadas} cuotas que ya existen."))
+        self.stdout.write(self.style.WARNING(
+            f"Se van a generar {a_generar} nuevas cuotas para {cantidad_socios} socios y {len(periodos)} períodos."
+        ))
+        if ya_existentes > 0:
+            self.stdout.write(self.style.WARNING(f"Se omitirán {ya_existentes} cuotas que ya existen."))
 
         if not forzar:
-            confirmacion = input("Â¿EstÃ¡s seguro de que quieres continuar? [y/N]: ")
+            confirmacion = input("¿Estás seguro de que quieres continuar? [y/N]: ")
             if confirmacion.lower() != 'y':
-                self.stdout.write(self.style.ERROR("OperaciÃ³n cancelada por el usuario."))
+                self.stdout.write(self.style.ERROR("Operación cancelada por el usuario."))
                 return
 
+        def guardar_avance(ultimo_usuario_id, creadas, existentes):
+            avance['ultimo_usuario_id'] = ultimo_usuario_id
+            avance['creadas'] += creadas
+            avance['existentes'] += existentes
+            _escribir_checkpoint(ruta_checkpoint, avance)
+            self.stdout.write(f"   ... socios hasta ID {ultimo_usuario_id}: +{creadas} cuotas (total {avance['creadas']})")
+
         try:
-            with transaction.atomic():
-                Cuota.objects.bulk_create(cuotas_a_crear)
-            
-            self.stdout.write(self.style.SUCCESS(f"âœ… Ã‰XITO: Se generaron {len(cuotas_a_crear)} cuotas histÃ³ricas."))
+            generar_cuotas_historicas(
+                periodos,
+                socios=socios_a_procesar,
+                tamano_lote=options['lote'],
+                desde_usuario_id=avance['ultimo_usuario_id'],
+                al_confirmar_lote=guardar_avance,
+            )
         except Exception as e:
-            raise CommandError(f"âŒ Error durante la creaciÃ³n masiva. La operaciÃ³n fue revertida. Detalle: {str(e)}")
\ No newline at end of file
+            raise CommandError(
+                f"❌ Error durante la creación masiva: {e}. Los lotes anteriores quedaron guardados; "
+                f"vuelva a ejecutar el comando para retomar desde el checkpoint '{ruta_checkpoint}'."
+            )
+
+        ruta_checkpoint.unlink(missing_ok=True)
+        self.stdout.write(self.style.SUCCESS(f"✅ ÉXITO: Se generaron {avance['creadas']} cuotas históricas."))
+
+
+def _escribir_checkpoint(ruta, avance):
+    # Se escribe aparte y se reemplaza: un corte a mitad de escritura no deja un JSON roto
+    temporal = ruta.with_name(ruta.name + '.tmp')
+    temporal.write_text(json.dumps(avance), encoding='utf-8')
+    os.replace(temporal, ruta)
@@ -0,0 +1,103 @@
+# socios/management/commands/procesar_notificaciones_pago.py
+
+import threading
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from socios.services.notificaciones_pago import procesar_notificaciones
+
+
+class Command(BaseCommand):
+    help = """
+    Aplica a Cuota y Pago las notificaciones del webhook de pagos que quedaron en cola.
+    Cada worker toma lotes distintos (select_for_update con skip_locked), así que se
+    pueden correr varios hilos o varias instancias del comando a la vez. Las notificaciones
+    de un mismo pago se aplican siempre en orden de llegada.
+    Ejemplo: manage.py procesar_notificaciones_pago --workers 4
+             manage.py procesar_notificaciones_pago --una-vez   (vacía la cola y termina; para cron)
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=1, help='Hilos que procesan la cola en paralelo.')
+        parser.add_argument(
+            '--lote',
+            type=int,
+            default=getattr(settings, 'PAGOS_NOTIFICACIONES_LOTE', 200),
+            help='Notificaciones por transacción.'
+        )
+        parser.add_argument(
+            '--intervalo',
+            type=float,
+            default=1.0,
+            help='Segundos de espera cuando la cola está vacía.'
+        )
+        parser.add_argument('--una-vez', action='store_true', help='Termina cuando la cola queda vacía.')
+
+    def handle(self, *args, **options):
+        if options['workers'] < 1 or options['lote'] < 1:
+            raise CommandError("'--workers' y '--lote' deben ser mayores a 0.")
+
+        self.detener = threading.Event()
+        self.totales = {'procesadas': 0, 'errores': 0, 'fallidas': 0, 'fallos': 0}
+        self.lock = threading.Lock()
+
+        self.stdout.write(self.style.WARNING(
+            f"Procesando notificaciones de pago con {options['workers']} worker(s), lotes de {options['lote']}..."
+        ))
+        if options['workers'] == 1:
+            self._worker(options)
+        else:
+            hilos = [
+                threading.Thread(target=self._worker_con_conexion, args=(options,), name=f'notificaciones-{i}')
+                for i in range(options['workers'])
+            ]
+            for hilo in hilos:
+                hilo.start()
+            try:
+                for hilo in hilos:
+                    hilo.join()
+            except KeyboardInterrupt:
+                self.detener.set()
+                for hilo in hilos:
+                    hilo.join()
+
+        t = self.totales
+        estilo = self.style.SUCCESS if not (t['errores'] or t['fallidas'] or t['fallos']) else self.style.WARNING
+        self.stdout.write(estilo(
+            f"✅ {t['procesadas']} notificaciones aplicadas, {t['errores']} con error, "
+            f"{t['fallidas']} fallidas (se reintentan), {t['fallos']} lotes fallidos."
+        ))
+
+    def _worker_con_conexion(self, options):
+        # Cada hilo abre su propia conexión: hay que cerrarla al terminar
+        try:
+            self._worker(options)
+        finally:
+            connection.close()
+
+    def _worker(self, options):
+        while not self.detener.is_set():
+            try:
+                resultado = procesar_notificaciones(options['lote'])
+            except KeyboardInterrupt:
+                self.detener.set()
+                break
+            except Exception as e:
+                # No se pudo ni tomar el lote (por ejemplo, se cayó la base); se reintenta
+                self._sumar(fallos=1)
+                self.stderr.write(self.style.ERROR(f"❌ Error procesando un lote: {e}"))
+                self.detener.wait(options['intervalo'])
+                continue
+
+            self._sumar(procesadas=resultado.procesadas, errores=resultado.errores, fallidas=resultado.fallidas)
+            if resultado.total == 0:
+                # Las diferidas esperan a que otro worker termine su lote
+                if options['una_vez'] and not resultado.diferidas:
+                    break
+                self.detener.wait(options['intervalo'])
+
+    def _sumar(self, **cantidades):
+        with self.lock:
+            for clave, cantidad in cantidades.items():
+                self.totales[clave] += cantidad
@@ -0,0 +1,22 @@
+# socios/management/commands/recalcular_saldos.py
+
+from django.core.management.base import BaseCommand
+from socios.services.elegibilidad import recalcular_elegibilidad
+from socios.services.saldos import recalcular_saldos
+
+
+class Command(BaseCommand):
+    help = """
+    Recalcula el estado de pago y el saldo de todas las cuotas a partir de sus pagos completados.
+    Normalmente los mantienen las señales de Pago; sirve para la carga inicial de las
+    columnas o después de cargar pagos con bulk_create o SQL directo.
+    Ejemplo: manage.py recalcular_saldos
+    """
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.WARNING('Recalculando estado de pago y saldo de las cuotas...'))
+        cuotas = recalcular_saldos()
+        filas = recalcular_elegibilidad() if cuotas else 0
+        self.stdout.write(self.style.SUCCESS(
+            f'✅ ÉXITO: {cuotas} cuota(s) actualizadas y {filas} fila(s) de elegibilidad recalculadas.'
+        ))
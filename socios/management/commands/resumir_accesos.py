@@ -0,0 +1,44 @@
+# socios/management/commands/resumir_accesos.py
+
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from socios.services.resumen_accesos import reconstruir_resumenes
+
+
+class Command(BaseCommand):
+    help = """
+    Reconstruye los resúmenes de accesos (por hora y por día) desde el historial del molinete.
+    Normalmente se actualizan solos al escribir cada lote; sirve para la carga inicial
+    o para corregir un rango.
+    Ejemplo: manage.py resumir_accesos --desde 2025-01-01 --hasta 2025-01-31
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument('--desde', type=str, help='Primer día a recalcular (AAAA-MM-DD). Por defecto, ayer.')
+        parser.add_argument('--hasta', type=str, help='Último día a recalcular (AAAA-MM-DD). Por defecto, hoy.')
+
+    def handle(self, *args, **options):
+        hoy = timezone.now().date()
+        desde = self._fecha(options['desde'], hoy - timedelta(days=1))
+        hasta = self._fecha(options['hasta'], hoy)
+        if desde > hasta:
+            raise CommandError("'--desde' no puede ser posterior a '--hasta'.")
+
+        self.stdout.write(self.style.WARNING(
+            f'Reconstruyendo resúmenes de accesos del {desde.strftime("%d/%m/%Y")} al {hasta.strftime("%d/%m/%Y")}...'
+        ))
+        filas_hora, filas_dia = reconstruir_resumenes(desde, hasta)
+        self.stdout.write(self.style.SUCCESS(
+            f'✅ ÉXITO: {filas_hora} fila(s) por hora y {filas_dia} fila(s) por día.'
+        ))
+
+    def _fecha(self, valor, por_defecto):
+        if not valor:
+            return por_defecto
+        fecha = parse_date(valor)
+        if fecha is None:
+            raise CommandError(f"Fecha inválida: '{valor}'. Use AAAA-MM-DD.")
+        return fecha
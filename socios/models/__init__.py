@@ -4,10 +4,14 @@ from .socio import SocioInfo, NivelSocio, GrupoFamiliar, GrupoFamiliarIntegrante
 from .evento import Evento, CalendarItem, AsistenciaEntrenamiento
 from .cuota import Cuota, Pago
 from .disciplina import Disciplina, Categoria, CategoriaEntrenador, HorarioEntrenamiento, SesionEntrenamiento
+from .elegibilidad import ElegibilidadAcceso
+from .token_revocado import TokenRevocado
+from .notificacion_pago import NotificacionPago
 
 __all__ = [
     'Usuario', 'UsuarioRol', 'Rol', 'SocioInfo', 'NivelSocio',
     'Evento', 'CalendarItem', 'AsistenciaEntrenamiento',
     'Cuota', 'Pago', 'Disciplina', 'Categoria', 'CategoriaEntrenador', 'HorarioEntrenamiento', 'SesionEntrenamiento',
     'GrupoFamiliar', 'GrupoFamiliarIntegrante', 'HistorialEstado',
+    'ElegibilidadAcceso', 'TokenRevocado', 'NotificacionPago',
 ]
@@ -6,6 +6,12 @@ if TYPE_CHECKING:
     from socios.models.disciplina import Categoria
 
 class Cuota(models.Model):
+    ESTADO_PAGO_CHOICES = [
+        ("pendiente", "Pendiente"),
+        ("parcial", "Pago parcial"),
+        ("pagada", "Pagada"),
+    ]
+
     usuario = models.ForeignKey('Usuario', on_delete=models.CASCADE)
     categoria = models.ForeignKey(
         'Categoria', 
@@ -21,6 +27,20 @@ class Cuota(models.Model):
         decimal_places=2, 
         default=0.00
     )
+    # Estado de cobro desnormalizado: lo mantienen las señales de Pago (services/saldos.py)
+    estado_pago = models.CharField(max_length=10, choices=ESTADO_PAGO_CHOICES, default="pendiente")
+    saldo = models.DecimalField(
+        max_digits=10,
+        decimal_places=2,
+        null=True,
+        blank=True,
+        help_text="Monto que falta pagar (monto menos pagos completados)"
+    )
+
+    def save(self, *args, **kwargs):
+        if self.saldo is None:
+            self.saldo = self.monto
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return f"Cuota {self.usuario} - {self.periodo}"
@@ -29,6 +49,16 @@ class Cuota(models.Model):
         verbose_name = "Cuota"
         verbose_name_plural = "Cuotas"
         ordering = ['-periodo']
+        indexes = [
+            # Deuda de un socio: cuotas no pagadas por vencimiento
+            models.Index(fields=['usuario', 'estado_pago', 'vencimiento'], name='cuota_usuario_estado_venc_idx'),
+            # Listado paginado por cursor y exportación: orden (periodo, id)
+            models.Index(fields=['periodo', 'id'], name='cuota_periodo_id_idx'),
+        ]
+        constraints = [
+            # Una cuota por socio y período: la facturación se puede volver a correr sin duplicar
+            models.UniqueConstraint(fields=['usuario', 'periodo'], name='cuota_usuario_periodo_unica'),
+        ]
 
 
 class Pago(models.Model):
@@ -43,7 +73,8 @@ class Pago(models.Model):
     medio_pago = models.CharField(max_length=50)
     monto = models.DecimalField(max_digits=10, decimal_places=2)
     moneda = models.CharField(max_length=10, default="ARS")
-    referencia_externa = models.CharField(max_length=255, blank=True, null=True)
+    # Única: el webhook de pagos escribe con upsert sobre esta columna (los NULL no chocan)
+    referencia_externa = models.CharField(max_length=255, blank=True, null=True, unique=True)
     estado = models.CharField(max_length=20, choices=ESTADO_CHOICES)
     fecha = models.DateTimeField(auto_now_add=True)
     detalle = models.JSONField(blank=True, null=True)
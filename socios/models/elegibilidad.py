@@ -0,0 +1,43 @@
+from django.db import models
+from .socio import SocioInfo
+
+
+class ElegibilidadAcceso(models.Model):
+    """
+    Fila desnormalizada por socio con lo necesario para decidir un acceso en el molinete.
+    La mantienen las señales de Cuota, Pago y SocioInfo, y el comando
+    'actualizar_elegibilidad' al cambiar el día.
+    """
+    socio = models.OneToOneField(
+        SocioInfo,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='elegibilidad'
+    )
+    socio_activo = models.BooleanField(default=True)
+    cuotas_vencidas = models.PositiveIntegerField(default=0)
+    vencimiento_mas_antiguo = models.DateField(
+        null=True,
+        blank=True,
+        help_text='Vencimiento de la cuota impaga más antigua ya vencida'
+    )
+    proximo_vencimiento = models.DateField(
+        null=True,
+        blank=True,
+        help_text='Vencimiento de la próxima cuota impaga todavía no vencida'
+    )
+    fecha_calculo = models.DateField()
+
+    def vigente(self, hoy):
+        """La fila sigue siendo válida mientras no venza otra cuota impaga."""
+        return self.proximo_vencimiento is None or self.proximo_vencimiento >= hoy
+
+    def __str__(self):
+        return f"Elegibilidad {self.socio_id}: {self.cuotas_vencidas} cuota(s) vencida(s)"
+
+    class Meta:
+        verbose_name = "Elegibilidad de Acceso"
+        verbose_name_plural = "Elegibilidad de Accesos"
+        indexes = [
+            models.Index(fields=['proximo_vencimiento'], name='elegibilidad_prox_venc_idx'),
+        ]
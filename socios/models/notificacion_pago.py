@@ -0,0 +1,43 @@
+from django.db import models
+
+
+class NotificacionPago(models.Model):
+    """
+    Cola durable de notificaciones del proveedor de pagos (webhook).
+    El endpoint solo valida y encola; procesar_notificaciones_pago las aplica a Cuota
+    y Pago por lotes. 'referencia_externa' es única: una notificación repetida por el
+    proveedor no se vuelve a encolar. Varias notificaciones pueden hablar del mismo pago
+    ('referencia_pago'), por ejemplo la aprobación y después el reembolso; se aplican
+    en orden de llegada aunque haya varios workers.
+    """
+    ESTADO_CHOICES = [
+        ("pendiente", "Pendiente"),
+        ("procesada", "Procesada"),
+        ("error", "Error"),
+    ]
+
+    referencia_externa = models.CharField(max_length=255, unique=True, help_text="ID de la notificación en el proveedor")
+    referencia_pago = models.CharField(max_length=255, help_text="ID del pago en el proveedor (Pago.referencia_externa)")
+    cuota_id = models.BigIntegerField(help_text="ID de la cuota informado por el proveedor (sin FK: se valida al procesar)")
+    monto = models.DecimalField(max_digits=10, decimal_places=2)
+    estado_proveedor = models.CharField(max_length=30)
+    medio_pago = models.CharField(max_length=50, default="mercado_pago")
+    payload = models.JSONField(blank=True, null=True)
+    estado = models.CharField(max_length=20, choices=ESTADO_CHOICES, default="pendiente")
+    intentos = models.PositiveSmallIntegerField(default=0)
+    error = models.TextField(blank=True, null=True)
+    recibida_en = models.DateTimeField(auto_now_add=True)
+    procesada_en = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        verbose_name = "Notificación de Pago"
+        verbose_name_plural = "Notificaciones de Pago"
+        indexes = [
+            # Los workers toman las pendientes más viejas
+            models.Index(fields=['estado', 'id'], name='notif_pago_estado_id_idx'),
+            # Antes de aplicar, se buscan notificaciones anteriores del mismo pago
+            models.Index(fields=['referencia_pago', 'estado'], name='notif_pago_referencia_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.referencia_externa} ({self.estado})"
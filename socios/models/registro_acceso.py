@@ -1,12 +1,78 @@
 from django.db import models
+from django.utils import timezone
 from .usuario import Usuario
 
 class RegistroAcceso(models.Model):
     usuario = models.ForeignKey(Usuario, on_delete=models.SET_NULL, null=True, blank=True)
-    fecha_hora = models.DateTimeField(auto_now_add=True)
+    fecha_hora = models.DateTimeField(default=timezone.now)  # Se registra en cola: conserva la hora del escaneo
     estado = models.CharField(max_length=20) 
     motivo = models.CharField(max_length=100, null=True, blank=True)
     datos_ingresados = models.CharField(max_length=100) 
 
+    class Meta:
+        # El historial se recorre por rango de fecha_hora (paginación por cursor),
+        # solo o filtrado por estado o por usuario
+        indexes = [
+            models.Index(fields=['-fecha_hora', '-id'], name='acceso_fecha_idx'),
+            models.Index(fields=['estado', '-fecha_hora'], name='acceso_estado_fecha_idx'),
+            models.Index(fields=['usuario', '-fecha_hora'], name='acceso_usuario_fecha_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.fecha_hora} - {self.estado}"
+
+class ResumenAccesoHora(models.Model):
+    """Cantidad de accesos por hora, estado y motivo (para los tableros de ocupación)."""
+    hora = models.DateTimeField()  # Inicio de la hora
+    estado = models.CharField(max_length=20)
+    motivo = models.CharField(max_length=100, blank=True, default='')
+    cantidad = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name = "Resumen de Accesos por Hora"
+        verbose_name_plural = "Resúmenes de Accesos por Hora"
+        constraints = [
+            models.UniqueConstraint(fields=['hora', 'estado', 'motivo'], name='resumen_hora_unico'),
+        ]
+
+    def __str__(self):
+        return f"{self.hora} - {self.estado} ({self.motivo}): {self.cantidad}"
+
+
+class ResumenAccesoDia(models.Model):
+    """Cantidad de accesos por día, estado y motivo."""
+    fecha = models.DateField()
+    estado = models.CharField(max_length=20)
+    motivo = models.CharField(max_length=100, blank=True, default='')
+    cantidad = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name = "Resumen de Accesos por Día"
+        verbose_name_plural = "Resúmenes de Accesos por Día"
+        constraints = [
+            models.UniqueConstraint(fields=['fecha', 'estado', 'motivo'], name='resumen_dia_unico'),
+        ]
+
+    def __str__(self):
+        return f"{self.fecha} - {self.estado} ({self.motivo}): {self.cantidad}"
+
+
+class ArchivoRegistroAcceso(models.Model):
+    """
+    Catálogo de meses del historial del molinete que se movieron a archivos comprimidos
+    (JSON Lines con gzip). Los registros del mes ya no están en RegistroAcceso.
+    """
+    periodo = models.CharField(max_length=7, unique=True)  # 'AAAA-MM'
+    desde = models.DateTimeField()  # Inicio del mes (incluido)
+    hasta = models.DateTimeField()  # Inicio del mes siguiente (excluido)
+    ruta = models.CharField(max_length=500)
+    cantidad = models.PositiveIntegerField(default=0)
+    creado = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = "Archivo de Registros de Acceso"
+        verbose_name_plural = "Archivos de Registros de Acceso"
+        ordering = ['-desde']
+
     def __str__(self):
-        return f"{self.fecha_hora} - {self.estado}"
\ No newline at end of file
+        return f"{self.periodo} ({self.cantidad} registros)"
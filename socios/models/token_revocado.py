@@ -0,0 +1,19 @@
+from django.db import models
+
+
+class TokenRevocado(models.Model):
+    """
+    Tokens JWT revocados antes de su vencimiento (logout o rotación del refresh).
+    Cada proceso los mantiene en memoria (ver services/revocacion.py); la tabla sirve
+    para compartirlos entre procesos. Las filas vencidas se pueden borrar.
+    """
+    jti = models.CharField(max_length=64, unique=True)
+    expira = models.DateTimeField(db_index=True)
+    creado = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = "Token Revocado"
+        verbose_name_plural = "Tokens Revocados"
+
+    def __str__(self):
+        return f"{self.jti} (vence {self.expira})"
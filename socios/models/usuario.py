@@ -31,6 +31,8 @@ class Usuario(models.Model):
     activo = models.BooleanField(default=True)
     roles = models.ManyToManyField("Rol", through="UsuarioRol", related_name="usuarios")
     preferencias_gui = models.JSONField(default=dict, blank=True)
+    # Se incrementa cada vez que cambian los roles: invalida los tokens emitidos antes
+    roles_version = models.PositiveIntegerField(default=0)
 
     disciplinas_a_cargo = models.ManyToManyField(
         Disciplina,
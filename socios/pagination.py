@@ -0,0 +1,142 @@
+# socios/pagination.py
+import base64
+import heapq
+from datetime import datetime
+from itertools import islice
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Paginación por cursor (keyset) sobre 'ordering' = (campo, 'id'), los dos en el mismo
+    sentido. Cada página es un rango: no hay OFFSET ni COUNT(*) de la tabla.
+    El cursor es '<valor del campo>|<id>' en base64; el campo necesita un índice (campo, id).
+    """
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+    cursor_query_param = 'cursor'
+    ordering = None  # ('campo', 'id') o ('-campo', '-id')
+    propiedades_extra = {}  # Claves que la vista agrega a la respuesta, para el esquema
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        tamano = self.get_page_size(request)
+        posicion = self.decode_cursor(request)
+        campo = self.ordering[0].lstrip('-')
+
+        if posicion:
+            valor, id_ = posicion
+            operador = 'lt' if self.ordering[0].startswith('-') else 'gt'
+            queryset = queryset.filter(
+                Q(**{f'{campo}__{operador}': valor}) | Q(**{campo: valor, f'id__{operador}': id_})
+            )
+        filas = list(queryset.order_by(*self.ordering)[:tamano + 1])
+        filas = self.completar_pagina(filas, posicion, tamano, view)
+
+        self.siguiente = None
+        if len(filas) > tamano:
+            filas = filas[:tamano]
+            self.siguiente = (getattr(filas[-1], campo), filas[-1].id)
+        return filas
+
+    def completar_pagina(self, filas, posicion, tamano, view):
+        """Permite sumar a la página filas de otra fuente (tamano + 1 como máximo)."""
+        return filas
+
+    def valor_a_texto(self, valor):
+        return str(valor)
+
+    def texto_a_valor(self, texto):
+        return texto
+
+    def get_page_size(self, request):
+        try:
+            tamano = int(request.query_params.get(self.page_size_query_param, self.page_size))
+        except ValueError:
+            return self.page_size
+        return min(max(tamano, 1), self.max_page_size)
+
+    def decode_cursor(self, request):
+        cursor = request.query_params.get(self.cursor_query_param)
+        if not cursor:
+            return None
+        try:
+            texto = base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8')
+            valor, id_ = texto.rsplit('|', 1)
+            return self.texto_a_valor(valor), int(id_)
+        except (TypeError, ValueError, UnicodeError):
+            raise NotFound('Cursor inválido.')
+
+    def encode_cursor(self, posicion):
+        texto = f'{self.valor_a_texto(posicion[0])}|{posicion[1]}'
+        return base64.urlsafe_b64encode(texto.encode('utf-8')).decode('ascii')
+
+    def get_next_link(self):
+        if self.siguiente is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.siguiente))
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': None,
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+                **self.propiedades_extra,
+            },
+        }
+
+
+class HistorialAccesoPagination(KeysetPagination):
+    """
+    Historial del molinete, sobre (fecha_hora, id) descendente.
+
+    Si la vista expone 'historial_archivado', la página se completa con los meses
+    archivados del rango, intercalados por (fecha_hora, id).
+    """
+    ordering = ('-fecha_hora', '-id')
+
+    def completar_pagina(self, filas, posicion, tamano, view):
+        archivado = getattr(view, 'historial_archivado', None)
+        if archivado is None or not archivado.archivos:
+            return filas
+        # Solo se abren archivos si la página llega hasta lo archivado
+        if len(filas) <= tamano or filas[-1].fecha_hora < archivado.fin:
+            filas = list(islice(
+                heapq.merge(
+                    filas, archivado.registros(posicion),
+                    key=lambda r: (r.fecha_hora, r.id), reverse=True
+                ),
+                tamano + 1
+            ))
+        return filas
+
+    def valor_a_texto(self, valor):
+        return valor.isoformat()
+
+    def texto_a_valor(self, texto):
+        return datetime.fromisoformat(texto)
+
+
+class CuotaCursorPagination(KeysetPagination):
+    """Cuotas sobre (periodo, id) ascendente (índice cuota_periodo_id_idx)."""
+    page_size = 100
+    max_page_size = 1000
+    ordering = ('periodo', 'id')
+    propiedades_extra = {'totales': {'type': 'object'}}
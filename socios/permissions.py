@@ -1,6 +1,19 @@
 # socios/permissions.py
 from rest_framework.permissions import BasePermission
 
+
+def roles_de(usuario):
+    """
+    Nombres de los roles del usuario. JWTAuthentication los deja cargados
+    en 'nombres_roles'; si no están, se consultan una vez y se guardan.
+    """
+    roles = getattr(usuario, 'nombres_roles', None)
+    if roles is None:
+        roles = list(usuario.roles.values_list('nombre', flat=True))
+        usuario.nombres_roles = roles
+    return roles
+
+
 class RolePermission(BasePermission):
     """
     Permiso personalizado basado en roles del usuario autenticado.
@@ -20,9 +33,9 @@ class RolePermission(BasePermission):
         if not required_roles:
             return True
         
-        # Obtener los roles del usuario desde la base de datos
+        # Obtener los roles del usuario (ya cargados por la autenticación)
         try:
-            user_roles = list(request.user.roles.values_list('nombre', flat=True))
+            user_roles = roles_de(request.user)
         except AttributeError:
             # Si el usuario no tiene el atributo roles, denegar acceso
             return False
@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from socios.models import Cuota, Pago
+from socios.models import Cuota
 
 
 class CuotaSerializer(serializers.ModelSerializer):
@@ -22,9 +22,18 @@ class CuotaSerializer(serializers.ModelSerializer):
         fields = [
             'id', 'usuario', 'usuario_nombre', 'usuario_apellido',
             'categoria', 'categoria_nombre', 'periodo', 'monto',
-            'vencimiento', 'descuento_aplicado', 'pagada'
+            'vencimiento', 'descuento_aplicado', 'pagada',
+            'estado_pago', 'saldo'
         ]
+        read_only_fields = ['estado_pago', 'saldo']
+
+    def __init__(self, *args, campos=None, **kwargs):
+        """'campos': subconjunto de campos a devolver (parámetro ?fields= de la vista)."""
+        super().__init__(*args, **kwargs)
+        if campos:
+            for nombre in set(self.fields) - set(campos):
+                self.fields.pop(nombre)
 
     def get_pagada(self, obj):
-        """Verificar si existe un pago completado para esta cuota"""
-        return Pago.objects.filter(cuota=obj, estado='completado').exists()
\ No newline at end of file
+        """La cuota está pagada cuando sus pagos completados cubren el monto"""
+        return obj.estado_pago == 'pagada'
\ No newline at end of file
@@ -9,6 +9,9 @@ class RegistroAccesoSerializer(serializers.ModelSerializer):
         fields = ['id', 'fecha_hora', 'estado', 'motivo', 'nombre_usuario', 'datos_ingresados']
 
     def get_nombre_usuario(self, obj):
+        # Registros leídos de un mes archivado: el nombre viene guardado en el archivo
+        if hasattr(obj, 'nombre_archivado'):
+            return obj.nombre_archivado or "Desconocido"
         if obj.usuario:
             return f"{obj.usuario.nombre} {obj.usuario.apellido}"
         return "Desconocido"
\ No newline at end of file
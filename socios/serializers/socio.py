@@ -65,9 +65,7 @@ class SocioInfoSerializer(serializers.ModelSerializer):
         Calcula en tiempo real si el socio tiene deudas pendientes.
         'obj' es la instancia de SocioInfo que se está serializando.
         """
-        tiene_deudas = Cuota.objects.filter(usuario=obj.usuario).exclude(
-            id__in=Pago.objects.filter(estado='completado').values_list('cuota_id', flat=True)
-        ).exists()
+        tiene_deudas = Cuota.objects.filter(usuario_id=obj.usuario_id).exclude(estado_pago='pagada').exists()
         
         return not tiene_deudas
     
@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from django.contrib.auth.hashers import make_password
+from socios.services.contrasenas import hashear_contrasena
 from socios.models import Usuario, Rol, Disciplina, Categoria
 from .socio import SocioInfoSerializer
 
@@ -55,7 +55,7 @@ class UsuarioSerializer(serializers.ModelSerializer):
         categorias_data = validated_data.pop('categorias_a_cargo', [])
         
         # Hasheamos la contraseña antes de crear el usuario
-        validated_data['contrasena'] = make_password(validated_data.get('contrasena'))
+        validated_data['contrasena'] = hashear_contrasena(validated_data.get('contrasena'))
         
         usuario = Usuario.objects.create(**validated_data)
 
@@ -76,7 +76,7 @@ class UsuarioSerializer(serializers.ModelSerializer):
         password = validated_data.pop('contrasena', None)
 
         if password: # Solo hashea si se proveyó una nueva contraseña
-            instance.contrasena = make_password(password)
+            instance.contrasena = hashear_contrasena(password)
         
         roles_data = validated_data.pop('roles', None)
         disciplinas_data = validated_data.pop('disciplinas_a_cargo', None)
@@ -111,6 +111,6 @@ class RegisterSerializer(serializers.ModelSerializer):
 
     def create(self, validated_data):
         """Crear usuario con contraseña hasheada (sin roles/disciplinas por defecto)."""
-        validated_data['contrasena'] = make_password(validated_data['contrasena'])
+        validated_data['contrasena'] = hashear_contrasena(validated_data['contrasena'])
         usuario = Usuario.objects.create(**validated_data)
         return usuario
\ No newline at end of file
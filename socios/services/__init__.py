@@ -0,0 +1,84 @@
+from .saldos import estado_de_pago, recalcular_saldos
+from .facturacion import (
+    ResultadoFacturacion, generar_cuotas_periodo, generar_cuotas_en_paralelo, repartir_en_tramos,
+    generar_cuotas_historicas, periodos_entre, vencimiento_de_periodo, borrar_cuotas, truncar_cuotas,
+)
+from .pagos import LotePagos, registrar_pagos, actualizar_deuda
+from .notificaciones_pago import (
+    NotificacionInvalida, ResultadoNotificaciones, encolar_notificacion, procesar_notificaciones, firma_valida,
+)
+from .exportacion import exportacion, csv_en_stream, xlsx_en_stream
+from .conciliacion_bancaria import (
+    MovimientoBancario, ResultadoConciliacion, conciliar_extracto, leer_extracto, formato_de,
+)
+from .elegibilidad import recalcular_elegibilidad, actualizar_elegibilidad_vencida, obtener_elegibilidad
+from .credenciales import CredencialAcceso, IndiceCredenciales, indice_credenciales
+from .acceso import Veredicto, evaluar_acceso, limpiar_codigo, conciliar_escaneos
+from .eventos_proximos import EventoProximo, CacheEventosProximos, eventos_proximos
+from .resumen_accesos import acumular_registros, reconstruir_resumenes, estadisticas_accesos
+from .archivo_accesos import archivar_mes, HistorialArchivado
+from .principales import CachePrincipales, cache_principales
+from .contrasenas import (
+    PoolContrasenas, PoolContrasenasSaturado, pool_contrasenas, hashear_contrasena, verificar_contrasena,
+)
+from .revocacion import RevocacionTokens, revocacion_tokens
+from .registro_accesos import RegistradorAccesos, registrador_accesos
+
+__all__ = [
+    'estado_de_pago',
+    'recalcular_saldos',
+    'ResultadoFacturacion',
+    'generar_cuotas_periodo',
+    'generar_cuotas_en_paralelo',
+    'repartir_en_tramos',
+    'generar_cuotas_historicas',
+    'periodos_entre',
+    'vencimiento_de_periodo',
+    'borrar_cuotas',
+    'truncar_cuotas',
+    'LotePagos',
+    'registrar_pagos',
+    'actualizar_deuda',
+    'NotificacionInvalida',
+    'ResultadoNotificaciones',
+    'encolar_notificacion',
+    'procesar_notificaciones',
+    'firma_valida',
+    'exportacion',
+    'csv_en_stream',
+    'xlsx_en_stream',
+    'MovimientoBancario',
+    'ResultadoConciliacion',
+    'conciliar_extracto',
+    'leer_extracto',
+    'formato_de',
+    'recalcular_elegibilidad',
+    'actualizar_elegibilidad_vencida',
+    'obtener_elegibilidad',
+    'CredencialAcceso',
+    'IndiceCredenciales',
+    'indice_credenciales',
+    'Veredicto',
+    'evaluar_acceso',
+    'limpiar_codigo',
+    'conciliar_escaneos',
+    'EventoProximo',
+    'CacheEventosProximos',
+    'eventos_proximos',
+    'acumular_registros',
+    'reconstruir_resumenes',
+    'estadisticas_accesos',
+    'archivar_mes',
+    'HistorialArchivado',
+    'CachePrincipales',
+    'cache_principales',
+    'PoolContrasenas',
+    'PoolContrasenasSaturado',
+    'pool_contrasenas',
+    'hashear_contrasena',
+    'verificar_contrasena',
+    'RevocacionTokens',
+    'revocacion_tokens',
+    'RegistradorAccesos',
+    'registrador_accesos',
+]
@@ -0,0 +1,249 @@
+# socios/services/acceso.py
+import uuid
+from bisect import bisect_left
+from typing import NamedTuple
+
+from django.db import transaction
+from django.db.models import Count
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from socios.models import Usuario, SocioInfo, Cuota
+from socios.models.registro_acceso import RegistroAcceso
+from .credenciales import CredencialAcceso
+from .resumen_accesos import acumular_registros
+
+
+class Veredicto(NamedTuple):
+    estado: str        # 'aprobado' | 'denegado'
+    mensaje: str       # Texto para la pantalla del molinete
+    motivo_bd: str     # Motivo que se guarda en RegistroAcceso
+    motivo_front: str  # Código que interpreta el frontend
+
+
+ESTADOS_SOCIO = dict(SocioInfo._meta.get_field('estado').choices)
+
+
+def limpiar_codigo(qr_data):
+    """Los lectores con teclado mal configurado cambian '-' por comillas."""
+    return str(qr_data).replace("'", "-").replace('"', '-').strip()
+
+
+def evaluar_acceso(codigo, credencial):
+    """Reglas del molinete. 'credencial.cuotas_vencidas' debe estar calculado para la fecha del escaneo."""
+    if credencial is None:
+        return Veredicto('denegado', f'Usuario NO ENCONTRADO (Leído: {codigo})', 'Usuario no encontrado', 'error')
+
+    if not credencial.es_socio:
+        return Veredicto('denegado', 'NO ES SOCIO', 'No es socio', 'no_socio')
+
+    if credencial.estado_socio != 'activo':
+        estado_display = ESTADOS_SOCIO.get(credencial.estado_socio, credencial.estado_socio)
+        return Veredicto('denegado', f'Socio {estado_display.upper()}', 'Socio inactivo', 'inactivo')
+
+    if credencial.cuotas_vencidas:
+        return Veredicto(
+            'denegado', f'ACCESO DENEGADO: Debe {credencial.cuotas_vencidas} cuota(s)', 'Deuda de cuotas', 'deuda'
+        )
+
+    return Veredicto('aprobado', 'BIENVENIDO', 'Cuota al día', 'ok')
+
+
+# --- Conciliación de escaneos tomados sin conexión ---
+
+def _parsear_fecha_hora(valor):
+    if not valor:
+        return None
+    try:
+        fecha_hora = parse_datetime(str(valor))
+    except ValueError:
+        # Bien formada pero imposible (p. ej. 30 de febrero).
+        return None
+    if fecha_hora is None:
+        return None
+    if timezone.is_naive(fecha_hora):
+        fecha_hora = timezone.make_aware(fecha_hora)
+    return fecha_hora
+
+
+def _resolver_usuarios(codigos):
+    """
+    Resuelve códigos a usuarios con una consulta IN por tipo de identificador,
+    respetando el orden del molinete: QR token, DNI y por último ID.
+    Devuelve {codigo: (id, nombre, apellido, nro_documento, qr_token)}.
+    """
+    campos = ('id', 'nombre', 'apellido', 'nro_documento', 'qr_token')
+    resueltos = {}
+
+    qr_por_codigo = {}
+    for codigo in codigos:
+        try:
+            qr_por_codigo[codigo] = uuid.UUID(codigo)
+        except ValueError:
+            pass
+    if qr_por_codigo:
+        por_qr = {
+            fila[4]: fila
+            for fila in Usuario.objects.filter(qr_token__in=set(qr_por_codigo.values())).values_list(*campos)
+        }
+        for codigo, qr in qr_por_codigo.items():
+            if qr in por_qr:
+                resueltos[codigo] = por_qr[qr]
+
+    pendientes = [c for c in codigos if c not in resueltos]
+    if pendientes:
+        por_documento = {
+            fila[3]: fila
+            for fila in Usuario.objects.filter(nro_documento__in=pendientes).values_list(*campos)
+        }
+        for codigo in pendientes:
+            if codigo in por_documento:
+                resueltos[codigo] = por_documento[codigo]
+
+    pendientes = [c for c in codigos if c not in resueltos and c.isdigit()]
+    if pendientes:
+        por_id = {
+            fila[0]: fila
+            for fila in Usuario.objects.filter(id__in={int(c) for c in pendientes}).values_list(*campos)
+        }
+        for codigo in pendientes:
+            if int(codigo) in por_id:
+                resueltos[codigo] = por_id[int(codigo)]
+
+    return resueltos
+
+
+def _vencimientos_impagos(usuario_ids, hasta):
+    """
+    Una única consulta agregada: cuántas cuotas impagas vencen en cada fecha, por socio.
+    Devuelve {usuario_id: ([vencimientos ordenados], [acumulado de cuotas])}.
+    """
+    filas = (
+        Cuota.objects.filter(usuario_id__in=usuario_ids, vencimiento__lt=hasta)
+        .exclude(estado_pago='pagada')
+        .values('usuario_id', 'vencimiento')
+        .annotate(cantidad=Count('id'))
+        .order_by('usuario_id', 'vencimiento')
+    )
+    resultado = {}
+    for fila in filas:
+        fechas, acumulado = resultado.setdefault(fila['usuario_id'], ([], []))
+        fechas.append(fila['vencimiento'])
+        acumulado.append((acumulado[-1] if acumulado else 0) + fila['cantidad'])
+    return resultado
+
+
+def _escaneos_registrados(validos):
+    """
+    {(datos_ingresados, fecha_hora)} de los escaneos del lote que ya están en el historial.
+    Una consulta por tramo de códigos, acotada al rango de fechas del lote (acceso_fecha_idx).
+    """
+    if not validos:
+        return set()
+    fechas = [f for _, f in validos]
+    codigos = sorted({c[:100] for c, _ in validos})
+    registrados = set()
+    for i in range(0, len(codigos), 1000):
+        registrados.update(
+            RegistroAcceso.objects.filter(
+                fecha_hora__gte=min(fechas), fecha_hora__lte=max(fechas), datos_ingresados__in=codigos[i:i + 1000]
+            ).values_list('datos_ingresados', 'fecha_hora')
+        )
+    return registrados
+
+
+def conciliar_escaneos(escaneos):
+    """
+    Procesa en bloque escaneos tomados sin conexión: [(qr_data, fecha_hora), ...].
+
+    Cada escaneo se evalúa con la deuda que había a la fecha en que se tomó
+    (los pagos se consideran con su estado actual). Los RegistroAcceso se escriben
+    con bulk_create conservando la hora original y se suman a los resúmenes.
+
+    Un escaneo se identifica por (código, fecha y hora): si el molinete reenvía el lote
+    tras un timeout, los que ya estaban registrados (o repetidos en el mismo lote) se
+    informan con 'ya_registrado' pero no se vuelven a guardar ni a sumar.
+    Devuelve la lista de resultados, en el mismo orden que la entrada.
+    """
+    normalizados = []
+    for qr_data, fecha_hora in escaneos:
+        codigo = limpiar_codigo(qr_data) if qr_data else ''
+        normalizados.append((codigo, _parsear_fecha_hora(fecha_hora)))
+
+    validos = [(c, f) for c, f in normalizados if c and f]
+    codigos = list({c for c, _ in validos})
+
+    # --- 1. Resolución de usuarios, socios y deuda con consultas por conjunto ---
+    usuarios = _resolver_usuarios(codigos) if codigos else {}
+    usuario_ids = {fila[0] for fila in usuarios.values()}
+    socios = {
+        usuario_id: (estado, categoria_id)
+        for usuario_id, estado, categoria_id in SocioInfo.objects.filter(
+            usuario_id__in=usuario_ids
+        ).values_list('usuario_id', 'estado', 'categoria_id')
+    } if usuario_ids else {}
+    deudas = {}
+    if socios and validos:
+        fecha_maxima = max(f for _, f in validos).date()
+        deudas = _vencimientos_impagos(list(socios), fecha_maxima)
+
+    # --- 2. Evaluación de cada escaneo ---
+    resultados = []
+    registros = []
+    vistos = _escaneos_registrados(validos)
+    for codigo, fecha_hora in normalizados:
+        if not codigo or not fecha_hora:
+            resultados.append({
+                'qr_data': codigo,
+                'fecha_hora': fecha_hora,
+                'estado': 'invalido',
+                'mensaje': 'Código vacío' if not codigo else 'Fecha y hora inválidas',
+            })
+            continue
+
+        credencial = None
+        fila = usuarios.get(codigo)
+        if fila:
+            usuario_id, nombre, apellido, nro_documento, qr_token = fila
+            estado_socio, categoria_id = socios.get(usuario_id, (None, None))
+            fechas, acumulado = deudas.get(usuario_id, ((), ()))
+            posicion = bisect_left(fechas, fecha_hora.date())
+            credencial = CredencialAcceso(
+                usuario_id=usuario_id,
+                nombre=nombre,
+                apellido=apellido,
+                nro_documento=nro_documento,
+                qr_token=str(qr_token),
+                estado_socio=estado_socio,
+                categoria_id=categoria_id,
+                cuotas_vencidas=acumulado[posicion - 1] if posicion else 0,
+                proximo_vencimiento=None,
+            )
+
+        veredicto = evaluar_acceso(codigo, credencial)
+        clave = (codigo[:100], fecha_hora)
+        ya_registrado = clave in vistos
+        if not ya_registrado:
+            vistos.add(clave)
+            registros.append(RegistroAcceso(
+                usuario_id=credencial.usuario_id if credencial else None,
+                fecha_hora=fecha_hora,
+                estado=veredicto.estado,
+                motivo=veredicto.motivo_bd,
+                datos_ingresados=codigo[:100],
+            ))
+        resultados.append({
+            'qr_data': codigo,
+            'fecha_hora': fecha_hora,
+            'estado': veredicto.estado,
+            'mensaje': veredicto.mensaje,
+            'socio': credencial.nombre_completo if credencial else 'Desconocido',
+            'motivo': veredicto.motivo_front,
+            'ya_registrado': ya_registrado,
+        })
+
+    # --- 3. Escritura masiva del historial ---
+    with transaction.atomic():
+        RegistroAcceso.objects.bulk_create(registros, batch_size=1000)
+        acumular_registros(registros)
+    return resultados
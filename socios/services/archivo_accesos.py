@@ -0,0 +1,140 @@
+# socios/services/archivo_accesos.py
+import gzip
+import json
+import os
+from datetime import datetime
+from pathlib import Path
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from socios.models.registro_acceso import RegistroAcceso, ArchivoRegistroAcceso
+
+
+def inicio_mes(anio, mes):
+    return timezone.make_aware(datetime(anio, mes, 1))
+
+
+def mes_siguiente(anio, mes):
+    return (anio + 1, 1) if mes == 12 else (anio, mes + 1)
+
+
+def archivar_mes(anio, mes, tamano_lote=5000):
+    """
+    Mueve los RegistroAcceso de un mes a un archivo JSON Lines comprimido con gzip,
+    ordenado del más reciente al más antiguo, y los borra de la tabla.
+    Devuelve el ArchivoRegistroAcceso creado, o None si el mes no tenía registros.
+    """
+    periodo = f'{anio:04d}-{mes:02d}'
+    if ArchivoRegistroAcceso.objects.filter(periodo=periodo).exists():
+        raise ValueError(f'El período {periodo} ya está archivado.')
+
+    desde = inicio_mes(anio, mes)
+    hasta = inicio_mes(*mes_siguiente(anio, mes))
+    registros = RegistroAcceso.objects.filter(fecha_hora__gte=desde, fecha_hora__lt=hasta)
+
+    directorio = Path(settings.REGISTRO_ACCESOS_ARCHIVO_DIR)
+    directorio.mkdir(parents=True, exist_ok=True)
+    ruta = directorio / f'registro_acceso_{periodo}.jsonl.gz'
+    temporal = directorio / f'registro_acceso_{periodo}.jsonl.gz.tmp'
+
+    # --- 1. Escritura del archivo, leyendo la tabla en bloques ---
+    ids = []
+    filas = registros.order_by('-fecha_hora', '-id').values_list(
+        'id', 'usuario_id', 'usuario__nombre', 'usuario__apellido',
+        'fecha_hora', 'estado', 'motivo', 'datos_ingresados'
+    )
+    with gzip.open(temporal, 'wt', encoding='utf-8') as archivo:
+        for id_, usuario_id, nombre, apellido, fecha_hora, estado, motivo, datos in filas.iterator(chunk_size=tamano_lote):
+            archivo.write(json.dumps({
+                'id': id_,
+                'usuario_id': usuario_id,
+                # El nombre se guarda porque el usuario puede borrarse después
+                'nombre_usuario': f'{nombre} {apellido}' if usuario_id else None,
+                'fecha_hora': fecha_hora.isoformat(),
+                'estado': estado,
+                'motivo': motivo,
+                'datos_ingresados': datos,
+            }, ensure_ascii=False) + '\n')
+            ids.append(id_)
+
+    if not ids:
+        temporal.unlink()
+        return None
+    os.replace(temporal, ruta)
+
+    # --- 2. Alta en el catálogo y borrado de la tabla, en la misma transacción ---
+    with transaction.atomic():
+        catalogo = ArchivoRegistroAcceso.objects.create(
+            periodo=periodo, desde=desde, hasta=hasta, ruta=str(ruta), cantidad=len(ids)
+        )
+        for inicio in range(0, len(ids), tamano_lote):
+            RegistroAcceso.objects.filter(id__in=ids[inicio:inicio + tamano_lote]).delete()
+    return catalogo
+
+
+def _a_registro(dato):
+    registro = RegistroAcceso(
+        id=dato['id'],
+        usuario_id=dato['usuario_id'],
+        fecha_hora=datetime.fromisoformat(dato['fecha_hora']),
+        estado=dato['estado'],
+        motivo=dato['motivo'],
+        datos_ingresados=dato['datos_ingresados'],
+    )
+    registro.nombre_archivado = dato['nombre_usuario']
+    return registro
+
+
+class HistorialArchivado:
+    """
+    Lectura de los meses archivados que tocan un rango [desde, hasta).
+    Solo abre los archivos de esos meses, y de a uno, del más reciente al más antiguo.
+    """
+
+    def __init__(self, desde=None, hasta=None, estado=None, usuario_id=None):
+        self.desde = desde
+        self.hasta = hasta
+        self.estado = estado
+        self.usuario_id = usuario_id
+        self._archivos = None
+
+    @property
+    def archivos(self):
+        if self._archivos is None:
+            archivos = ArchivoRegistroAcceso.objects.all()
+            if self.desde:
+                archivos = archivos.filter(hasta__gt=self.desde)
+            if self.hasta:
+                archivos = archivos.filter(desde__lt=self.hasta)
+            self._archivos = list(archivos.order_by('-desde'))
+        return self._archivos
+
+    @property
+    def fin(self):
+        """Límite superior de lo archivado en el rango: todo lo archivado es anterior."""
+        return self.archivos[0].hasta if self.archivos else None
+
+    def registros(self, antes_de=None):
+        """
+        Genera RegistroAcceso (sin guardar) en orden (fecha_hora, id) descendente.
+        antes_de: posición (fecha_hora, id) del último registro ya entregado.
+        """
+        for archivo in self.archivos:
+            if antes_de and archivo.desde > antes_de[0]:
+                continue
+            with gzip.open(archivo.ruta, 'rt', encoding='utf-8') as contenido:
+                for linea in contenido:
+                    registro = _a_registro(json.loads(linea))
+                    if self.desde and registro.fecha_hora < self.desde:
+                        break  # El archivo está ordenado: lo que sigue es más antiguo
+                    if self.hasta and registro.fecha_hora >= self.hasta:
+                        continue
+                    if antes_de and (registro.fecha_hora, registro.id) >= antes_de:
+                        continue
+                    if self.estado and registro.estado != self.estado:
+                        continue
+                    if self.usuario_id and registro.usuario_id != self.usuario_id:
+                        continue
+                    yield registro
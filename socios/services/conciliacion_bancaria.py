@@ -0,0 +1,319 @@
+# socios/services/conciliacion_bancaria.py
+import csv
+import hashlib
+import itertools
+import re
+import unicodedata
+from collections import defaultdict
+from decimal import Decimal, InvalidOperation
+from typing import NamedTuple
+
+from django.db import transaction
+
+from socios.models import Cuota, Pago
+from .pagos import actualizar_deuda
+
+MEDIO_PAGO = 'transferencia'
+TAMANO_LOTE = 2000
+
+# "CUOTA 123", "Cuota #123", "cuota-123" en la referencia o el concepto (no "cuota 2025-03")
+PATRON_CUOTA = re.compile(r'\bcuota\s*[-#:nº°]*\s*(\d+)(?![\d/-])', re.IGNORECASE)
+# DNI de 7 u 8 dígitos, con o sin puntos, solo si viene después de "DNI" ("DNI 30.111.222",
+# "D.N.I.: 30111222"): un número suelto puede ser un nro. de operación, parte de un CBU o un monto
+PATRON_DNI = re.compile(r'\bD\.?N\.?I\.?\s*[:#nº°-]*\s*(\d{1,2}\.?\d{3}\.?\d{3})(?![\d.])', re.IGNORECASE)
+
+# Encabezados de CSV aceptados (sin acentos, en minúsculas) -> campo
+ALIAS_CSV = {
+    'fecha': 'fecha', 'fecha_valor': 'fecha', 'fecha_operacion': 'fecha',
+    'monto': 'monto', 'importe': 'monto', 'credito': 'monto',
+    'referencia': 'referencia', 'comprobante': 'referencia', 'nro_comprobante': 'referencia',
+    'descripcion': 'descripcion', 'concepto': 'descripcion', 'detalle': 'descripcion',
+    'dni': 'documento', 'documento': 'documento', 'nro_documento': 'documento',
+}
+
+
+class MovimientoBancario(NamedTuple):
+    linea: int
+    fecha: str
+    monto: object  # Decimal, o None si no se pudo leer
+    referencia: str
+    descripcion: str
+    documento: str
+
+
+class LineaSinConciliar(NamedTuple):
+    linea: int
+    monto: object
+    referencia: str
+    descripcion: str
+    motivo: str
+
+
+class ResultadoConciliacion(NamedTuple):
+    lineas: int          # Movimientos leídos
+    conciliadas: int     # Movimientos que generaron pagos
+    ya_registradas: int  # Comprobantes importados antes (se saltean)
+    ignoradas: int       # Débitos y movimientos en cero
+    pagos: int
+    total: Decimal
+    sin_conciliar: list  # [LineaSinConciliar]
+
+
+# --- Lectura del extracto (en streaming) ---
+
+def formato_de(nombre_archivo):
+    """'csv' u 'ofx' según la extensión del archivo."""
+    extension = str(nombre_archivo).rsplit('.', 1)[-1].lower()
+    if extension not in ('csv', 'ofx', 'qfx'):
+        raise ValueError(f"Formato de extracto no soportado: '.{extension}' (se acepta CSV u OFX).")
+    return 'csv' if extension == 'csv' else 'ofx'
+
+
+def leer_extracto(lineas, formato):
+    """Iterador de MovimientoBancario a partir de las líneas de texto del archivo."""
+    return _leer_csv(lineas) if formato == 'csv' else _leer_ofx(lineas)
+
+
+def _leer_csv(lineas):
+    lineas = iter(lineas)
+    primera = next(lineas, '')
+    separador = ';' if primera.count(';') > primera.count(',') else ','
+    lector = csv.reader(itertools.chain([primera], lineas), delimiter=separador)
+    campos = [ALIAS_CSV.get(_normalizar(columna)) for columna in next(lector, [])]
+    if 'monto' not in campos:
+        raise ValueError("El CSV no tiene una columna de monto ('monto' o 'importe').")
+
+    for numero, fila in enumerate(lector, start=2):
+        if not any(celda.strip() for celda in fila):
+            continue
+        datos = {campo: celda.strip() for campo, celda in zip(campos, fila) if campo}
+        yield _movimiento(numero, datos)
+
+
+def _leer_ofx(lineas):
+    # Sirve para OFX 1.x (SGML, sin cierre de las etiquetas hoja) y OFX 2.x (XML)
+    etiqueta = re.compile(r'<(/?)([A-Za-z0-9.]+)>([^<\r\n]*)')
+    actual, numero = None, 0
+    for linea in lineas:
+        for cierre, nombre, valor in etiqueta.findall(linea):
+            nombre = nombre.upper()
+            if nombre == 'STMTTRN':
+                if cierre and actual is not None:
+                    numero += 1
+                    yield _movimiento(numero, {
+                        'fecha': actual.get('DTPOSTED', '')[:8],
+                        'monto': actual.get('TRNAMT', ''),
+                        'referencia': actual.get('REFNUM') or actual.get('CHECKNUM') or actual.get('FITID', ''),
+                        'descripcion': ' '.join(filter(None, [actual.get('NAME'), actual.get('MEMO')])),
+                    })
+                    actual = None
+                elif not cierre:
+                    actual = {}
+            elif actual is not None and not cierre:
+                actual[nombre] = valor.strip()
+
+
+def _movimiento(numero, datos):
+    descripcion = datos.get('descripcion', '')
+    documento = datos.get('documento') or ''
+    if not documento:
+        encontrado = PATRON_DNI.search(descripcion)
+        documento = encontrado.group(1) if encontrado else ''
+    return MovimientoBancario(
+        numero, datos.get('fecha', ''), _monto(datos.get('monto', '')),
+        datos.get('referencia', ''), descripcion, re.sub(r'\D', '', documento),
+    )
+
+
+def _normalizar(texto):
+    texto = unicodedata.normalize('NFKD', texto.strip().lstrip('\ufeff').lower())
+    return ''.join(c for c in texto if not unicodedata.combining(c)).replace(' ', '_')
+
+
+def _monto(texto):
+    """Acepta '15000.50', '15.000,50', '15,000.50' y '$ 15.000'. Devuelve None si no es un número."""
+    texto = re.sub(r'[^\d,.\-]', '', texto or '')
+    if ',' in texto and '.' in texto:
+        decimal = ',' if texto.rfind(',') > texto.rfind('.') else '.'
+        texto = texto.replace('.' if decimal == ',' else ',', '').replace(',', '.')
+    elif ',' in texto:
+        texto = texto.replace(',', '.') if re.search(r',\d{1,2}$', texto) else texto.replace(',', '')
+    elif re.fullmatch(r'-?\d{1,3}(\.\d{3})+', texto):
+        texto = texto.replace('.', '')  # Solo separador de miles
+    try:
+        return Decimal(texto).quantize(Decimal('0.01'))
+    except InvalidOperation:
+        return None
+
+
+# --- Conciliación ---
+
+class _Indices:
+    """
+    Índices en memoria de las cuotas impagas, armados con una sola lectura al empezar.
+    Las cuotas se van descontando a medida que se concilian: un mismo extracto no
+    puede pagar dos veces la misma cuota.
+    """
+
+    def __init__(self):
+        self.saldos = {}                       # cuota_id -> saldo
+        self.usuario_de = {}                   # cuota_id -> usuario_id
+        self.por_usuario = defaultdict(list)   # usuario_id -> [cuota_id] por vencimiento
+        self.por_documento = {}                # DNI (solo dígitos) -> usuario_id
+        self.por_monto = defaultdict(set)      # saldo -> {cuota_id}
+
+        impagas = (
+            Cuota.objects.exclude(estado_pago='pagada').order_by('vencimiento', 'id')
+            .values_list('id', 'usuario_id', 'saldo', 'monto', 'usuario__nro_documento')
+            .iterator(chunk_size=TAMANO_LOTE)
+        )
+        for cuota_id, usuario_id, saldo, monto, documento in impagas:
+            saldo = saldo if saldo is not None else monto
+            self.saldos[cuota_id] = saldo
+            self.usuario_de[cuota_id] = usuario_id
+            self.por_usuario[usuario_id].append(cuota_id)
+            self.por_monto[saldo].add(cuota_id)
+            if documento:
+                self.por_documento[re.sub(r'\D', '', documento)] = usuario_id
+
+        self.comprobantes = set(
+            Pago.objects.filter(medio_pago=MEDIO_PAGO).exclude(comprobante=None)
+            .values_list('comprobante', flat=True).iterator(chunk_size=TAMANO_LOTE)
+        )
+
+    def descontar(self, cuota_id, monto):
+        saldo = self.saldos[cuota_id]
+        self.por_monto[saldo].discard(cuota_id)
+        saldo -= monto
+        if saldo > 0:
+            self.saldos[cuota_id] = saldo
+            self.por_monto[saldo].add(cuota_id)
+        else:
+            del self.saldos[cuota_id]
+            self.por_usuario[self.usuario_de[cuota_id]].remove(cuota_id)
+
+    def conciliar(self, movimiento):
+        """Devuelve ([(cuota_id, monto)], None) o ([], motivo)."""
+        monto = movimiento.monto
+        texto = f'{movimiento.referencia} {movimiento.descripcion}'
+
+        # 1. Código de cuota en la referencia: se acepta un pago parcial
+        codigo = PATRON_CUOTA.search(texto)
+        if codigo:
+            cuota_id = int(codigo.group(1))
+            if cuota_id not in self.saldos:
+                return [], f"La cuota {cuota_id} no existe o no está pendiente."
+            if monto > self.saldos[cuota_id]:
+                return [], f"El monto supera el saldo de la cuota {cuota_id} ({self.saldos[cuota_id]})."
+            return [(cuota_id, monto)], None
+
+        # 2. DNI del socio: sus cuotas más viejas cuyo saldo sume exactamente el monto.
+        # Si el DNI no es de un socio con deuda, se sigue con el monto
+        usuario_id = self.por_documento.get(movimiento.documento) if movimiento.documento else None
+        if usuario_id is not None:
+            imputadas, acumulado = [], Decimal('0')
+            for cuota_id in self.por_usuario[usuario_id]:
+                if acumulado + self.saldos[cuota_id] > monto:
+                    break
+                acumulado += self.saldos[cuota_id]
+                imputadas.append((cuota_id, self.saldos[cuota_id]))
+            if not imputadas or acumulado != monto:
+                return [], f"El monto no coincide con la deuda del DNI {movimiento.documento}."
+            return imputadas, None
+
+        # 3. Solo el monto: únicamente si una sola cuota impaga tiene ese saldo
+        candidatas = self.por_monto.get(monto)
+        if not candidatas:
+            return [], "Ninguna cuota pendiente tiene ese saldo."
+        if len(candidatas) > 1:
+            return [], f"Monto ambiguo: {len(candidatas)} cuotas pendientes tienen ese saldo."
+        cuota_id = next(iter(candidatas))
+        return [(cuota_id, monto)], None
+
+
+def conciliar_extracto(movimientos, simular=False, nombre_archivo=''):
+    """
+    Concilia los movimientos de un extracto bancario contra las cuotas impagas y
+    registra los pagos por transferencia.
+
+    Cada crédito se imputa, en este orden, por el código de cuota de su referencia
+    ("CUOTA 123"), por el DNI del socio o, si ninguna otra cuota tiene ese saldo, por
+    el monto. Los índices se arman una sola vez y los movimientos se leen de a uno, así
+    que el archivo nunca se carga entero.
+
+    Cada pago guarda como comprobante la huella del movimiento (ver huella_movimiento),
+    que no depende del nombre del archivo ni del número de línea: volver a subir el mismo
+    extracto, renombrado o acumulado con movimientos nuevos, no duplica pagos.
+
+    Todos los pagos se escriben al final con bulk_create, en una transacción. Con
+    'simular' solo se informa qué se haría.
+    """
+    indices = _Indices()
+    pagos, sin_conciliar = [], []
+    ocurrencias = defaultdict(int)
+    lineas = conciliadas = ya_registradas = ignoradas = 0
+
+    for movimiento in movimientos:
+        lineas += 1
+        if movimiento.monto is None:
+            sin_conciliar.append(_sin_conciliar(movimiento, "No se pudo leer el monto."))
+            continue
+        if movimiento.monto <= 0:
+            ignoradas += 1
+            continue
+        huella = huella_movimiento(movimiento)
+        ocurrencias[huella] += 1
+        comprobante = f'{huella}:{ocurrencias[huella]}'
+        if comprobante in indices.comprobantes:
+            ya_registradas += 1
+            continue
+
+        imputadas, motivo = indices.conciliar(movimiento)
+        if motivo:
+            sin_conciliar.append(_sin_conciliar(movimiento, motivo))
+            continue
+
+        conciliadas += 1
+        indices.comprobantes.add(comprobante)
+        for cuota_id, monto in imputadas:
+            indices.descontar(cuota_id, monto)
+            pagos.append(Pago(
+                cuota_id=cuota_id, monto=monto, estado='completado', medio_pago=MEDIO_PAGO,
+                comprobante=comprobante,
+                detalle={
+                    'fecha_banco': movimiento.fecha, 'referencia': movimiento.referencia,
+                    'descripcion': movimiento.descripcion, 'archivo': nombre_archivo, 'linea': movimiento.linea,
+                },
+            ))
+
+    if pagos and not simular:
+        with transaction.atomic():
+            cuota_ids = sorted({pago.cuota_id for pago in pagos})
+            # Las cuotas se bloquean en orden; si alguien las cobró mientras tanto, el saldo
+            # recalculado lo muestra y el pago queda como saldo a favor, no se pierde
+            for i in range(0, len(cuota_ids), TAMANO_LOTE):
+                list(Cuota.objects.select_for_update().filter(id__in=cuota_ids[i:i + TAMANO_LOTE]).values_list('id'))
+            Pago.objects.bulk_create(pagos, batch_size=1000)
+            actualizar_deuda(cuota_ids, sorted({indices.usuario_de[cuota_id] for cuota_id in cuota_ids}))
+
+    return ResultadoConciliacion(
+        lineas, conciliadas, ya_registradas, ignoradas, len(pagos),
+        sum((pago.monto for pago in pagos), Decimal('0')), sin_conciliar,
+    )
+
+
+def huella_movimiento(movimiento):
+    """
+    Huella del contenido de un movimiento: 'banco:' + SHA-1 (20 hex) de fecha, monto,
+    referencia, descripción y documento. Dos créditos iguales del mismo extracto se
+    distinguen con el número de aparición que se agrega al comprobante (':1', ':2'...).
+    """
+    contenido = '\x1f'.join([
+        movimiento.fecha.strip(), str(movimiento.monto), movimiento.referencia.strip(),
+        ' '.join(movimiento.descripcion.split()).upper(), movimiento.documento,
+    ])
+    return 'banco:' + hashlib.sha1(contenido.encode('utf-8')).hexdigest()[:20]
+
+
+def _sin_conciliar(movimiento, motivo):
+    return LineaSinConciliar(movimiento.linea, movimiento.monto, movimiento.referencia, movimiento.descripcion, motivo)
@@ -0,0 +1,131 @@
+# socios/services/contrasenas.py
+import atexit
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.hashers import (
+    PBKDF2PasswordHasher, check_password, get_hasher, identify_hasher, make_password,
+)
+from django.utils.crypto import constant_time_compare
+
+from socios.hashers import pbkdf2_base64
+
+logger = logging.getLogger(__name__)
+
+
+class PoolContrasenasSaturado(Exception):
+    """No hubo lugar en el pool de hashing dentro del tiempo de espera."""
+
+
+class PoolContrasenas:
+    """
+    Pool acotado de procesos para el hashing de contraseñas (PBKDF2), fuera del
+    hilo del request y sin competir por el GIL.
+
+    - CONTRASENAS_WORKERS: procesos del pool (0 = se calcula en el hilo actual).
+    - CONTRASENAS_MAX_PENDIENTES: cálculos en curso o en espera como máximo;
+      si no hay lugar en CONTRASENAS_ESPERA_SEGUNDOS se lanza PoolContrasenasSaturado.
+    Los hashers que no son PBKDF2 se calculan siempre en el hilo actual.
+    """
+
+    def __init__(self, workers=None, max_pendientes=None, espera=None):
+        self._workers = workers
+        self._max_pendientes = max_pendientes
+        self._espera = espera
+        self._lock = threading.Lock()
+        self._pool = None
+        self._lugares = None
+        self._atexit_registrado = False
+
+    @property
+    def workers(self):
+        return self._workers if self._workers is not None else getattr(settings, 'CONTRASENAS_WORKERS', 0)
+
+    # --- API pública ---
+
+    def hashear(self, contrasena):
+        """Equivalente a make_password, con el costo configurado."""
+        hasher = get_hasher('default')
+        if not isinstance(hasher, PBKDF2PasswordHasher) or contrasena is None:
+            return make_password(contrasena)
+
+        salt = hasher.salt()
+        iteraciones = hasher.iterations
+        digest = hasher.digest().name
+        valor = self._calcular(contrasena, salt, iteraciones, digest)
+        return f'{hasher.algorithm}${iteraciones}${salt}${valor}'
+
+    def verificar(self, contrasena, codificado):
+        """
+        Equivalente a check_password. Devuelve (es_valida, necesita_rehash):
+        necesita_rehash indica que el hash usa otro algoritmo o costo que el configurado.
+        """
+        if contrasena is None or not codificado:
+            return False, False
+        try:
+            hasher = identify_hasher(codificado)
+        except ValueError:
+            return False, False
+
+        necesita_rehash = (
+            hasher.algorithm != get_hasher('default').algorithm or hasher.must_update(codificado)
+        )
+        if not isinstance(hasher, PBKDF2PasswordHasher):
+            return check_password(contrasena, codificado), necesita_rehash
+
+        algoritmo, iteraciones, salt, valor = codificado.split('$', 3)
+        calculado = self._calcular(contrasena, salt, int(iteraciones), hasher.digest().name)
+        return constant_time_compare(valor, calculado), necesita_rehash
+
+    def cerrar(self):
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=True, cancel_futures=True)
+                self._pool = None
+
+    # --- Internos ---
+
+    def _calcular(self, contrasena, salt, iteraciones, digest):
+        if self.workers <= 0:
+            return pbkdf2_base64(contrasena, salt, iteraciones, digest)
+
+        pool, lugares = self._obtener_pool()
+        espera = self._espera if self._espera is not None else getattr(settings, 'CONTRASENAS_ESPERA_SEGUNDOS', 10)
+        if not lugares.acquire(timeout=espera):
+            raise PoolContrasenasSaturado('Demasiados inicios de sesión simultáneos.')
+        try:
+            return pool.submit(pbkdf2_base64, contrasena, salt, iteraciones, digest).result()
+        finally:
+            lugares.release()
+
+    def _obtener_pool(self):
+        with self._lock:
+            if self._pool is None:
+                workers = self.workers
+                max_pendientes = self._max_pendientes or getattr(
+                    settings, 'CONTRASENAS_MAX_PENDIENTES', workers * 8
+                )
+                # 'spawn': no se copia el estado (hilos, conexiones) del proceso del servidor
+                self._pool = ProcessPoolExecutor(
+                    max_workers=workers, mp_context=multiprocessing.get_context('spawn')
+                )
+                self._lugares = threading.BoundedSemaphore(max_pendientes)
+                if not self._atexit_registrado:
+                    atexit.register(self.cerrar)
+                    self._atexit_registrado = True
+            return self._pool, self._lugares
+
+
+# Instancia única por proceso
+pool_contrasenas = PoolContrasenas()
+
+
+def hashear_contrasena(contrasena):
+    return pool_contrasenas.hashear(contrasena)
+
+
+def verificar_contrasena(contrasena, codificado):
+    return pool_contrasenas.verificar(contrasena, codificado)
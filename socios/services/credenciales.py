@@ -0,0 +1,203 @@
+# socios/services/credenciales.py
+import threading
+import time
+import uuid
+from datetime import date
+from typing import NamedTuple, Optional
+
+from django.conf import settings
+from django.utils import timezone
+
+from socios.models import Usuario, SocioInfo
+from .elegibilidad import actualizar_elegibilidad_vencida
+
+
+class CredencialAcceso(NamedTuple):
+    """Registro compacto con lo que el molinete necesita saber de un usuario."""
+    usuario_id: int
+    nombre: str
+    apellido: str
+    nro_documento: Optional[str]
+    qr_token: str
+    estado_socio: Optional[str]  # None si el usuario no es socio
+    categoria_id: Optional[int]
+    cuotas_vencidas: int  # Tomado de ElegibilidadAcceso
+    proximo_vencimiento: Optional[date]
+
+    @property
+    def nombre_completo(self):
+        return f"{self.nombre} {self.apellido}"
+
+    @property
+    def es_socio(self):
+        return self.estado_socio is not None
+
+    def deuda_vigente(self, hoy):
+        """Indica si 'cuotas_vencidas' sigue valiendo para 'hoy' (no venció otra cuota impaga)."""
+        return self.proximo_vencimiento is None or self.proximo_vencimiento >= hoy
+
+
+def _normalizar_qr(codigo):
+    """Devuelve el UUID en su forma canónica o None si el código no es un UUID."""
+    try:
+        return str(uuid.UUID(str(codigo)))
+    except (ValueError, AttributeError):
+        return None
+
+
+class IndiceCredenciales:
+    """
+    Índice en memoria (local al proceso) de credenciales de acceso.
+    Resuelve QR token, DNI o ID a una CredencialAcceso sin consultar la base de datos.
+
+    - Se carga completo de forma perezosa en la primera búsqueda.
+    - Las señales de Usuario, SocioInfo, Cuota y Pago lo actualizan por usuario.
+    - La deuda sale de la fila de ElegibilidadAcceso de cada socio.
+    - Cada CREDENCIALES_TTL_SEGUNDOS se recarga completo, para absorber cambios
+      hechos desde otros procesos (ej: comandos de gestión o bulk_create).
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._por_id = {}
+        self._por_qr = {}
+        self._por_documento = {}
+        self._cargado_en = None
+
+    # --- Consultas ---
+
+    def buscar(self, codigo):
+        """Busca por QR token, luego DNI y por último ID (mismo orden que el molinete)."""
+        self._asegurar_cargado()
+        codigo = str(codigo).strip()
+
+        with self._lock:
+            usuario_id = None
+            qr = _normalizar_qr(codigo)
+            if qr:
+                usuario_id = self._por_qr.get(qr)
+            if usuario_id is None:
+                usuario_id = self._por_documento.get(codigo)
+            if usuario_id is None and codigo.isdigit():
+                usuario_id = int(codigo) if int(codigo) in self._por_id else None
+            if usuario_id is not None:
+                return self._por_id[usuario_id]
+
+        # No está en el índice: puede ser un alta hecha desde otro proceso
+        return self._buscar_en_bd(codigo, qr)
+
+    @property
+    def cargado(self):
+        return self._cargado_en is not None
+
+    # --- Mantenimiento ---
+
+    def invalidar(self):
+        """Descarta todo el índice. La próxima búsqueda lo vuelve a cargar."""
+        with self._lock:
+            self._por_id.clear()
+            self._por_qr.clear()
+            self._por_documento.clear()
+            self._cargado_en = None
+
+    def actualizar_usuario(self, usuario_id):
+        """
+        Recarga la credencial de un usuario y la devuelve.
+        No hace nada si el índice no está en uso.
+        """
+        if not self.cargado or usuario_id is None:
+            return None
+        credenciales = self._leer_credenciales(usuario_ids=[usuario_id])
+        with self._lock:
+            self._quitar(usuario_id)
+            for credencial in credenciales:
+                self._agregar(credencial)
+            return self._por_id.get(usuario_id)
+
+    def quitar_usuario(self, usuario_id):
+        if not self.cargado:
+            return
+        with self._lock:
+            self._quitar(usuario_id)
+
+    # --- Internos ---
+
+    def _asegurar_cargado(self):
+        ttl = getattr(settings, 'CREDENCIALES_TTL_SEGUNDOS', 300)
+        cargado_en = self._cargado_en
+        if cargado_en is not None and time.monotonic() - cargado_en < ttl:
+            return
+        credenciales = self._leer_credenciales()
+        with self._lock:
+            self.invalidar()
+            for credencial in credenciales:
+                self._agregar(credencial)
+            self._cargado_en = time.monotonic()
+
+    def _buscar_en_bd(self, codigo, qr):
+        usuario_id = None
+        if qr:
+            usuario_id = Usuario.objects.filter(qr_token=qr).values_list('id', flat=True).first()
+        if usuario_id is None:
+            usuario_id = Usuario.objects.filter(nro_documento=codigo).values_list('id', flat=True).first()
+        if usuario_id is None and codigo.isdigit():
+            usuario_id = Usuario.objects.filter(id=int(codigo)).values_list('id', flat=True).first()
+        if usuario_id is None:
+            return None
+
+        return self.actualizar_usuario(usuario_id)
+
+    def _agregar(self, credencial):
+        self._por_id[credencial.usuario_id] = credencial
+        self._por_qr[credencial.qr_token] = credencial.usuario_id
+        if credencial.nro_documento:
+            self._por_documento[credencial.nro_documento] = credencial.usuario_id
+
+    def _quitar(self, usuario_id):
+        credencial = self._por_id.pop(usuario_id, None)
+        if credencial is None:
+            return
+        if self._por_qr.get(credencial.qr_token) == usuario_id:
+            del self._por_qr[credencial.qr_token]
+        if credencial.nro_documento and self._por_documento.get(credencial.nro_documento) == usuario_id:
+            del self._por_documento[credencial.nro_documento]
+
+    def _leer_credenciales(self, usuario_ids=None):
+        """Arma las credenciales con dos consultas, para todos o para algunos usuarios."""
+        # Las filas de elegibilidad que quedaron viejas por el cambio de día se recalculan antes
+        actualizar_elegibilidad_vencida(timezone.now().date(), usuario_ids)
+
+        usuarios = Usuario.objects.order_by()
+        socios = SocioInfo.objects.order_by()
+        if usuario_ids is not None:
+            usuarios = usuarios.filter(id__in=usuario_ids)
+            socios = socios.filter(usuario_id__in=usuario_ids)
+
+        datos_socio = {
+            fila[0]: fila[1:]
+            for fila in socios.values_list(
+                'usuario_id', 'estado', 'categoria_id',
+                'elegibilidad__cuotas_vencidas', 'elegibilidad__proximo_vencimiento'
+            )
+        }
+
+        credenciales = []
+        campos = ('id', 'nombre', 'apellido', 'nro_documento', 'qr_token')
+        for usuario_id, nombre, apellido, nro_documento, qr_token in usuarios.values_list(*campos):
+            estado, categoria_id, vencidas, proximo = datos_socio.get(usuario_id, (None, None, 0, None))
+            credenciales.append(CredencialAcceso(
+                usuario_id=usuario_id,
+                nombre=nombre,
+                apellido=apellido,
+                nro_documento=nro_documento,
+                qr_token=str(qr_token),
+                estado_socio=estado,
+                categoria_id=categoria_id,
+                cuotas_vencidas=vencidas or 0,
+                proximo_vencimiento=proximo,
+            ))
+        return credenciales
+
+
+# Instancia única por proceso
+indice_credenciales = IndiceCredenciales()
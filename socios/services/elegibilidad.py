@@ -0,0 +1,107 @@
+# socios/services/elegibilidad.py
+from django.db import connection
+from django.db.models import Count, Min, Q
+from django.utils import timezone
+
+from socios.models import SocioInfo, Cuota, ElegibilidadAcceso
+
+CAMPOS_CALCULADOS = [
+    'socio_activo', 'cuotas_vencidas', 'vencimiento_mas_antiguo',
+    'proximo_vencimiento', 'fecha_calculo',
+]
+
+
+def recalcular_elegibilidad(usuario_ids=None, hoy=None, crear=True):
+    """
+    Recalcula las filas de ElegibilidadAcceso con una consulta agregada sobre las
+    cuotas impagas (estado_pago de Cuota, sin join con Pago).
+
+    - usuario_ids: socios a recalcular (None = todos).
+    - crear: si es False solo actualiza filas existentes. Se usa desde las señales
+      de borrado, donde el socio puede estar eliminándose en cascada.
+
+    Devuelve la cantidad de filas escritas.
+    """
+    hoy = hoy or timezone.now().date()
+
+    socios = SocioInfo.objects.order_by()
+    cuotas_impagas = Cuota.objects.exclude(estado_pago='pagada').order_by()
+    if usuario_ids is not None:
+        usuario_ids = [uid for uid in usuario_ids if uid is not None]
+        if not usuario_ids:
+            return 0
+        socios = socios.filter(usuario_id__in=usuario_ids)
+        cuotas_impagas = cuotas_impagas.filter(usuario_id__in=usuario_ids)
+
+    deudas = {
+        fila['usuario_id']: fila
+        for fila in cuotas_impagas.values('usuario_id').annotate(
+            vencidas=Count('id', filter=Q(vencimiento__lt=hoy)),
+            mas_antiguo=Min('vencimiento', filter=Q(vencimiento__lt=hoy)),
+            proximo=Min('vencimiento', filter=Q(vencimiento__gte=hoy)),
+        )
+    }
+
+    filas = []
+    for usuario_id, estado in socios.values_list('usuario_id', 'estado'):
+        deuda = deudas.get(usuario_id, {})
+        filas.append(ElegibilidadAcceso(
+            socio_id=usuario_id,
+            socio_activo=estado == 'activo',
+            cuotas_vencidas=deuda.get('vencidas', 0),
+            vencimiento_mas_antiguo=deuda.get('mas_antiguo'),
+            proximo_vencimiento=deuda.get('proximo'),
+            fecha_calculo=hoy,
+        ))
+    if not filas:
+        return 0
+
+    if crear and connection.features.supports_update_conflicts_with_target:
+        # Un solo upsert (INSERT ... ON CONFLICT DO UPDATE) por lote: evita el UPDATE con
+        # CASE por fila de bulk_update, que con miles de socios domina el tiempo
+        ElegibilidadAcceso.objects.bulk_create(
+            filas, batch_size=1000, update_conflicts=True,
+            unique_fields=['socio'], update_fields=CAMPOS_CALCULADOS,
+        )
+        return len(filas)
+
+    existentes = set(
+        ElegibilidadAcceso.objects.filter(socio_id__in=[f.socio_id for f in filas])
+        .values_list('socio_id', flat=True)
+    )
+    a_actualizar = [f for f in filas if f.socio_id in existentes]
+    a_crear = [f for f in filas if f.socio_id not in existentes] if crear else []
+
+    if a_actualizar:
+        ElegibilidadAcceso.objects.bulk_update(a_actualizar, CAMPOS_CALCULADOS, batch_size=1000)
+    if a_crear:
+        ElegibilidadAcceso.objects.bulk_create(a_crear, batch_size=1000, ignore_conflicts=True)
+    return len(a_actualizar) + len(a_crear)
+
+
+def actualizar_elegibilidad_vencida(hoy=None, usuario_ids=None):
+    """
+    Cambio de día: recalcula solo las filas que dejaron de ser vigentes
+    (venció otra cuota impaga) y las de socios que todavía no tienen fila.
+    """
+    hoy = hoy or timezone.now().date()
+    pendientes = SocioInfo.objects.filter(
+        Q(elegibilidad__isnull=True) | Q(elegibilidad__proximo_vencimiento__lt=hoy)
+    )
+    if usuario_ids is not None:
+        pendientes = pendientes.filter(usuario_id__in=usuario_ids)
+
+    ids = list(pendientes.values_list('usuario_id', flat=True))
+    if not ids:
+        return 0
+    return recalcular_elegibilidad(ids, hoy=hoy)
+
+
+def obtener_elegibilidad(usuario_id, hoy=None):
+    """Devuelve la fila vigente del socio (recalculándola si hace falta) o None si no es socio."""
+    hoy = hoy or timezone.now().date()
+    fila = ElegibilidadAcceso.objects.filter(socio_id=usuario_id).first()
+    if fila is None or not fila.vigente(hoy):
+        recalcular_elegibilidad([usuario_id], hoy=hoy)
+        fila = ElegibilidadAcceso.objects.filter(socio_id=usuario_id).first()
+    return fila
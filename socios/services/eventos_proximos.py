@@ -0,0 +1,84 @@
+# socios/services/eventos_proximos.py
+import threading
+import time
+from datetime import datetime, time as dt_time, timedelta
+from typing import NamedTuple
+
+from django.conf import settings
+from django.utils import timezone
+
+from socios.models.evento import Evento
+
+DIAS_ADELANTE = 7
+
+
+class EventoProximo(NamedTuple):
+    titulo: str
+    fecha_inicio: datetime
+
+
+class CacheEventosProximos:
+    """
+    Próximo evento (de los siguientes 7 días) por categoría, para el saludo del molinete.
+
+    - Se carga con una sola consulta por día y se resuelve por categoría en memoria.
+    - Se descarta al cambiar la fecha o cuando las señales de Evento avisan un cambio.
+    - Cada EVENTOS_PROXIMOS_TTL_SEGUNDOS se recarga, por cambios hechos desde otros procesos.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._fecha = None
+        self._cargado_en = None
+        self._eventos = []       # [(categoria_id, EventoProximo)] ordenados por fecha_inicio
+        self._por_categoria = {}  # {categoria_id: EventoProximo | None}
+
+    def proximo(self, categoria_id, hoy=None):
+        """Devuelve el primer evento general o de la categoría, o None si no hay."""
+        hoy = hoy or timezone.now().date()
+        self._asegurar_cargado(hoy)
+
+        with self._lock:
+            if categoria_id in self._por_categoria:
+                return self._por_categoria[categoria_id]
+            evento = next(
+                (ev for cat, ev in self._eventos if cat is None or cat == categoria_id),
+                None
+            )
+            self._por_categoria[categoria_id] = evento
+            return evento
+
+    def invalidar(self):
+        with self._lock:
+            self._fecha = None
+            self._cargado_en = None
+            self._eventos = []
+            self._por_categoria = {}
+
+    def _asegurar_cargado(self, hoy):
+        ttl = getattr(settings, 'EVENTOS_PROXIMOS_TTL_SEGUNDOS', 300)
+        # Se leen juntos bajo el lock: invalidar() puede dejar _cargado_en en None entre medio
+        with self._lock:
+            vigente = self._fecha == hoy and time.monotonic() - self._cargado_en < ttl
+        if vigente:
+            return
+
+        inicio_rango = timezone.make_aware(datetime.combine(hoy, dt_time.min))
+        fin_rango = inicio_rango + timedelta(days=DIAS_ADELANTE)
+        eventos = [
+            (categoria_id, EventoProximo(titulo, fecha_inicio))
+            for categoria_id, titulo, fecha_inicio in Evento.objects.filter(
+                fecha_inicio__gte=inicio_rango,
+                fecha_inicio__lte=fin_rango
+            ).order_by('fecha_inicio').values_list('categoria_id', 'titulo', 'fecha_inicio')
+        ]
+
+        with self._lock:
+            self._eventos = eventos
+            self._por_categoria = {}
+            self._fecha = hoy
+            self._cargado_en = time.monotonic()
+
+
+# Instancia única por proceso
+eventos_proximos = CacheEventosProximos()
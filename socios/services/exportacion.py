@@ -0,0 +1,201 @@
+# socios/services/exportacion.py
+import csv
+import re
+import zipfile
+from datetime import date, datetime
+from decimal import Decimal
+from xml.sax.saxutils import escape
+
+from django.utils import timezone
+
+from socios.models import Pago
+
+TAMANO_CHUNK = 2000  # Filas por viaje al cursor del servidor
+
+# (campo para values_list, encabezado)
+COLUMNAS_CUOTAS = [
+    ('id', 'ID'),
+    ('usuario_id', 'ID socio'),
+    ('usuario__email', 'Email'),
+    ('usuario__nombre', 'Nombre'),
+    ('usuario__apellido', 'Apellido'),
+    ('periodo', 'Período'),
+    ('vencimiento', 'Vencimiento'),
+    ('monto', 'Monto'),
+    ('descuento_aplicado', 'Descuento %'),
+    ('estado_pago', 'Estado'),
+    ('saldo', 'Saldo'),
+]
+COLUMNAS_PAGOS = [
+    ('id', 'ID'),
+    ('fecha', 'Fecha'),
+    ('cuota_id', 'ID cuota'),
+    ('cuota__periodo', 'Período'),
+    ('cuota__usuario_id', 'ID socio'),
+    ('cuota__usuario__email', 'Email'),
+    ('medio_pago', 'Medio de pago'),
+    ('monto', 'Monto'),
+    ('moneda', 'Moneda'),
+    ('estado', 'Estado'),
+    ('referencia_externa', 'Referencia externa'),
+    ('comprobante', 'Comprobante'),
+]
+
+
+def exportacion(cuotas, tipo='cuotas', chunk_size=TAMANO_CHUNK):
+    """
+    Devuelve (encabezados, filas) para exportar las cuotas del queryset o sus pagos.
+    'filas' es un iterador perezoso de tuplas: values_list + iterator(chunk_size), que en
+    PostgreSQL usa un cursor del lado del servidor; nunca se cargan todas las filas juntas.
+    """
+    if tipo == 'cuotas':
+        columnas, queryset, orden = COLUMNAS_CUOTAS, cuotas, ('periodo', 'id')
+    elif tipo == 'pagos':
+        columnas, queryset, orden = COLUMNAS_PAGOS, Pago.objects.filter(cuota__in=cuotas.values('id')), ('fecha', 'id')
+    else:
+        raise ValueError(f"Tipo de exportación desconocido: '{tipo}'.")
+
+    filas = queryset.order_by(*orden).values_list(*(campo for campo, _ in columnas)).iterator(chunk_size=chunk_size)
+    return [encabezado for _, encabezado in columnas], filas
+
+
+# --- CSV ---
+
+class _Eco:
+    """Pseudo-archivo para csv.writer: devuelve la línea en vez de guardarla."""
+    def write(self, valor):
+        return valor
+
+
+def csv_en_stream(encabezados, filas):
+    """Genera el CSV línea por línea. Empieza con BOM para que Excel lea bien los acentos."""
+    escritor = csv.writer(_Eco())
+    yield '\ufeff' + escritor.writerow(encabezados)
+    for fila in filas:
+        yield escritor.writerow([_celda_csv(valor) for valor in fila])
+
+
+_INICIOS_DE_FORMULA = ('=', '+', '-', '@', '\t', '\r')
+
+
+def _texto(valor):
+    if valor is None:
+        return ''
+    if isinstance(valor, datetime):
+        return timezone.localtime(valor).strftime('%Y-%m-%d %H:%M:%S') if timezone.is_aware(valor) else valor.isoformat(' ')
+    if isinstance(valor, date):
+        return valor.isoformat()
+    return str(valor)
+
+
+def _celda_csv(valor):
+    # Texto cargado por socios (nombre, email, comprobante...): Excel no debe evaluarlo como fórmula.
+    # Solo en CSV: en el XLSX van como cadenas en línea, que Excel nunca evalúa
+    if isinstance(valor, str) and valor.startswith(_INICIOS_DE_FORMULA):
+        return "'" + valor
+    return _texto(valor)
+
+
+# --- XLSX ---
+
+# Caracteres de control que XML no admite
+_INVALIDOS_XML = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/worksheets/sheet1.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+    '</Types>'
+)
+_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="xl/workbook.xml"/>'
+    '</Relationships>'
+)
+_WORKBOOK = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+    '<sheets><sheet name="{hoja}" sheetId="1" r:id="rId1"/></sheets>'
+    '</workbook>'
+)
+_WORKBOOK_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+    'Target="worksheets/sheet1.xml"/>'
+    '</Relationships>'
+)
+
+
+class _BufferZip:
+    """Destino de escritura para ZipFile que acumula bytes hasta que se los retira."""
+    def __init__(self):
+        self._partes = []
+
+    def write(self, datos):
+        self._partes.append(bytes(datos))
+        return len(datos)
+
+    def flush(self):
+        pass
+
+    def retirar(self):
+        datos = b''.join(self._partes)
+        self._partes.clear()
+        return datos
+
+
+def xlsx_en_stream(encabezados, filas, hoja='Hoja1', filas_por_bloque=TAMANO_CHUNK):
+    """
+    Genera un .xlsx de una hoja a medida que lee las filas, sin dependencias externas.
+    ZipFile escribe en un destino no posicionable (descriptores de datos al final de cada
+    archivo), así que la hoja se comprime y se entrega de a bloques de 'filas_por_bloque'.
+    Los textos van como cadenas en línea y los números como números.
+    """
+    buffer = _BufferZip()
+    with zipfile.ZipFile(buffer, 'w', compression=zipfile.ZIP_DEFLATED) as archivo:
+        archivo.writestr('[Content_Types].xml', _CONTENT_TYPES)
+        archivo.writestr('_rels/.rels', _RELS)
+        archivo.writestr('xl/workbook.xml', _WORKBOOK.format(hoja=escape(hoja[:31], {'"': '&quot;'})))
+        archivo.writestr('xl/_rels/workbook.xml.rels', _WORKBOOK_RELS)
+        yield buffer.retirar()
+
+        with archivo.open('xl/worksheets/sheet1.xml', 'w', force_zip64=True) as planilla:
+            planilla.write(
+                b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                b'<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+            )
+            planilla.write(_fila_xml(encabezados))
+            bloque = []
+            for fila in filas:
+                bloque.append(_fila_xml(fila))
+                if len(bloque) >= filas_por_bloque:
+                    planilla.write(b''.join(bloque))
+                    bloque.clear()
+                    yield buffer.retirar()
+            planilla.write(b''.join(bloque))
+            planilla.write(b'</sheetData></worksheet>')
+    yield buffer.retirar()
+
+
+def _fila_xml(valores):
+    celdas = []
+    for valor in valores:
+        if valor is None:
+            celdas.append('<c/>')
+        elif isinstance(valor, (int, float, Decimal)) and not isinstance(valor, bool):
+            celdas.append(f'<c><v>{valor}</v></c>')
+        else:
+            texto = escape(_INVALIDOS_XML.sub('', _texto(valor)))
+            celdas.append(f'<c t="inlineStr"><is><t xml:space="preserve">{texto}</t></is></c>')
+    return ('<row>' + ''.join(celdas) + '</row>').encode('utf-8')
@@ -0,0 +1,355 @@
+# socios/services/facturacion.py
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import date
+from decimal import Decimal
+from typing import NamedTuple
+
+import django
+from django.conf import settings
+from django.core.management.color import no_style
+from django.db import IntegrityError, connection, transaction
+from django.utils import timezone
+
+from socios.models import SocioInfo, NivelSocio, Cuota, Pago, ElegibilidadAcceso
+from .credenciales import indice_credenciales
+from .elegibilidad import recalcular_elegibilidad
+
+TAMANO_LOTE = 5000
+
+
+class ResultadoFacturacion(NamedTuple):
+    periodo: str
+    vencimiento: date
+    socios: int     # Socios activos recorridos
+    creadas: int    # Cuotas nuevas
+    segundos: float
+
+    @property
+    def existentes(self):
+        """Socios que ya tenían la cuota del período (corridas repetidas o parciales)."""
+        return self.socios - self.creadas
+
+    @property
+    def cuotas_por_segundo(self):
+        return self.creadas / self.segundos if self.segundos else 0.0
+
+
+def vencimiento_de_periodo(periodo):
+    """
+    El vencimiento es el día DIA_VENCIMIENTO_CUOTA del mes siguiente al período ('AAAA-MM').
+    Depende solo del período: no cambia según el día del mes en que se corra la facturación.
+    """
+    anio, mes = (int(parte) for parte in periodo.split('-'))
+    anio, mes = (anio + 1, 1) if mes == 12 else (anio, mes + 1)
+    return date(anio, mes, getattr(settings, 'DIA_VENCIMIENTO_CUOTA', 5))
+
+
+def generar_cuotas_periodo(periodo, vencimiento=None, monto_base=None, tamano_lote=TAMANO_LOTE,
+                           desde_usuario_id=0, hasta_usuario_id=None):
+    """
+    Genera la cuota del período para todos los socios activos, por lotes de socios.
+
+    En PostgreSQL y SQLite cada lote es un único INSERT ... SELECT que toma el descuento
+    de NivelSocio en el mismo JOIN; en otros motores, un bulk_create por lote.
+    La restricción única (usuario, periodo) hace que volver a correrlo sea seguro: las
+    cuotas que ya existen se saltean y una corrida cortada se completa con la siguiente.
+    Después de cada lote se recalcula la elegibilidad de sus socios (cambia el próximo vencimiento).
+    Con 'desde_usuario_id' / 'hasta_usuario_id' procesa solo los socios con usuario_id en
+    (desde, hasta]: es lo que corre cada worker de generar_cuotas_en_paralelo.
+    """
+    vencimiento = vencimiento or vencimiento_de_periodo(periodo)
+    monto_base = Decimal(str(monto_base if monto_base is not None else getattr(settings, 'VALOR_CUOTA_BASE', 15000)))
+    insertar = _insertar_sql if connection.vendor in ('postgresql', 'sqlite') else _insertar_bulk
+
+    activos = SocioInfo.objects.filter(estado='activo').order_by('usuario_id')
+    if hasta_usuario_id is not None:
+        activos = activos.filter(usuario_id__lte=hasta_usuario_id)
+    inicio = time.perf_counter()
+    socios = creadas = 0
+    ultimo = desde_usuario_id
+    while True:
+        ids = list(activos.filter(usuario_id__gt=ultimo).values_list('usuario_id', flat=True)[:tamano_lote])
+        if not ids:
+            break
+        with transaction.atomic():
+            nuevas = insertar(periodo, vencimiento, monto_base, ultimo, ids[-1])
+            if nuevas:
+                recalcular_elegibilidad(ids)
+        creadas += nuevas
+        socios += len(ids)
+        ultimo = ids[-1]
+
+    indice_credenciales.invalidar()
+    return ResultadoFacturacion(periodo, vencimiento, socios, creadas, time.perf_counter() - inicio)
+
+
+# --- Generación en paralelo por tramos de socios ---
+
+def repartir_en_tramos(cantidad):
+    """
+    Divide los socios activos en 'cantidad' tramos de usuario_id con la misma cantidad
+    de socios (±1). Devuelve [(desde_exclusivo, hasta_inclusivo), ...].
+    """
+    activos = SocioInfo.objects.filter(estado='activo').order_by('usuario_id').values_list('usuario_id', flat=True)
+    total = activos.count()
+    if total == 0:
+        return []
+    cantidad = max(1, min(cantidad, total))
+    # Un índice por corte: el último usuario_id de cada tramo
+    cortes = [activos[total * k // cantidad - 1] for k in range(1, cantidad + 1)]
+    return list(zip([0] + cortes[:-1], cortes))
+
+
+def _generar_tramo(periodo, vencimiento, monto_base, desde_id, hasta_id, tamano_lote):
+    try:
+        return generar_cuotas_periodo(
+            periodo, vencimiento, monto_base, tamano_lote,
+            desde_usuario_id=desde_id, hasta_usuario_id=hasta_id,
+        )
+    finally:
+        connection.close()
+
+
+def generar_cuotas_en_paralelo(periodo, workers, vencimiento=None, monto_base=None, tamano_lote=TAMANO_LOTE):
+    """
+    Igual que generar_cuotas_periodo, pero repartiendo los socios activos en 'workers'
+    tramos de usuario_id que se generan en procesos separados, cada uno con su conexión
+    y sus transacciones. Un tramo que falla no deshace a los demás; como la restricción
+    (usuario, periodo) hace idempotente la inserción, basta con volver a correrlo.
+
+    Devuelve (resumen, tramos, errores): el ResultadoFacturacion sumado, el resultado de cada
+    tramo ((desde, hasta), ResultadoFacturacion) y los tramos fallidos ((desde, hasta), error).
+    """
+    vencimiento = vencimiento or vencimiento_de_periodo(periodo)
+    tramos = repartir_en_tramos(workers)
+    inicio = time.perf_counter()
+    resultados, errores = [], []
+
+    if tramos:
+        # Procesos nuevos (spawn): cada uno arranca su propio Django y abre su propia conexión.
+        # El initializer tiene que ser django.setup: este módulo no se puede importar antes.
+        contexto = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=len(tramos), mp_context=contexto, initializer=django.setup) as pool:
+            futuros = {
+                pool.submit(_generar_tramo, periodo, vencimiento, monto_base, desde, hasta, tamano_lote): (desde, hasta)
+                for desde, hasta in tramos
+            }
+            for futuro in as_completed(futuros):
+                try:
+                    resultados.append((futuros[futuro], futuro.result()))
+                except Exception as e:
+                    errores.append((futuros[futuro], e))
+
+    # Los workers actualizaron la elegibilidad en la base; el índice de este proceso quedó viejo
+    indice_credenciales.invalidar()
+    resultados.sort()
+    resumen = ResultadoFacturacion(
+        periodo, vencimiento,
+        sum(r.socios for _, r in resultados),
+        sum(r.creadas for _, r in resultados),
+        time.perf_counter() - inicio,
+    )
+    return resumen, resultados, sorted(errores, key=lambda e: e[0])
+
+
+def periodos_entre(desde, hasta):
+    """Períodos 'AAAA-MM' desde el mes de 'desde' hasta el de 'hasta', ambos incluidos."""
+    periodos = []
+    anio, mes = desde.year, desde.month
+    while (anio, mes) <= (hasta.year, hasta.month):
+        periodos.append(f'{anio:04d}-{mes:02d}')
+        anio, mes = (anio + 1, 1) if mes == 12 else (anio, mes + 1)
+    return periodos
+
+
+def generar_cuotas_historicas(periodos, socios=None, monto_base=None, tamano_lote=TAMANO_LOTE,
+                              desde_usuario_id=0, al_confirmar_lote=None):
+    """
+    Genera las cuotas de varios períodos para los socios dados (por defecto, los activos).
+
+    Recorre los socios por usuario_id en lotes de ~'tamano_lote' cuotas. Por cada lote,
+    las cuotas existentes se leen con una sola consulta y las nuevas se insertan y
+    confirman en su propia transacción, así la memoria y los bloqueos no crecen con el rango.
+    'desde_usuario_id' permite retomar una corrida cortada; 'al_confirmar_lote(ultimo_id,
+    creadas, existentes)' se llama después de cada commit (ej: para guardar un checkpoint).
+    Devuelve (creadas, existentes).
+    """
+    socios = (socios if socios is not None else SocioInfo.objects.filter(estado='activo')).order_by('usuario_id')
+    monto_base = Decimal(str(monto_base if monto_base is not None else getattr(settings, 'VALOR_CUOTA_BASE', 15000)))
+    vencimientos = {periodo: vencimiento_de_periodo(periodo) for periodo in periodos}
+    socios_por_lote = max(1, tamano_lote // max(len(periodos), 1))
+
+    creadas = existentes = 0
+    ultimo = desde_usuario_id
+    while periodos:
+        lote = list(
+            socios.filter(usuario_id__gt=ultimo)
+            .values_list('usuario_id', 'nivel_socio__descuento')[:socios_por_lote]
+        )
+        if not lote:
+            break
+        ids = [usuario_id for usuario_id, _ in lote]
+        ya_creadas = set(
+            Cuota.objects.filter(usuario_id__in=ids, periodo__in=periodos).values_list('usuario_id', 'periodo')
+        )
+
+        cuotas = []
+        for usuario_id, descuento in lote:
+            monto = _monto_con_descuento(monto_base, descuento)
+            for periodo in periodos:
+                if (usuario_id, periodo) in ya_creadas:
+                    continue
+                cuotas.append(Cuota(
+                    usuario_id=usuario_id, periodo=periodo, monto=monto, saldo=monto,
+                    vencimiento=vencimientos[periodo], descuento_aplicado=descuento or 0,
+                ))
+
+        insertadas = 0
+        with transaction.atomic():
+            if cuotas:
+                insertadas = _insertar_cuotas(cuotas)
+                recalcular_elegibilidad(ids)
+        existentes_lote = len(ya_creadas) + len(cuotas) - insertadas
+
+        creadas += insertadas
+        existentes += existentes_lote
+        ultimo = ids[-1]
+        if al_confirmar_lote:
+            al_confirmar_lote(ultimo, insertadas, existentes_lote)
+
+    indice_credenciales.invalidar()
+    return creadas, existentes
+
+
+def _insertar_cuotas(cuotas):
+    """
+    Inserta las cuotas y devuelve cuántas se crearon.
+    Otra corrida en paralelo pudo crear alguna entre la lectura de existentes y el INSERT:
+    en ese caso el lote se reintenta de a una, cada una en su savepoint, y las repetidas
+    se saltean (con ignore_conflicts no se sabría cuántas se insertaron).
+    """
+    try:
+        with transaction.atomic():
+            Cuota.objects.bulk_create(cuotas, batch_size=1000)
+        return len(cuotas)
+    except IntegrityError:
+        pass
+
+    insertadas = 0
+    for cuota in cuotas:
+        cuota.pk = None
+        try:
+            with transaction.atomic():
+                Cuota.objects.bulk_create([cuota])
+        except IntegrityError:
+            continue
+        insertadas += 1
+    return insertadas
+
+
+# --- Borrado masivo ---
+
+def borrar_cuotas(cuotas=None, tamano_lote=TAMANO_LOTE, al_confirmar_lote=None):
+    """
+    Borra las cuotas del queryset (por defecto, todas) y sus pagos, por lotes de id.
+
+    Cada lote son dos DELETE directos (pagos y cuotas) y la elegibilidad de sus socios,
+    en su propia transacción: no se cargan objetos en memoria (el collector de Django
+    traería cada cuota y cada pago para las señales) y los bloqueos duran un lote.
+    'al_confirmar_lote(ultimo_id, cuotas, pagos)' se llama después de cada commit.
+    Devuelve (cuotas_borradas, pagos_borrados).
+    """
+    cuotas = (cuotas if cuotas is not None else Cuota.objects.all()).order_by('id')
+    total_cuotas = total_pagos = 0
+    ultimo = 0
+    while True:
+        lote = list(cuotas.filter(id__gt=ultimo).values_list('id', 'usuario_id')[:tamano_lote])
+        if not lote:
+            break
+        ids = [cuota_id for cuota_id, _ in lote]
+        with transaction.atomic():
+            pagos = _borrar_donde(Pago, 'cuota_id', ids)
+            borradas = _borrar_donde(Cuota, 'id', ids)
+            # Los socios no se están borrando, así que vale el upsert (mucho más rápido
+            # que el bulk_update de crear=False que usan las señales de borrado)
+            recalcular_elegibilidad({usuario_id for _, usuario_id in lote})
+
+        total_cuotas += borradas
+        total_pagos += pagos
+        ultimo = ids[-1]
+        if al_confirmar_lote:
+            al_confirmar_lote(ultimo, borradas, pagos)
+
+    indice_credenciales.invalidar()
+    return total_cuotas, total_pagos
+
+
+def truncar_cuotas():
+    """
+    Vacía las tablas de pagos y cuotas con el vaciado nativo del motor (TRUNCATE en
+    PostgreSQL). Es lo más rápido para borrar todo, pero no admite filtros.
+    Devuelve (cuotas_borradas, pagos_borrados).
+    """
+    with transaction.atomic():
+        totales = Cuota.objects.count(), Pago.objects.count()
+        with connection.cursor() as cursor:
+            for sql in connection.ops.sql_flush(no_style(), [Pago._meta.db_table, Cuota._meta.db_table]):
+                cursor.execute(sql)
+        # Sin cuotas nadie debe nada: un UPDATE en vez de recalcular socio por socio
+        ElegibilidadAcceso.objects.update(
+            cuotas_vencidas=0, vencimiento_mas_antiguo=None, proximo_vencimiento=None,
+            fecha_calculo=timezone.now().date(),
+        )
+    indice_credenciales.invalidar()
+    return totales
+
+
+def _borrar_donde(modelo, columna, ids):
+    marcadores = ', '.join(['%s'] * len(ids))
+    tabla = connection.ops.quote_name(modelo._meta.db_table)
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {tabla} WHERE {connection.ops.quote_name(columna)} IN ({marcadores})', ids)
+        return cursor.rowcount
+
+
+def _monto_con_descuento(monto_base, descuento):
+    return (monto_base * (100 - (descuento or 0)) / 100).quantize(Decimal('0.01'))
+
+
+def _insertar_sql(periodo, vencimiento, monto_base, desde_id, hasta_id):
+    """Un INSERT ... SELECT para los socios activos con usuario_id en (desde_id, hasta_id]."""
+    monto = 'ROUND(%s * (100 - COALESCE(n.descuento, 0)) / 100.0, 2)'
+    sql = f"""
+        INSERT INTO {Cuota._meta.db_table}
+            (usuario_id, periodo, monto, vencimiento, descuento_aplicado, estado_pago, saldo)
+        SELECT s.usuario_id, %s, {monto}, %s, COALESCE(n.descuento, 0), 'pendiente', {monto}
+        FROM {SocioInfo._meta.db_table} s
+        LEFT JOIN {NivelSocio._meta.db_table} n ON n.id = s.nivel_socio_id
+        WHERE s.estado = 'activo' AND s.usuario_id > %s AND s.usuario_id <= %s
+        ON CONFLICT (usuario_id, periodo) DO NOTHING
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [periodo, monto_base, vencimiento, monto_base, desde_id, hasta_id])
+        return cursor.rowcount
+
+
+def _insertar_bulk(periodo, vencimiento, monto_base, desde_id, hasta_id):
+    socios = SocioInfo.objects.filter(
+        estado='activo', usuario_id__gt=desde_id, usuario_id__lte=hasta_id
+    ).values_list('usuario_id', 'nivel_socio__descuento')
+    existentes = set(
+        Cuota.objects.filter(periodo=periodo, usuario_id__gt=desde_id, usuario_id__lte=hasta_id)
+        .values_list('usuario_id', flat=True)
+    )
+    cuotas = []
+    for usuario_id, descuento in socios:
+        if usuario_id in existentes:
+            continue
+        monto = _monto_con_descuento(monto_base, descuento)
+        cuotas.append(Cuota(
+            usuario_id=usuario_id, periodo=periodo, monto=monto, saldo=monto,
+            vencimiento=vencimiento, descuento_aplicado=descuento or 0,
+        ))
+    return _insertar_cuotas(cuotas) if cuotas else 0
@@ -0,0 +1,214 @@
+# socios/services/notificaciones_pago.py
+import hashlib
+import hmac
+from decimal import Decimal, InvalidOperation
+from typing import NamedTuple
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Min
+from django.utils import timezone
+
+from socios.models import Cuota, Pago, NotificacionPago
+from .pagos import actualizar_deuda
+
+TAMANO_LOTE = 200
+
+# Estado del pago en el proveedor -> Pago.estado
+ESTADOS_PAGO = {
+    'approved': 'completado',
+    'pending': 'iniciado',
+    'in_process': 'iniciado',
+    'rejected': 'fallido',
+    'cancelled': 'fallido',
+    'refunded': 'reembolsado',
+    'charged_back': 'reembolsado',
+}
+
+
+class NotificacionInvalida(ValueError):
+    """El cuerpo del webhook no tiene los datos mínimos de una notificación."""
+
+
+class ResultadoNotificaciones(NamedTuple):
+    procesadas: int
+    errores: int
+    diferidas: int = 0  # Esperan a una notificación anterior del mismo pago que tiene otro worker
+    fallidas: int = 0   # Fallaron al aplicarse: quedan pendientes con un intento más
+
+    @property
+    def total(self):
+        return self.procesadas + self.errores + self.fallidas
+
+    def __add__(self, otro):
+        return ResultadoNotificaciones(*(a + b for a, b in zip(self, otro)))
+
+
+# --- Ingreso (webhook) ---
+
+def firma_de(cuerpo, secreto=None):
+    """HMAC-SHA256 (hex) del cuerpo crudo con PAGOS_WEBHOOK_SECRETO."""
+    secreto = secreto if secreto is not None else getattr(settings, 'PAGOS_WEBHOOK_SECRETO', '')
+    return hmac.new(secreto.encode(), cuerpo, hashlib.sha256).hexdigest()
+
+
+def firma_valida(cuerpo, firma):
+    """Compara en tiempo constante; acepta el formato 'sha256=<hex>'."""
+    if not firma or not getattr(settings, 'PAGOS_WEBHOOK_SECRETO', ''):
+        return False
+    firma = firma.split('=', 1)[1] if firma.startswith('sha256=') else firma
+    return hmac.compare_digest(firma_de(cuerpo), firma.strip())
+
+
+def encolar_notificacion(datos):
+    """
+    Valida el cuerpo del webhook y lo guarda en la cola. No toca Cuota ni Pago.
+    Devuelve True si se encoló y False si la notificación ya estaba (el proveedor reintenta).
+    """
+    if not isinstance(datos, dict):
+        raise NotificacionInvalida("El cuerpo debe ser un objeto JSON.")
+    referencia = str(datos.get('referencia_externa') or '').strip()
+    if not referencia:
+        raise NotificacionInvalida("Falta 'referencia_externa'.")
+    estado = str(datos.get('estado') or '').strip().lower()
+    if estado not in ESTADOS_PAGO:
+        raise NotificacionInvalida(f"Estado de pago desconocido: '{estado}'.")
+    try:
+        cuota_id = int(datos.get('cuota_id'))
+        monto = Decimal(str(datos.get('monto')))
+    except (TypeError, ValueError, InvalidOperation):
+        raise NotificacionInvalida("'cuota_id' y 'monto' deben ser numéricos.")
+    if not monto.is_finite() or not Decimal('0') <= monto < Decimal('1e8'):
+        raise NotificacionInvalida("'monto' inválido.")
+
+    _, creada = NotificacionPago.objects.get_or_create(
+        referencia_externa=referencia,
+        defaults={
+            'referencia_pago': str(datos.get('referencia_pago') or referencia),
+            'cuota_id': cuota_id,
+            'monto': monto,
+            'estado_proveedor': estado,
+            'medio_pago': str(datos.get('medio_pago') or 'mercado_pago')[:50],
+            'payload': datos,
+        },
+    )
+    return creada
+
+
+# --- Procesamiento (workers) ---
+
+def procesar_notificaciones(tamano_lote=TAMANO_LOTE):
+    """
+    Aplica un lote de notificaciones pendientes, en orden de llegada, en una transacción.
+
+    Las filas se toman con select_for_update(skip_locked=True): varios workers pueden
+    correr a la vez y cada uno se lleva un lote distinto sin esperarse. Para que las
+    notificaciones de un mismo pago se apliquen en orden, una notificación se difiere
+    (queda pendiente, sin sumar intento) si hay otra anterior del mismo 'referencia_pago'
+    pendiente fuera del lote. Los pagos se escriben con un solo bulk_create con upsert
+    sobre Pago.referencia_externa: los que ya existían solo cambian de estado, por ejemplo
+    al reembolsarse.
+
+    Si el lote falla se deshace y se vuelve a aplicar de a una notificación: solo las que
+    fallan solas suman un intento, y al llegar a PAGOS_NOTIFICACIONES_MAXIMO_INTENTOS
+    quedan en 'error' para revisarlas a mano.
+    """
+    tomadas = []
+    try:
+        return _tomar_y_aplicar(tomadas, limite=tamano_lote)
+    except Exception as e:
+        if not tomadas:
+            raise
+        if len(tomadas) == 1:
+            _registrar_fallo(tomadas, e)
+            return ResultadoNotificaciones(0, 0, fallidas=1)
+
+    resultado = ResultadoNotificaciones(0, 0)
+    for notificacion_id in tomadas:
+        una = []
+        try:
+            resultado += _tomar_y_aplicar(una, id=notificacion_id)
+        except Exception as e:
+            if not una:
+                raise
+            _registrar_fallo(una, e)
+            resultado += ResultadoNotificaciones(0, 0, fallidas=1)
+    return resultado
+
+
+def _tomar_y_aplicar(tomadas, limite=None, **filtro):
+    """
+    Bloquea las notificaciones pendientes, difiere las que deben esperar y aplica el resto
+    en una transacción. Deja en 'tomadas' los ids que se intentaron aplicar.
+    """
+    with transaction.atomic():
+        lote = list(
+            NotificacionPago.objects.select_for_update(skip_locked=True)
+            .filter(estado='pendiente', **filtro).order_by('id')[:limite]
+        )
+        lote, diferidas = _sin_anteriores_pendientes(lote)
+        tomadas.extend(notificacion.id for notificacion in lote)
+        if not lote:
+            return ResultadoNotificaciones(0, 0, diferidas)
+        return _aplicar(lote)._replace(diferidas=diferidas)
+
+
+def _sin_anteriores_pendientes(lote):
+    """Separa las notificaciones que tienen una anterior del mismo pago pendiente fuera del lote."""
+    if not lote:
+        return lote, 0
+    primera_afuera = dict(
+        NotificacionPago.objects.filter(estado='pendiente', referencia_pago__in={n.referencia_pago for n in lote})
+        .exclude(id__in=[n.id for n in lote])
+        .values('referencia_pago').annotate(primera=Min('id')).values_list('referencia_pago', 'primera')
+    )
+    listas = [n for n in lote if n.id < primera_afuera.get(n.referencia_pago, n.id + 1)]
+    return listas, len(lote) - len(listas)
+
+
+def _aplicar(lote):
+    ahora = timezone.now()
+    # Cuota de los pagos que ya existen: el upsert no la cambia
+    cuotas_de_pago = dict(
+        Pago.objects.filter(referencia_externa__in={n.referencia_pago for n in lote})
+        .values_list('referencia_externa', 'cuota_id')
+    )
+    usuarios = dict(
+        Cuota.objects.filter(id__in={n.cuota_id for n in lote} | set(cuotas_de_pago.values()))
+        .values_list('id', 'usuario_id')
+    )
+
+    pagos, errores = {}, 0
+    for notificacion in lote:
+        notificacion.intentos += 1
+        if notificacion.cuota_id not in usuarios:
+            notificacion.estado, notificacion.error = 'error', f"La cuota {notificacion.cuota_id} no existe."
+            errores += 1
+            continue
+
+        # Llegan en orden de id: gana la última notificación del pago
+        referencia = notificacion.referencia_pago
+        cuotas_de_pago.setdefault(referencia, notificacion.cuota_id)
+        pagos[referencia] = Pago(
+            cuota_id=notificacion.cuota_id, monto=notificacion.monto,
+            estado=ESTADOS_PAGO[notificacion.estado_proveedor],
+            medio_pago=notificacion.medio_pago, referencia_externa=referencia, detalle=notificacion.payload,
+        )
+        notificacion.estado, notificacion.error, notificacion.procesada_en = 'procesada', None, ahora
+
+    if pagos:
+        Pago.objects.bulk_create(
+            pagos.values(), update_conflicts=True, unique_fields=['referencia_externa'], update_fields=['estado'],
+        )
+        cuota_ids = {cuotas_de_pago[referencia] for referencia in pagos}
+        actualizar_deuda(cuota_ids, sorted({usuarios[cuota_id] for cuota_id in cuota_ids}))
+
+    NotificacionPago.objects.bulk_update(lote, ['estado', 'error', 'procesada_en', 'intentos'])
+    return ResultadoNotificaciones(len(lote) - errores, errores)
+
+
+def _registrar_fallo(ids, error):
+    maximo = getattr(settings, 'PAGOS_NOTIFICACIONES_MAXIMO_INTENTOS', 5)
+    with transaction.atomic():
+        NotificacionPago.objects.filter(id__in=ids).update(intentos=F('intentos') + 1, error=str(error))
+        NotificacionPago.objects.filter(id__in=ids, intentos__gte=maximo).update(estado='error')
@@ -0,0 +1,98 @@
+# socios/services/pagos.py
+from decimal import Decimal
+from typing import NamedTuple
+
+from django.db import transaction
+from django.db.models import Count, QuerySet, Sum
+
+from socios.models import Cuota, Pago
+from .credenciales import indice_credenciales
+from .elegibilidad import recalcular_elegibilidad
+from .saldos import recalcular_saldos
+
+# Con más socios que esto en un lote conviene recargar el índice entero
+MAXIMO_SOCIOS_A_REFRESCAR = 50
+
+
+class LotePagos(NamedTuple):
+    pagos: int      # Pagos registrados
+    cuotas: int     # Cuotas que quedaron pagadas
+    socios: int     # Socios distintos
+    total: Decimal  # Suma de los montos
+    usuario_ids: list
+
+    @property
+    def vacio(self):
+        return self.pagos == 0
+
+
+def registrar_pagos(cuotas, medio_pago, comprobante=None):
+    """
+    Registra en una sola operación el pago del saldo de cada cuota impaga de 'cuotas'
+    (un queryset de Cuota o una lista de IDs), que pueden ser de muchos socios a la vez.
+
+    Bloquea las cuotas con select_for_update, así dos cajas no cobran la misma cuota;
+    las que ya estaban pagadas se saltean. Los pagos se escriben con un único bulk_create
+    y, como así no corren las señales de Pago, recalcula acá saldos, elegibilidad y
+    credenciales. Los totales del lote se leen de la base con una consulta agregada.
+    """
+    if not isinstance(cuotas, QuerySet):
+        cuotas = Cuota.objects.filter(id__in=list(cuotas))
+
+    with transaction.atomic():
+        # order_by('id'): todos los lotes bloquean en el mismo orden y no se cruzan
+        a_pagar = list(
+            cuotas.select_for_update().exclude(estado_pago='pagada').order_by('id')
+            .values_list('id', 'usuario_id', 'monto', 'saldo')
+        )
+        if not a_pagar:
+            return LotePagos(0, 0, 0, Decimal('0'), [])
+
+        pagos = Pago.objects.bulk_create([
+            Pago(
+                cuota_id=cuota_id, monto=saldo if saldo is not None else monto, estado='completado',
+                medio_pago=medio_pago, comprobante=comprobante,
+            )
+            for cuota_id, _, monto, saldo in a_pagar
+        ])
+
+        cuota_ids = [cuota_id for cuota_id, _, _, _ in a_pagar]
+        usuario_ids = sorted({usuario_id for _, usuario_id, _, _ in a_pagar})
+        actualizar_deuda(cuota_ids, usuario_ids)
+
+        if all(pago.pk for pago in pagos):
+            registrados = Pago.objects.filter(id__in=[pago.pk for pago in pagos])
+        else:
+            # Motores que no devuelven los IDs del INSERT: las cuotas siguen bloqueadas,
+            # así que sus pagos completados de esta transacción son los del lote
+            registrados = Pago.objects.filter(
+                cuota_id__in=cuota_ids, estado='completado', fecha__gte=min(p.fecha for p in pagos)
+            )
+        totales = registrados.order_by().aggregate(
+            pagos=Count('id'),
+            cuotas=Count('cuota_id', distinct=True),
+            socios=Count('cuota__usuario_id', distinct=True),
+            total=Sum('monto'),
+        )
+
+    return LotePagos(
+        totales['pagos'], totales['cuotas'], totales['socios'], totales['total'] or Decimal('0'), usuario_ids,
+    )
+
+
+def actualizar_deuda(cuota_ids, usuario_ids):
+    """
+    Lo que hacen las señales de Pago, para pagos escritos en lote: saldos de las cuotas,
+    elegibilidad de sus socios y, al confirmar la transacción, sus credenciales.
+    """
+    recalcular_saldos(cuota_ids)
+    recalcular_elegibilidad(usuario_ids)
+    transaction.on_commit(lambda: _refrescar_credenciales(usuario_ids))
+
+
+def _refrescar_credenciales(usuario_ids):
+    if len(usuario_ids) > MAXIMO_SOCIOS_A_REFRESCAR:
+        indice_credenciales.invalidar()
+        return
+    for usuario_id in usuario_ids:
+        indice_credenciales.actualizar_usuario(usuario_id)
@@ -0,0 +1,105 @@
+# socios/services/principales.py
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+from socios.models import Usuario, UsuarioRol
+
+CAMPOS_USUARIO = [campo.attname for campo in Usuario._meta.concrete_fields]
+
+
+class CachePrincipales:
+    """
+    Cache (local al proceso) de usuarios autenticados por JWT, con TTL corto y
+    tamaño acotado (LRU). La clave es (id de usuario, token).
+
+    Guarda los valores de la fila del Usuario y los nombres de sus roles; en cada
+    acierto arma una instancia nueva, para que los requests no compartan objetos.
+    Las señales de Usuario, UsuarioRol y Rol la invalidan.
+    """
+
+    def __init__(self, ttl=None, maximo=None):
+        self._ttl = ttl
+        self._maximo = maximo
+        self._lock = threading.Lock()
+        self._entradas = OrderedDict()  # {(usuario_id, token): (vence, valores, roles)}
+        self._por_usuario = {}  # {usuario_id: {claves}}
+
+    @property
+    def ttl(self):
+        return self._ttl if self._ttl is not None else getattr(settings, 'AUTH_PRINCIPALES_TTL_SEGUNDOS', 30)
+
+    @property
+    def maximo(self):
+        return self._maximo or getattr(settings, 'AUTH_PRINCIPALES_MAXIMO', 5000)
+
+    def obtener(self, usuario_id, token, roles=None):
+        """
+        Devuelve el Usuario (con 'nombres_roles') o lanza Usuario.DoesNotExist.
+        roles: nombres de roles ya verificados en el token; si vienen, no se consultan.
+        """
+        clave = (usuario_id, token)
+        ahora = time.monotonic()
+
+        with self._lock:
+            entrada = self._entradas.get(clave)
+            if entrada is not None:
+                vence, valores, roles = entrada
+                if vence > ahora:
+                    self._entradas.move_to_end(clave)
+                    return _armar_usuario(valores, roles)
+                self._quitar(clave)
+
+        # --- Fallo: se lee la base y se guarda ---
+        valores = Usuario.objects.filter(id=usuario_id).values_list(*CAMPOS_USUARIO).first()
+        if valores is None:
+            raise Usuario.DoesNotExist()
+        if roles is None:
+            roles = UsuarioRol.objects.filter(usuario_id=usuario_id).values_list('rol__nombre', flat=True)
+        roles = tuple(roles)
+
+        if self.ttl > 0:
+            with self._lock:
+                self._quitar(clave)
+                self._entradas[clave] = (ahora + self.ttl, valores, roles)
+                self._por_usuario.setdefault(usuario_id, set()).add(clave)
+                while len(self._entradas) > self.maximo:
+                    self._quitar(next(iter(self._entradas)))
+        return _armar_usuario(valores, roles)
+
+    def invalidar_usuario(self, usuario_id):
+        with self._lock:
+            for clave in list(self._por_usuario.get(usuario_id, ())):
+                self._quitar(clave)
+
+    def limpiar(self):
+        with self._lock:
+            self._entradas.clear()
+            self._por_usuario.clear()
+
+    def __len__(self):
+        return len(self._entradas)
+
+    def _quitar(self, clave):
+        if self._entradas.pop(clave, None) is None:
+            return
+        claves = self._por_usuario.get(clave[0])
+        if claves is not None:
+            claves.discard(clave)
+            if not claves:
+                del self._por_usuario[clave[0]]
+
+
+def _armar_usuario(valores, roles):
+    # Copia profunda: preferencias_gui es un dict que la vista puede modificar
+    usuario = Usuario.from_db(DEFAULT_DB_ALIAS, CAMPOS_USUARIO, copy.deepcopy(valores))
+    usuario.nombres_roles = list(roles)
+    return usuario
+
+
+# Instancia única por proceso
+cache_principales = CachePrincipales()
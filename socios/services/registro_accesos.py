@@ -0,0 +1,187 @@
+# socios/services/registro_accesos.py
+import atexit
+import logging
+import queue
+import threading
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+from socios.models.registro_acceso import RegistroAcceso
+from .resumen_accesos import acumular_registros
+
+logger = logging.getLogger(__name__)
+
+
+class RegistradorAccesos:
+    """
+    Cola en memoria para los RegistroAcceso del molinete.
+    Las entradas se acumulan y un hilo en segundo plano las escribe con bulk_create
+    cuando se junta un lote (REGISTRO_ACCESOS_TAMANO_LOTE) o pasa el intervalo
+    (REGISTRO_ACCESOS_INTERVALO_SEGUNDOS). Al cerrar el proceso se vacía la cola.
+
+    Cada lote escrito se suma a los resúmenes por hora y por día. Si el bulk_create de un
+    lote falla, sus registros se reintentan de a uno: solo se pierden los que fallan solos.
+    Si la cola está llena (REGISTRO_ACCESOS_CAPACIDAD) la entrada se descarta y se cuenta.
+    Con REGISTRO_ACCESOS_ASINCRONO = False se escribe en el momento, como antes.
+    """
+
+    def __init__(self, tamano_lote=None, intervalo=None, capacidad=None):
+        self.tamano_lote = tamano_lote or getattr(settings, 'REGISTRO_ACCESOS_TAMANO_LOTE', 200)
+        self.intervalo = intervalo or getattr(settings, 'REGISTRO_ACCESOS_INTERVALO_SEGUNDOS', 2)
+        capacidad = capacidad or getattr(settings, 'REGISTRO_ACCESOS_CAPACIDAD', 50000)
+
+        self._cola = queue.Queue(maxsize=capacidad)
+        self._despertar = threading.Event()
+        self._detenido = threading.Event()
+        self._lock_hilo = threading.Lock()
+        self._lock_escritura = threading.Lock()
+        self._hilo = None
+        self._atexit_registrado = False
+        self._sin_hilo = False
+
+        self.escritos = 0
+        self.descartados = 0
+        self.errores = 0
+
+    # --- API pública ---
+
+    def registrar(self, usuario_id, estado, motivo, datos_ingresados, fecha_hora=None):
+        """Encola un registro de acceso. Nunca bloquea la respuesta del molinete."""
+        registro = RegistroAcceso(
+            usuario_id=usuario_id,
+            estado=estado,
+            motivo=motivo,
+            datos_ingresados=datos_ingresados[:100],  # Un escaneo largo no debe tirar el lote
+            fecha_hora=fecha_hora or timezone.now(),
+        )
+
+        if not getattr(settings, 'REGISTRO_ACCESOS_ASINCRONO', True):
+            self._escribir([registro])
+            return
+
+        self._iniciar_hilo()
+        try:
+            self._cola.put_nowait(registro)
+        except queue.Full:
+            self.descartados += 1
+            logger.warning("Cola de registros de acceso llena: se descartó un registro.")
+            return
+
+        if self._cola.qsize() >= self.tamano_lote:
+            self._despertar.set()
+
+    def flush(self):
+        """Escribe todo lo pendiente en el hilo actual. Devuelve la cantidad escrita."""
+        total = 0
+        while True:
+            lote = self._tomar_lote()
+            if not lote:
+                return total
+            total += self._escribir(lote)
+
+    def estadisticas(self):
+        return {
+            'pendientes': self._cola.qsize(),
+            'escritos': self.escritos,
+            'descartados': self.descartados,
+            'errores': self.errores,
+            'hilo_activo': bool(self._hilo and self._hilo.is_alive()),
+        }
+
+    @contextmanager
+    def en_primer_plano(self):
+        """
+        Encola sin arrancar el hilo en segundo plano; al salir escribe lo pendiente
+        en el hilo actual. Para benchmarks que corren dentro de una transacción.
+        """
+        self._sin_hilo = True
+        try:
+            yield self
+        finally:
+            self._sin_hilo = False
+            self.flush()
+
+    def detener(self):
+        """Detiene el hilo y vacía la cola (se llama también al salir del proceso)."""
+        self._detenido.set()
+        self._despertar.set()
+        if self._hilo and self._hilo.is_alive():
+            self._hilo.join(timeout=self.intervalo * 5)
+        self.flush()
+
+    # --- Internos ---
+
+    def _iniciar_hilo(self):
+        if self._sin_hilo or (self._hilo and self._hilo.is_alive()):
+            return
+        with self._lock_hilo:
+            if self._hilo and self._hilo.is_alive():
+                return
+            self._detenido.clear()
+            self._hilo = threading.Thread(
+                target=self._bucle, name='registrador-accesos', daemon=True
+            )
+            self._hilo.start()
+            if not self._atexit_registrado:
+                atexit.register(self.detener)
+                self._atexit_registrado = True
+
+    def _bucle(self):
+        while not self._detenido.is_set():
+            self._despertar.wait(timeout=self.intervalo)
+            self._despertar.clear()
+            close_old_connections()
+            try:
+                self.flush()
+            finally:
+                close_old_connections()
+
+    def _tomar_lote(self):
+        lote = []
+        while len(lote) < self.tamano_lote:
+            try:
+                lote.append(self._cola.get_nowait())
+            except queue.Empty:
+                break
+        return lote
+
+    def _escribir(self, lote):
+        with self._lock_escritura:
+            try:
+                with transaction.atomic():
+                    RegistroAcceso.objects.bulk_create(lote, batch_size=self.tamano_lote)
+            except Exception as ex:
+                self.errores += 1
+                logger.error(f"Error guardando {len(lote)} registros de acceso, se reintentan de a uno: {ex}")
+                lote = self._escribir_de_a_uno(lote)
+            self.escritos += len(lote)
+
+            try:
+                if lote:
+                    acumular_registros(lote)
+            except Exception as ex:
+                # Los registros ya están guardados: el resumen se corrige con 'resumir_accesos'
+                logger.error(f"Error actualizando resúmenes de acceso: {ex}")
+            return len(lote)
+
+    def _escribir_de_a_uno(self, lote):
+        """Guarda cada registro en su propio savepoint. Devuelve los que se pudieron guardar."""
+        guardados = []
+        for registro in lote:
+            registro.pk = None
+            try:
+                with transaction.atomic():
+                    registro.save(force_insert=True)
+            except Exception as ex:
+                self.descartados += 1
+                logger.error(f"Se descartó un registro de acceso ({registro.datos_ingresados!r}): {ex}")
+                continue
+            guardados.append(registro)
+        return guardados
+
+
+# Instancia única por proceso
+registrador_accesos = RegistradorAccesos()
@@ -0,0 +1,136 @@
+# socios/services/resumen_accesos.py
+from collections import Counter
+from datetime import datetime, time, timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate, TruncHour
+from django.utils import timezone
+
+from socios.models.registro_acceso import RegistroAcceso, ResumenAccesoHora, ResumenAccesoDia
+from .archivo_accesos import HistorialArchivado
+
+
+def _inicio_hora(fecha_hora):
+    return timezone.localtime(fecha_hora).replace(minute=0, second=0, microsecond=0)
+
+
+def _inicio_dia(fecha):
+    return timezone.make_aware(datetime.combine(fecha, time.min))
+
+
+def _incrementar(modelo, claves, cantidad):
+    """UPDATE cantidad = cantidad + n; si la fila no existe se crea."""
+    with transaction.atomic():
+        if modelo.objects.filter(**claves).update(cantidad=F('cantidad') + cantidad):
+            return
+        try:
+            with transaction.atomic():
+                modelo.objects.create(cantidad=cantidad, **claves)
+        except IntegrityError:
+            # Otro proceso la creó entre el UPDATE y el INSERT
+            modelo.objects.filter(**claves).update(cantidad=F('cantidad') + cantidad)
+
+
+def acumular_registros(registros):
+    """
+    Suma a los resúmenes por hora y por día un lote de RegistroAcceso recién escritos.
+    Se agrupa en memoria, así que el costo depende de las combinaciones distintas
+    (hora, estado, motivo) del lote y no de la cantidad de registros.
+    """
+    por_hora = Counter()
+    por_dia = Counter()
+    for registro in registros:
+        hora = _inicio_hora(registro.fecha_hora)
+        motivo = registro.motivo or ''
+        por_hora[(hora, registro.estado, motivo)] += 1
+        por_dia[(hora.date(), registro.estado, motivo)] += 1
+
+    for (hora, estado, motivo), cantidad in por_hora.items():
+        _incrementar(ResumenAccesoHora, {'hora': hora, 'estado': estado, 'motivo': motivo}, cantidad)
+    for (fecha, estado, motivo), cantidad in por_dia.items():
+        _incrementar(ResumenAccesoDia, {'fecha': fecha, 'estado': estado, 'motivo': motivo}, cantidad)
+
+
+def reconstruir_resumenes(desde, hasta):
+    """
+    Recalcula desde RegistroAcceso (y los meses archivados) los resúmenes de los días [desde, hasta].
+    Devuelve (filas por hora, filas por día) escritas.
+    """
+    inicio, fin = _inicio_dia(desde), _inicio_dia(hasta + timedelta(days=1))
+    registros = RegistroAcceso.objects.filter(fecha_hora__gte=inicio, fecha_hora__lt=fin).order_by()
+
+    # Con motivo NULL y '' en la misma hora salen dos filas: se suman en una
+    totales_hora = Counter()
+    por_hora_bd = registros.annotate(hora=TruncHour('fecha_hora')).values('hora', 'estado', 'motivo')
+    for fila in por_hora_bd.annotate(total=Count('id')):
+        totales_hora[(fila['hora'], fila['estado'], fila['motivo'] or '')] += fila['total']
+
+    totales_dia = Counter()
+    por_dia_bd = registros.annotate(fecha=TruncDate('fecha_hora')).values('fecha', 'estado', 'motivo')
+    for fila in por_dia_bd.annotate(total=Count('id')):
+        totales_dia[(fila['fecha'], fila['estado'], fila['motivo'] or '')] += fila['total']
+
+    # Los meses archivados del rango también cuentan
+    for registro in HistorialArchivado(desde=inicio, hasta=fin).registros():
+        hora = _inicio_hora(registro.fecha_hora)
+        totales_hora[(hora, registro.estado, registro.motivo or '')] += 1
+        totales_dia[(hora.date(), registro.estado, registro.motivo or '')] += 1
+
+    por_hora = [
+        ResumenAccesoHora(hora=hora, estado=estado, motivo=motivo, cantidad=cantidad)
+        for (hora, estado, motivo), cantidad in totales_hora.items()
+    ]
+    por_dia = [
+        ResumenAccesoDia(fecha=fecha, estado=estado, motivo=motivo, cantidad=cantidad)
+        for (fecha, estado, motivo), cantidad in totales_dia.items()
+    ]
+
+    with transaction.atomic():
+        ResumenAccesoHora.objects.filter(hora__gte=inicio, hora__lt=fin).delete()
+        ResumenAccesoDia.objects.filter(fecha__gte=desde, fecha__lte=hasta).delete()
+        ResumenAccesoHora.objects.bulk_create(por_hora, batch_size=1000)
+        ResumenAccesoDia.objects.bulk_create(por_dia, batch_size=1000)
+    return len(por_hora), len(por_dia)
+
+
+def estadisticas_accesos(desde, hasta, agrupacion='dia'):
+    """
+    Datos para los gráficos del tablero, leídos solo de las tablas de resumen:
+    serie por hora o por día, motivos de denegación y hora pico de ingresos.
+    """
+    filas_hora = ResumenAccesoHora.objects.filter(
+        hora__gte=_inicio_dia(desde), hora__lt=_inicio_dia(hasta + timedelta(days=1))
+    )
+    filas_dia = ResumenAccesoDia.objects.filter(fecha__gte=desde, fecha__lte=hasta)
+
+    if agrupacion == 'hora':
+        filas_serie = filas_hora.values(periodo=F('hora'), estado_fila=F('estado'))
+    else:
+        filas_serie = filas_dia.values(periodo=F('fecha'), estado_fila=F('estado'))
+
+    series = {}
+    for fila in filas_serie.annotate(total=Sum('cantidad')).order_by('periodo'):
+        punto = series.setdefault(fila['periodo'], {'periodo': fila['periodo'], 'aprobados': 0, 'denegados': 0})
+        clave = 'aprobados' if fila['estado_fila'] == 'aprobado' else 'denegados'
+        punto[clave] += fila['total']
+
+    motivos = {
+        fila['motivo'] or 'Sin motivo': fila['total']
+        for fila in filas_dia.filter(estado='denegado').values('motivo')
+        .annotate(total=Sum('cantidad')).order_by('-total')
+    }
+
+    pico = (
+        filas_hora.filter(estado='aprobado').values('hora')
+        .annotate(total=Sum('cantidad')).order_by('-total', 'hora').first()
+    )
+
+    return {
+        'desde': desde,
+        'hasta': hasta,
+        'agrupacion': agrupacion,
+        'serie': list(series.values()),
+        'motivos_denegacion': motivos,
+        'hora_pico': {'hora': pico['hora'], 'ingresos': pico['total']} if pico else None,
+    }
@@ -0,0 +1,94 @@
+# socios/services/revocacion.py
+import threading
+import time
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import IntegrityError
+
+from socios.models import TokenRevocado
+
+ANCHO_BALDE = 3600  # Segundos de vencimiento que agrupa cada balde
+
+
+class RevocacionTokens:
+    """
+    Conjunto en memoria de 'jti' revocados, agrupados en baldes por hora de vencimiento.
+
+    - esta_revocado(jti, exp) mira un solo balde: O(1), sin consultar la base.
+    - Cuando pasa la hora de un balde, todos sus tokens ya vencieron y el balde se descarta.
+    - Las revocaciones se guardan en TokenRevocado y cada REVOCACION_SYNC_SEGUNDOS se
+      traen las nuevas, para ver las hechas desde otros procesos.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._baldes = {}  # {exp // ANCHO_BALDE: {jti}}
+        self._ultimo_id = 0
+        self._sincronizado_en = None
+
+    def revocar(self, jti, exp):
+        """
+        Revoca un token hasta su vencimiento 'exp' (timestamp).
+        Devuelve True solo si esta llamada lo revocó: la fila única de TokenRevocado decide
+        entre pedidos concurrentes (de este u otros procesos) y el resto recibe False.
+        """
+        try:
+            _, creado = TokenRevocado.objects.get_or_create(
+                jti=jti, defaults={'expira': datetime.fromtimestamp(exp, tz=dt_timezone.utc)}
+            )
+        except IntegrityError:
+            creado = False  # Otro proceso lo revocó al mismo tiempo
+        with self._lock:
+            self._agregar(jti, exp)
+        return creado
+
+    def esta_revocado(self, jti, exp):
+        self._sincronizar()
+        balde = self._baldes.get(int(exp) // ANCHO_BALDE)
+        return balde is not None and jti in balde
+
+    def limpiar(self):
+        with self._lock:
+            self._baldes.clear()
+            self._ultimo_id = 0
+            self._sincronizado_en = None
+
+    def __len__(self):
+        return sum(len(balde) for balde in self._baldes.values())
+
+    # --- Internos ---
+
+    def _agregar(self, jti, exp):
+        self._baldes.setdefault(int(exp) // ANCHO_BALDE, set()).add(jti)
+
+    def _sincronizar(self):
+        intervalo = getattr(settings, 'REVOCACION_SYNC_SEGUNDOS', 5)
+        sincronizado_en = self._sincronizado_en
+        if sincronizado_en is not None and time.monotonic() - sincronizado_en < intervalo:
+            return
+
+        with self._lock:
+            filas = list(
+                TokenRevocado.objects.filter(id__gt=self._ultimo_id)
+                .order_by('id').values_list('id', 'jti', 'expira')
+            )
+            for id_, jti, expira in filas:
+                self._agregar(jti, expira.timestamp())
+                self._ultimo_id = id_
+
+            # Los baldes cuya hora ya pasó solo tienen tokens vencidos
+            balde_actual = int(time.time()) // ANCHO_BALDE
+            vencidos = [clave for clave in self._baldes if clave < balde_actual]
+            for clave in vencidos:
+                del self._baldes[clave]
+            if vencidos:
+                TokenRevocado.objects.filter(
+                    expira__lt=datetime.fromtimestamp(balde_actual * ANCHO_BALDE, tz=dt_timezone.utc)
+                ).delete()
+
+            self._sincronizado_en = time.monotonic()
+
+
+# Instancia única por proceso
+revocacion_tokens = RevocacionTokens()
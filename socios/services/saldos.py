@@ -0,0 +1,60 @@
+# socios/services/saldos.py
+from decimal import Decimal
+
+from django.db.models import Sum
+
+from socios.models import Cuota, Pago
+
+TAMANO_LOTE = 2000
+
+
+def estado_de_pago(monto, pagado):
+    """Devuelve (estado_pago, saldo) para una cuota de 'monto' con 'pagado' en pagos completados."""
+    saldo = max(Decimal(monto) - Decimal(pagado or 0), Decimal('0'))
+    if saldo == 0:
+        return 'pagada', saldo
+    return ('parcial' if pagado else 'pendiente'), saldo
+
+
+def recalcular_saldos(cuota_ids=None):
+    """
+    Recalcula 'estado_pago' y 'saldo' de las cuotas a partir de sus pagos completados.
+    Se llama desde las señales de Pago y después de las altas masivas (bulk_create no
+    dispara señales). Sin 'cuota_ids' recorre todas las cuotas, en lotes.
+
+    Escribe con bulk_update solo las cuotas que cambiaron y devuelve cuántas fueron.
+    """
+    if cuota_ids is not None:
+        cuota_ids = [cid for cid in set(cuota_ids) if cid is not None]
+        lotes = (cuota_ids[i:i + TAMANO_LOTE] for i in range(0, len(cuota_ids), TAMANO_LOTE))
+    else:
+        lotes = _lotes_de_ids()
+
+    actualizadas = 0
+    for ids in lotes:
+        pagado = dict(
+            Pago.objects.filter(cuota_id__in=ids, estado='completado').order_by()
+            .values('cuota_id').annotate(total=Sum('monto')).values_list('cuota_id', 'total')
+        )
+        cambios = []
+        for cuota in Cuota.objects.filter(id__in=ids).order_by().only('id', 'monto', 'estado_pago', 'saldo'):
+            estado, saldo = estado_de_pago(cuota.monto, pagado.get(cuota.id))
+            if cuota.estado_pago != estado or cuota.saldo != saldo:
+                cuota.estado_pago, cuota.saldo = estado, saldo
+                cambios.append(cuota)
+        if cambios:
+            Cuota.objects.bulk_update(cambios, ['estado_pago', 'saldo'], batch_size=TAMANO_LOTE)
+            actualizadas += len(cambios)
+    return actualizadas
+
+
+def _lotes_de_ids():
+    ultimo = 0
+    while True:
+        ids = list(
+            Cuota.objects.filter(id__gt=ultimo).order_by('id').values_list('id', flat=True)[:TAMANO_LOTE]
+        )
+        if not ids:
+            return
+        yield ids
+        ultimo = ids[-1]
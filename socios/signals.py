@@ -0,0 +1,134 @@
+# socios/signals.py
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete, m2m_changed
+from django.db.models import F
+from django.dispatch import receiver
+
+from socios.models import Usuario, UsuarioRol, Rol, SocioInfo, Cuota, Pago, Evento
+from socios.services.credenciales import indice_credenciales
+from socios.services.elegibilidad import recalcular_elegibilidad
+from socios.services.eventos_proximos import eventos_proximos
+from socios.services.principales import cache_principales
+from socios.services.saldos import recalcular_saldos
+
+
+# --- Índice de credenciales y elegibilidad del molinete ---
+# La elegibilidad es una tabla y se recalcula dentro de la transacción (se revierte con ella).
+# El índice de credenciales es memoria del proceso: se refresca recién al confirmar, así
+# una transacción revertida no deja pasar a nadie por datos que nunca se guardaron.
+
+def _refrescar_credencial(usuario_id):
+    transaction.on_commit(lambda: indice_credenciales.actualizar_usuario(usuario_id))
+
+
+@receiver(post_save, sender=Usuario)
+def usuario_guardado(sender, instance, **kwargs):
+    _refrescar_credencial(instance.pk)
+
+
+@receiver(post_delete, sender=Usuario)
+def usuario_eliminado(sender, instance, **kwargs):
+    usuario_id = instance.pk
+    transaction.on_commit(lambda: indice_credenciales.quitar_usuario(usuario_id))
+
+
+@receiver(post_save, sender=SocioInfo)
+def socio_info_guardado(sender, instance, **kwargs):
+    recalcular_elegibilidad([instance.usuario_id])
+    _refrescar_credencial(instance.usuario_id)
+
+
+@receiver(post_delete, sender=SocioInfo)
+def socio_info_eliminado(sender, instance, **kwargs):
+    _refrescar_credencial(instance.usuario_id)
+
+
+def _deuda_modificada(usuario_id, creado_o_editado):
+    # En los borrados solo se actualizan filas existentes: el socio
+    # puede estar eliminándose en cascada dentro de la misma operación.
+    recalcular_elegibilidad([usuario_id], crear=creado_o_editado)
+    _refrescar_credencial(usuario_id)
+
+
+@receiver(post_save, sender=Cuota)
+def cuota_guardada(sender, instance, created, **kwargs):
+    if not created:
+        recalcular_saldos([instance.pk])  # Pudo cambiar el monto
+    _deuda_modificada(instance.usuario_id, True)
+
+
+@receiver(post_delete, sender=Cuota)
+def cuota_eliminada(sender, instance, **kwargs):
+    _deuda_modificada(instance.usuario_id, False)
+
+
+@receiver(post_save, sender=Pago)
+def pago_guardado(sender, instance, **kwargs):
+    # Alta, cambio de estado o reembolso: primero el estado de la cuota, del que sale la deuda
+    recalcular_saldos([instance.cuota_id])
+    usuario_id = Cuota.objects.filter(pk=instance.cuota_id).values_list('usuario_id', flat=True).first()
+    _deuda_modificada(usuario_id, True)
+
+
+@receiver(post_delete, sender=Pago)
+def pago_eliminado(sender, instance, **kwargs):
+    recalcular_saldos([instance.cuota_id])
+    usuario_id = Cuota.objects.filter(pk=instance.cuota_id).values_list('usuario_id', flat=True).first()
+    _deuda_modificada(usuario_id, False)
+
+
+# --- Próximos eventos para el saludo del molinete ---
+
+@receiver(post_save, sender=Evento)
+@receiver(post_delete, sender=Evento)
+def evento_modificado(sender, instance, **kwargs):
+    eventos_proximos.invalidar()
+
+
+# --- Cache de usuarios autenticados (JWT) ---
+
+@receiver(post_save, sender=Usuario)
+@receiver(post_delete, sender=Usuario)
+def usuario_modificado_auth(sender, instance, **kwargs):
+    cache_principales.invalidar_usuario(instance.pk)
+
+
+def _roles_modificados(usuario_ids):
+    # UPDATE directo: no dispara post_save de Usuario
+    Usuario.objects.filter(pk__in=usuario_ids).update(roles_version=F('roles_version') + 1)
+    for usuario_id in usuario_ids:
+        cache_principales.invalidar_usuario(usuario_id)
+
+
+@receiver(post_save, sender=UsuarioRol)
+@receiver(post_delete, sender=UsuarioRol)
+def usuario_rol_modificado(sender, instance, **kwargs):
+    _roles_modificados([instance.usuario_id])
+
+
+@receiver(m2m_changed, sender=UsuarioRol)
+def roles_de_usuario_modificados(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if action != 'post_clear' and not pk_set:
+        return  # set() sin cambios
+    if not reverse:
+        _roles_modificados([instance.pk])
+    elif pk_set:
+        _roles_modificados(list(pk_set))
+    else:
+        # rol.usuarios.clear(): ya no se sabe a quiénes afectó
+        cache_principales.limpiar()
+
+
+@receiver(post_save, sender=Rol)
+def rol_modificado(sender, instance, created, **kwargs):
+    # Renombrar un rol cambia los roles que figuran en los tokens de sus usuarios
+    if not created:
+        _roles_modificados(list(UsuarioRol.objects.filter(rol=instance).values_list('usuario_id', flat=True)))
+    cache_principales.limpiar()
+
+
+@receiver(post_delete, sender=Rol)
+def rol_eliminado(sender, instance, **kwargs):
+    cache_principales.limpiar()
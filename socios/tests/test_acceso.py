@@ -0,0 +1,414 @@
+# socios/tests/test_acceso.py
+
+from rest_framework.test import APITestCase, APIRequestFactory, force_authenticate
+from django.db import connection, transaction
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+import tempfile
+from datetime import datetime, timedelta
+from io import StringIO
+from django.contrib.auth.hashers import make_password
+from socios.models import Usuario, SocioInfo, NivelSocio, Cuota, Pago, ElegibilidadAcceso, Evento
+from socios.models.disciplina import Disciplina, Categoria
+from socios.models.registro_acceso import RegistroAcceso, ResumenAccesoHora, ResumenAccesoDia, ArchivoRegistroAcceso
+from socios.services.credenciales import indice_credenciales
+from socios.services.eventos_proximos import eventos_proximos
+from socios.services.registro_accesos import RegistradorAccesos
+from socios.services.elegibilidad import actualizar_elegibilidad_vencida
+from socios.views.acceso import validar_acceso, validar_accesos_lote, HistorialAccesoView, EstadisticasAccesoView
+from django.core.management import call_command
+from django.core.management.base import CommandError
+
+
+@override_settings(REGISTRO_ACCESOS_ASINCRONO=False)
+class ControlAccesoTestCase(APITestCase):
+    """Tests del molinete (validar_acceso) y su índice de credenciales"""
+
+    def setUp(self):
+        indice_credenciales.invalidar()
+        eventos_proximos.invalidar()
+        self.factory = APIRequestFactory()
+
+        self.portero = Usuario.objects.create(
+            email='portero@test.com', nombre='Portero', apellido='Club',
+            contrasena=make_password('123')
+        )
+        self.nivel_1, _ = NivelSocio.objects.get_or_create(nivel=1, defaults={'descuento': 0})
+        self.socio = Usuario.objects.create(
+            email='socio@test.com', nombre='Juan', apellido='Pérez',
+            nro_documento='12345678', contrasena=make_password('123')
+        )
+        self.socio_info = SocioInfo.objects.create(usuario=self.socio, nivel_socio=self.nivel_1, estado='activo')
+
+    def tearDown(self):
+        indice_credenciales.invalidar()
+        eventos_proximos.invalidar()
+
+    def _escanear(self, codigo):
+        request = self.factory.post('/socios/api/control-acceso/', {'qr_data': codigo}, format='json')
+        force_authenticate(request, user=self.portero)
+        return validar_acceso(request)
+
+    def test_acceso_aprobado_por_qr_dni_e_id(self):
+        for codigo in (str(self.socio.qr_token), '12345678', str(self.socio.id)):
+            response = self._escanear(codigo)
+            self.assertEqual(response.data['estado'], 'aprobado')
+            self.assertEqual(response.data['socio'], 'Juan Pérez')
+
+    def test_acceso_aprobado_no_consulta_usuarios_ni_cuotas(self):
+        self._escanear('12345678')  # Carga inicial del índice
+
+        with CaptureQueriesContext(connection) as consultas:
+            response = self._escanear(str(self.socio.qr_token))
+
+        self.assertEqual(response.data['estado'], 'aprobado')
+        tablas_leidas = [q['sql'] for q in consultas.captured_queries if q['sql'].startswith('SELECT')]
+        for sql in tablas_leidas:
+            self.assertNotIn('socios_usuario', sql)
+            self.assertNotIn('socios_cuota', sql)
+
+    def test_indice_se_actualiza_con_cuotas_y_pagos(self):
+        self.assertEqual(self._escanear('12345678').data['estado'], 'aprobado')
+
+        # El índice se refresca al confirmar la transacción
+        with self.captureOnCommitCallbacks(execute=True):
+            cuota = Cuota.objects.create(
+                usuario=self.socio, periodo='2024-09', monto=15000,
+                vencimiento=(timezone.now() - timedelta(days=10)).date()
+            )
+        response = self._escanear('12345678')
+        self.assertEqual(response.data['estado'], 'denegado')
+        self.assertEqual(response.data['motivo'], 'deuda')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Pago.objects.create(cuota=cuota, monto=15000, estado='completado', medio_pago='efectivo')
+        self.assertEqual(self._escanear('12345678').data['estado'], 'aprobado')
+
+    def test_indice_se_actualiza_con_estado_del_socio(self):
+        self.assertEqual(self._escanear('12345678').data['estado'], 'aprobado')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.socio_info.estado = 'inactivo'
+            self.socio_info.save()
+
+        response = self._escanear('12345678')
+        self.assertEqual(response.data['estado'], 'denegado')
+        self.assertEqual(response.data['motivo'], 'inactivo')
+
+    def test_indice_no_ve_cambios_de_una_transaccion_revertida(self):
+        self.socio_info.estado = 'inactivo'
+        self.socio_info.save()
+        indice_credenciales.invalidar()
+        self.assertEqual(self._escanear('12345678').data['motivo'], 'inactivo')
+
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            try:
+                with transaction.atomic():
+                    self.socio_info.estado = 'activo'
+                    self.socio_info.save()
+                    self.socio.nro_documento = '87654321'
+                    self.socio.save()
+                    raise RuntimeError('se revierte')
+            except RuntimeError:
+                pass
+
+        self.assertEqual(callbacks, [])
+        self.assertEqual(self._escanear('12345678').data['motivo'], 'inactivo')
+        self.assertEqual(self._escanear('87654321').data['motivo'], 'error')
+
+    def test_codigo_desconocido_y_no_socio(self):
+        self.assertEqual(self._escanear('99999999').data['motivo'], 'error')
+        self.assertEqual(self._escanear(str(self.portero.qr_token)).data['motivo'], 'no_socio')
+
+    def test_escaneo_queda_registrado(self):
+        self._escanear('12345678')
+        registro = RegistroAcceso.objects.get()
+        self.assertEqual(registro.usuario, self.socio)
+        self.assertEqual(registro.estado, 'aprobado')
+
+    def test_elegibilidad_se_mantiene_con_cuotas_pagos_y_cambio_de_dia(self):
+        hoy = timezone.now().date()
+        cuota_vencida = Cuota.objects.create(
+            usuario=self.socio, periodo='2024-09', monto=15000, vencimiento=hoy - timedelta(days=10)
+        )
+        Cuota.objects.create(usuario=self.socio, periodo='2024-10', monto=15000, vencimiento=hoy)
+
+        fila = ElegibilidadAcceso.objects.get(socio=self.socio_info)
+        self.assertTrue(fila.socio_activo)
+        self.assertEqual(fila.cuotas_vencidas, 1)
+        self.assertEqual(fila.vencimiento_mas_antiguo, hoy - timedelta(days=10))
+        self.assertEqual(fila.proximo_vencimiento, hoy)
+
+        Pago.objects.create(cuota=cuota_vencida, monto=15000, estado='completado', medio_pago='efectivo')
+        fila.refresh_from_db()
+        self.assertEqual(fila.cuotas_vencidas, 0)
+
+        # Al día siguiente vence la segunda cuota: la fila deja de estar vigente y se recalcula
+        manana = hoy + timedelta(days=1)
+        self.assertFalse(fila.vigente(manana))
+        self.assertEqual(actualizar_elegibilidad_vencida(hoy=manana), 1)
+        fila.refresh_from_db()
+        self.assertEqual(fila.cuotas_vencidas, 1)
+        self.assertIsNone(fila.proximo_vencimiento)
+
+    def test_saludo_con_proximo_evento_de_la_categoria_sin_consultar_eventos(self):
+        disciplina = Disciplina.objects.create(nombre='Fútbol')
+        categoria = Categoria.objects.create(
+            disciplina=disciplina, nombre_categoria='Primera', edad_minima=18, edad_maxima=40, sexo='masculino'
+        )
+        otra = Categoria.objects.create(
+            disciplina=disciplina, nombre_categoria='Reserva', edad_minima=18, edad_maxima=40, sexo='masculino'
+        )
+        self.socio_info.categoria = categoria
+        self.socio_info.save()
+
+        def crear_evento(titulo, dias, cat):
+            inicio = timezone.now() + timedelta(days=dias)
+            return Evento.objects.create(
+                tipo='partido', titulo=titulo, fecha_inicio=inicio, fecha_fin=inicio + timedelta(hours=2),
+                lugar='Cancha', organizador=self.portero, categoria=cat
+            )
+
+        crear_evento('Partido de Reserva', 1, otra)
+        crear_evento('Partido de Primera', 3, categoria)
+        self.assertIn('Partido de Primera', self._escanear('12345678').data['texto_tts'])
+
+        with CaptureQueriesContext(connection) as consultas:
+            self._escanear('12345678')
+        self.assertFalse([q for q in consultas.captured_queries if 'socios_evento' in q['sql']])
+
+        # Un evento general más cercano invalida la cache y pasa a ser el saludo
+        crear_evento('Asamblea', 2, None)
+        self.assertIn('Asamblea', self._escanear('12345678').data['texto_tts'])
+
+    def test_lote_sin_conexion_evalua_deuda_a_la_fecha_del_escaneo(self):
+        hoy = timezone.now().date()
+        Cuota.objects.create(usuario=self.socio, periodo='2024-09', monto=15000, vencimiento=hoy - timedelta(days=10))
+        antes = (timezone.now() - timedelta(days=15)).replace(microsecond=0)
+        despues = (timezone.now() - timedelta(days=5)).replace(microsecond=0)
+
+        request = self.factory.post('/socios/api/control-acceso/lote/', {'escaneos': [
+            {'qr_data': '12345678', 'fecha_hora': antes.isoformat()},
+            {'qr_data': str(self.socio.qr_token), 'fecha_hora': despues.isoformat()},
+            ['99999999', despues.isoformat()],
+            {'qr_data': '12345678', 'fecha_hora': 'ayer'},
+        ]}, format='json')
+        force_authenticate(request, user=self.portero)
+        response = validar_accesos_lote(request)
+
+        self.assertEqual(response.data['procesados'], 4)
+        self.assertEqual(response.data['aprobados'], 1)
+        self.assertEqual(response.data['denegados'], 2)
+        self.assertEqual(response.data['invalidos'], 1)
+        motivos = [r.get('motivo') for r in response.data['resultados']]
+        self.assertEqual(motivos, ['ok', 'deuda', 'error', None])
+
+        # Se registran los escaneos válidos con la hora original
+        self.assertEqual(RegistroAcceso.objects.count(), 3)
+        self.assertEqual(RegistroAcceso.objects.get(fecha_hora=antes).estado, 'aprobado')
+        self.assertEqual(RegistroAcceso.objects.get(fecha_hora=despues, usuario=self.socio).estado, 'denegado')
+
+    def test_lote_con_fecha_imposible_la_marca_invalida(self):
+        ahora = timezone.now().replace(microsecond=0).isoformat()
+        request = self.factory.post('/socios/api/control-acceso/lote/', {'escaneos': [
+            ['12345678', '2025-02-30T10:00:00'],
+            ['12345678', ahora],
+        ]}, format='json')
+        force_authenticate(request, user=self.portero)
+        response = validar_accesos_lote(request)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['invalidos'], 1)
+        self.assertEqual(response.data['aprobados'], 1)
+        self.assertEqual(RegistroAcceso.objects.count(), 1)
+
+    @override_settings(CONTROL_ACCESO_LOTE_MAXIMO=1)
+    def test_lote_rechaza_exceso_de_escaneos(self):
+        ahora = timezone.now().isoformat()
+        request = self.factory.post('/socios/api/control-acceso/lote/', {'escaneos': [
+            ['12345678', ahora], ['12345678', ahora],
+        ]}, format='json')
+        force_authenticate(request, user=self.portero)
+        self.assertEqual(validar_accesos_lote(request).status_code, 400)
+        self.assertEqual(RegistroAcceso.objects.count(), 0)
+
+
+class HistorialAccesoTestCase(APITestCase):
+    """Tests del historial paginado por cursor"""
+
+    def setUp(self):
+        self.factory = APIRequestFactory()
+        self.portero = Usuario.objects.create(
+            email='portero@test.com', nombre='Portero', apellido='Club', contrasena=make_password('123')
+        )
+        self.socio = Usuario.objects.create(
+            email='socio@test.com', nombre='Juan', apellido='Pérez', contrasena=make_password('123')
+        )
+        self.base = timezone.now().replace(microsecond=0) - timedelta(days=10)
+        RegistroAcceso.objects.bulk_create([
+            RegistroAcceso(
+                usuario=self.socio if i % 2 else None,
+                fecha_hora=self.base + timedelta(days=i),
+                estado='aprobado' if i % 2 else 'denegado',
+                datos_ingresados=str(i),
+            )
+            for i in range(5)
+        ])
+
+    def _listar(self, url):
+        request = self.factory.get(url)
+        force_authenticate(request, user=self.portero)
+        return HistorialAccesoView.as_view()(request)
+
+    def test_recorre_paginas_por_cursor_sin_n_mas_uno(self):
+        with CaptureQueriesContext(connection) as consultas:
+            response = self._listar('/socios/api/control-acceso/historial/?page_size=2')
+        # Una consulta para la página (con el usuario en JOIN) y otra al catálogo de meses archivados
+        self.assertEqual(len(consultas.captured_queries), 2)
+
+        vistos = []
+        while True:
+            vistos += [r['datos_ingresados'] for r in response.data['results']]
+            if not response.data['next']:
+                break
+            response = self._listar(response.data['next'])
+
+        self.assertEqual(vistos, ['4', '3', '2', '1', '0'])
+
+    def test_filtros_por_rango_estado_y_usuario(self):
+        desde = (self.base + timedelta(days=1)).date().isoformat()
+        hasta = (self.base + timedelta(days=3)).date().isoformat()
+        response = self._listar(f'/socios/api/control-acceso/historial/?desde={desde}&hasta={hasta}')
+        self.assertEqual([r['datos_ingresados'] for r in response.data['results']], ['3', '2', '1'])
+
+        response = self._listar(f'/socios/api/control-acceso/historial/?estado=aprobado&usuario={self.socio.id}')
+        self.assertEqual([r['nombre_usuario'] for r in response.data['results']], ['Juan Pérez'] * 2)
+
+        self.assertEqual(self._listar('/socios/api/control-acceso/historial/?desde=ayer').status_code, 400)
+
+    def test_fecha_inexistente_responde_400(self):
+        for parametro in ('desde', 'hasta'):
+            response = self._listar(f'/socios/api/control-acceso/historial/?{parametro}=2025-02-30')
+            self.assertEqual(response.status_code, 400)
+            self.assertIn(parametro, response.data)
+
+    def test_archiva_meses_viejos_y_el_historial_los_sigue_mostrando(self):
+        hoy = timezone.localdate()
+        viejos = []
+        for meses_atras in (5, 4):
+            anio, mes = hoy.year, hoy.month - meses_atras
+            if mes < 1:
+                anio, mes = anio - 1, mes + 12
+            momento = timezone.make_aware(datetime(anio, mes, 10, 18, 0))
+            viejos += [momento, momento + timedelta(hours=1)]
+        RegistroAcceso.objects.bulk_create([
+            RegistroAcceso(usuario=self.socio, fecha_hora=momento, estado='aprobado', datos_ingresados=f'viejo-{i}')
+            for i, momento in enumerate(viejos)
+        ])
+
+        with tempfile.TemporaryDirectory() as directorio, override_settings(REGISTRO_ACCESOS_ARCHIVO_DIR=directorio):
+            call_command('archivar_accesos', meses=3, stdout=StringIO())
+            self.assertEqual(ArchivoRegistroAcceso.objects.count(), 2)
+            self.assertEqual(RegistroAcceso.objects.filter(datos_ingresados__startswith='viejo').count(), 0)
+
+            # Recorrido completo: tabla y archivos intercalados en orden
+            response = self._listar('/socios/api/control-acceso/historial/?page_size=3')
+            vistos = []
+            while True:
+                vistos += [r['datos_ingresados'] for r in response.data['results']]
+                if not response.data['next']:
+                    break
+                response = self._listar(response.data['next'])
+            self.assertEqual(vistos, ['4', '3', '2', '1', '0', 'viejo-3', 'viejo-2', 'viejo-1', 'viejo-0'])
+
+            # Un rango dentro de un mes archivado solo lee ese mes
+            fecha = viejos[0].date().isoformat()
+            response = self._listar(f'/socios/api/control-acceso/historial/?desde={fecha}&hasta={fecha}')
+            self.assertEqual([r['datos_ingresados'] for r in response.data['results']], ['viejo-1', 'viejo-0'])
+            self.assertEqual(response.data['results'][0]['nombre_usuario'], 'Juan Pérez')
+
+
+class BenchmarkAccesoTestCase(APITestCase):
+    """El benchmark del molinete corre e informa, sin dejar datos"""
+
+    def test_benchmark_informa_y_revierte_los_datos(self):
+        salida = StringIO()
+        call_command('benchmark_acceso', socios=20, escaneos=60, meses=3, calentamiento=5, stdout=salida)
+
+        self.assertIn('escaneos/s', salida.getvalue())
+        self.assertIn('p99=', salida.getvalue())
+        self.assertEqual(Usuario.objects.count(), 0)
+        self.assertEqual(RegistroAcceso.objects.count(), 0)
+
+        with self.assertRaises(CommandError):
+            call_command('benchmark_acceso', socios=20, escaneos=20, max_consultas=0, stdout=StringIO())
+
+
+@override_settings(REGISTRO_ACCESOS_ASINCRONO=True)
+class RegistradorAccesosTestCase(APITestCase):
+    """Tests de la cola de registros de acceso"""
+
+    def test_encola_escribe_en_lote_y_cuenta_descartados(self):
+        registrador = RegistradorAccesos(tamano_lote=10, intervalo=3600, capacidad=3)
+        momento = timezone.now() - timedelta(minutes=5)
+        try:
+            for i in range(4):
+                registrador.registrar(None, 'denegado', 'Usuario no encontrado', f'codigo-{i}', fecha_hora=momento)
+
+            self.assertEqual(RegistroAcceso.objects.count(), 0)
+            self.assertEqual(registrador.estadisticas()['pendientes'], 3)
+            self.assertEqual(registrador.estadisticas()['descartados'], 1)
+
+            self.assertEqual(registrador.flush(), 3)
+        finally:
+            registrador.detener()
+
+        self.assertEqual(RegistroAcceso.objects.count(), 3)
+        self.assertEqual(RegistroAcceso.objects.filter(fecha_hora=momento).count(), 3)
+        self.assertEqual(registrador.estadisticas()['pendientes'], 0)
+
+
+@override_settings(REGISTRO_ACCESOS_ASINCRONO=False)
+class ResumenAccesosTestCase(APITestCase):
+    """Tests de los resúmenes por hora/día y del tablero"""
+
+    def setUp(self):
+        self.factory = APIRequestFactory()
+        self.portero = Usuario.objects.create(
+            email='portero@test.com', nombre='Portero', apellido='Club', contrasena=make_password('123')
+        )
+        self.dia = timezone.now().replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=1)
+        self.registrador = RegistradorAccesos()
+        for hora, estado, motivo in [
+            (18, 'aprobado', 'Cuota al día'), (18, 'aprobado', 'Cuota al día'), (18, 'denegado', 'Deuda de cuotas'),
+            (19, 'aprobado', 'Cuota al día'), (19, 'denegado', 'Usuario no encontrado'),
+        ]:
+            self.registrador.registrar(None, estado, motivo, 'x', fecha_hora=self.dia + timedelta(hours=hora))
+
+    def test_resumenes_incrementales_y_reconstruccion(self):
+        self.assertEqual(ResumenAccesoHora.objects.get(hora=self.dia + timedelta(hours=18), estado='aprobado').cantidad, 2)
+        self.assertEqual(ResumenAccesoDia.objects.get(fecha=self.dia.date(), estado='aprobado').cantidad, 3)
+
+        esperado = sorted(ResumenAccesoHora.objects.values_list('hora', 'estado', 'motivo', 'cantidad'))
+        ResumenAccesoHora.objects.all().delete()
+        ResumenAccesoDia.objects.all().delete()
+        call_command('resumir_accesos', desde=self.dia.date().isoformat(), hasta=self.dia.date().isoformat(), stdout=StringIO())
+        self.assertEqual(sorted(ResumenAccesoHora.objects.values_list('hora', 'estado', 'motivo', 'cantidad')), esperado)
+        self.assertEqual(ResumenAccesoDia.objects.filter(fecha=self.dia.date(), estado='denegado').count(), 2)
+        self.assertEqual(ResumenAccesoDia.objects.get(fecha=self.dia.date(), estado='aprobado').cantidad, 3)
+
+    def test_tablero_lee_solo_resumenes(self):
+        fecha = self.dia.date().isoformat()
+        request = self.factory.get(f'/socios/api/control-acceso/estadisticas/?desde={fecha}&hasta={fecha}&agrupacion=hora')
+        force_authenticate(request, user=self.portero)
+
+        with CaptureQueriesContext(connection) as consultas:
+            response = EstadisticasAccesoView.as_view()(request)
+        self.assertFalse([q for q in consultas.captured_queries if 'socios_registroacceso' in q['sql']])
+
+        self.assertEqual(
+            [(p['aprobados'], p['denegados']) for p in response.data['serie']], [(2, 1), (1, 1)]
+        )
+        self.assertEqual(response.data['motivos_denegacion'], {'Deuda de cuotas': 1, 'Usuario no encontrado': 1})
+        self.assertEqual(response.data['hora_pico'], {'hora': self.dia + timedelta(hours=18), 'ingresos': 2})
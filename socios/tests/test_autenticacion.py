@@ -1,10 +1,18 @@
 from rest_framework.test import APITestCase
 from rest_framework import status
-from socios.models import Usuario
-from django.contrib.auth.hashers import make_password
+from socios.models import Usuario, UsuarioRol, Rol, TokenRevocado
+from socios.services.principales import CachePrincipales, cache_principales
+from socios.services.contrasenas import PoolContrasenas
+from socios.services.revocacion import revocacion_tokens
+from socios.throttling import CubetasEnMemoria, reiniciar_cubetas_login
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.contrib.auth.hashers import make_password, check_password
+from django.test import override_settings
 import jwt
+import time
 from django.conf import settings
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone as dt_timezone
 
 class LoginViewTest(APITestCase):
     
@@ -13,6 +21,7 @@ class LoginViewTest(APITestCase):
         ARRANGE: Preparar datos de prueba
         Se ejecuta ANTES de cada test
         """
+        reiniciar_cubetas_login()
         # Crear un usuario de prueba con contraseña hasheada
         self.usuario = Usuario.objects.create(
             tipo_documento='DNI',
@@ -254,4 +263,334 @@ class JWTAuthenticationTest(APITestCase):
         response = self.client.get(self.protected_url)
         
         # Debería fallar
-        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
\ No newline at end of file
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+class CachePrincipalesTest(APITestCase):
+    """Cache de usuario y roles por token en JWTAuthentication"""
+
+    def setUp(self):
+        cache_principales.limpiar()
+        reiniciar_cubetas_login()
+        self.rol_admin, _ = Rol.objects.get_or_create(nombre='admin', defaults={'descripcion': 'Administrador'})
+        self.usuario = Usuario.objects.create(
+            email='cache@test.com', contrasena=make_password('pass'), nombre='Cache', apellido='User'
+        )
+        self.token = jwt.encode(
+            {'id': self.usuario.id, 'email': self.usuario.email, 'exp': datetime.utcnow() + timedelta(hours=2)},
+            settings.SECRET_KEY,
+            algorithm='HS256'
+        )
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.token}')
+        # Endpoint que exige el rol admin (RolePermission)
+        self.url_admin = '/socios/api/control-acceso/registro/estado/'
+
+    def tearDown(self):
+        cache_principales.limpiar()
+
+    def test_requests_repetidos_no_consultan_usuario_ni_roles(self):
+        UsuarioRol.objects.create(usuario=self.usuario, rol=self.rol_admin)
+        self.assertEqual(self.client.get(self.url_admin).status_code, status.HTTP_200_OK)
+
+        with CaptureQueriesContext(connection) as consultas:
+            response = self.client.get(self.url_admin)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(consultas.captured_queries), 0)
+
+    def test_cambios_de_roles_y_usuario_invalidan_la_cache(self):
+        self.assertEqual(self.client.get(self.url_admin).status_code, status.HTTP_403_FORBIDDEN)
+
+        UsuarioRol.objects.create(usuario=self.usuario, rol=self.rol_admin)
+        self.assertEqual(self.client.get(self.url_admin).status_code, status.HTTP_200_OK)
+
+        self.usuario.roles.clear()
+        self.assertEqual(self.client.get(self.url_admin).status_code, status.HTTP_403_FORBIDDEN)
+
+        self.usuario.delete()
+        self.assertEqual(self.client.get(self.url_admin).status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_lru_acotada(self):
+        cache = CachePrincipales(ttl=60, maximo=2)
+        otros = [
+            Usuario.objects.create(email=f'lru{i}@test.com', contrasena='x', nombre='L', apellido=str(i))
+            for i in range(3)
+        ]
+        for usuario in otros:
+            cache.obtener(usuario.id, f'token-{usuario.id}')
+        self.assertEqual(len(cache), 2)
+
+        # El más viejo salió de la cache: vuelve a consultar
+        with CaptureQueriesContext(connection) as consultas:
+            cache.obtener(otros[0].id, f'token-{otros[0].id}')
+        self.assertEqual(len(consultas.captured_queries), 2)
+
+
+class RolesEnTokenTest(APITestCase):
+    """Roles tomados del token firmado, con versión de roles en Usuario"""
+
+    def setUp(self):
+        cache_principales.limpiar()
+        self.rol_admin, _ = Rol.objects.get_or_create(nombre='admin', defaults={'descripcion': 'Administrador'})
+        self.rol_socio, _ = Rol.objects.get_or_create(nombre='socio', defaults={'descripcion': 'Socio del club'})
+        self.usuario = Usuario.objects.create(
+            email='roles@test.com', contrasena=make_password('pass'), nombre='Roles', apellido='User'
+        )
+        UsuarioRol.objects.create(usuario=self.usuario, rol=self.rol_admin)
+        self.url_admin = '/socios/api/control-acceso/registro/estado/'
+
+    def tearDown(self):
+        cache_principales.limpiar()
+
+    def _login(self):
+        response = self.client.post('/socios/login/', {'email': 'roles@test.com', 'contrasena': 'pass'})
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {response.data['token']}")
+        return jwt.decode(response.data['token'], settings.SECRET_KEY, algorithms=['HS256'])
+
+    def test_permisos_con_roles_del_token_sin_consultar_roles(self):
+        payload = self._login()
+        self.assertEqual(payload['roles'], ['admin'])
+        self.assertEqual(payload['rv'], self.usuario.roles_version + 1)  # Se incrementó al asignar 'admin'
+
+        with CaptureQueriesContext(connection) as consultas:
+            response = self.client.get(self.url_admin)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse([q for q in consultas.captured_queries if 'socios_usuariorol' in q['sql']])
+
+    def test_token_con_roles_desactualizados_es_rechazado(self):
+        self._login()
+        self.assertEqual(self.client.get(self.url_admin).status_code, status.HTTP_200_OK)
+
+        UsuarioRol.objects.filter(usuario=self.usuario, rol=self.rol_admin).delete()
+        response = self.client.get(self.url_admin)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        # Un login nuevo trae los roles vigentes
+        self.assertEqual(self._login()['roles'], [])
+        self.assertEqual(self.client.get(self.url_admin).status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_roles_set_sin_cambios_no_invalida_tokens(self):
+        self._login()
+        self.usuario.roles.set([self.rol_admin])
+        self.assertEqual(self.client.get(self.url_admin).status_code, status.HTTP_200_OK)
+
+        self.usuario.roles.add(self.rol_socio)
+        self.assertEqual(self.client.get(self.url_admin).status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class ContrasenasTest(APITestCase):
+    """Hashing en el pool de procesos y re-hash al iniciar sesión"""
+
+    def setUp(self):
+        reiniciar_cubetas_login()
+
+    def test_pool_compatible_con_hashers_de_django(self):
+        pool = PoolContrasenas(workers=1)
+        try:
+            codificado = pool.hashear('secreta')
+            self.assertTrue(check_password('secreta', codificado))
+            self.assertEqual(pool.verificar('secreta', make_password('secreta')), (True, False))
+            self.assertEqual(pool.verificar('otra', codificado), (False, False))
+        finally:
+            pool.cerrar()
+
+    def test_login_rehashea_si_cambio_el_costo(self):
+        with override_settings(CONTRASENAS_ITERACIONES=1000):
+            usuario = Usuario.objects.create(
+                email='rehash@test.com', nombre='Re', apellido='Hash', contrasena=make_password('pass')
+            )
+        self.assertTrue(usuario.contrasena.startswith('pbkdf2_sha256$1000$'))
+
+        with override_settings(CONTRASENAS_ITERACIONES=2000):
+            response = self.client.post('/socios/login/', {'email': 'rehash@test.com', 'contrasena': 'pass'})
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        usuario.refresh_from_db()
+        self.assertTrue(usuario.contrasena.startswith('pbkdf2_sha256$2000$'))
+        self.assertTrue(check_password('pass', usuario.contrasena))
+
+
+class RefreshTokenTest(APITestCase):
+    """Tokens de acceso cortos, refresh token con rotación y logout"""
+
+    def setUp(self):
+        cache_principales.limpiar()
+        revocacion_tokens.limpiar()
+        reiniciar_cubetas_login()
+        self.usuario = Usuario.objects.create(
+            email='refresh@test.com', contrasena=make_password('pass'), nombre='Refresh', apellido='User'
+        )
+        self.url_refresh = '/socios/auth/refresh/'
+        self.url_logout = '/socios/auth/logout/'
+        self.url_me = '/socios/api/v1/usuarios/me/'
+
+    def tearDown(self):
+        cache_principales.limpiar()
+        revocacion_tokens.limpiar()
+
+    def _login(self):
+        response = self.client.post('/socios/login/', {'email': 'refresh@test.com', 'contrasena': 'pass'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def test_login_devuelve_token_de_acceso_y_refresh(self):
+        datos = self._login()
+        acceso = jwt.decode(datos['token'], settings.SECRET_KEY, algorithms=['HS256'])
+        refresh = jwt.decode(datos['refresh'], settings.SECRET_KEY, algorithms=['HS256'])
+
+        self.assertEqual(acceso['typ'], 'access')
+        self.assertEqual(refresh['typ'], 'refresh')
+        self.assertNotEqual(acceso['jti'], refresh['jti'])
+        self.assertLess(acceso['exp'], refresh['exp'])
+
+    def test_refresh_emite_tokens_nuevos_y_rota(self):
+        datos = self._login()
+
+        response = self.client.post(self.url_refresh, {'refresh': datos['refresh']}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('token', response.data)
+        self.assertNotEqual(response.data['refresh'], datos['refresh'])
+
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {response.data['token']}")
+        self.assertEqual(self.client.get(self.url_me).status_code, status.HTTP_200_OK)
+
+        # El refresh token usado ya no sirve
+        self.client.credentials()
+        response = self.client.post(self.url_refresh, {'refresh': datos['refresh']}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_refresh_simultaneo_solo_rota_una_vez(self):
+        datos = self._login()
+        payload = jwt.decode(datos['refresh'], settings.SECRET_KEY, algorithms=['HS256'])
+
+        # Otro proceso ganó la carrera: ya revocó el token, pero este todavía no lo sincronizó
+        with override_settings(REVOCACION_SYNC_SEGUNDOS=3600):
+            self.assertFalse(revocacion_tokens.esta_revocado(payload['jti'], payload['exp']))
+            TokenRevocado.objects.create(
+                jti=payload['jti'], expira=datetime.fromtimestamp(payload['exp'], tz=dt_timezone.utc)
+            )
+            response = self.client.post(self.url_refresh, {'refresh': datos['refresh']}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertNotIn('token', response.data)
+
+    def test_refresh_rechaza_token_de_acceso_y_expirado(self):
+        datos = self._login()
+        response = self.client.post(self.url_refresh, {'refresh': datos['token']}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        vencido = jwt.encode(
+            {'id': self.usuario.id, 'typ': 'refresh', 'jti': 'x', 'exp': datetime.utcnow() - timedelta(minutes=1)},
+            settings.SECRET_KEY, algorithm='HS256'
+        )
+        response = self.client.post(self.url_refresh, {'refresh': vencido}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_refresh_token_no_sirve_como_token_de_acceso(self):
+        datos = self._login()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {datos['refresh']}")
+        self.assertEqual(self.client.get(self.url_me).status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_logout_revoca_ambos_tokens(self):
+        datos = self._login()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {datos['token']}")
+        self.assertEqual(self.client.get(self.url_me).status_code, status.HTTP_200_OK)
+
+        response = self.client.post(self.url_logout, {'refresh': datos['refresh']}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(TokenRevocado.objects.count(), 2)
+
+        self.assertEqual(self.client.get(self.url_me).status_code, status.HTTP_401_UNAUTHORIZED)
+        self.client.credentials()
+        response = self.client.post(self.url_refresh, {'refresh': datos['refresh']}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_revocacion_de_otro_proceso_se_ve_al_sincronizar(self):
+        datos = self._login()
+        payload = jwt.decode(datos['token'], settings.SECRET_KEY, algorithms=['HS256'])
+        self.assertFalse(revocacion_tokens.esta_revocado(payload['jti'], payload['exp']))
+
+        # Fila escrita por otro proceso: aparece en la próxima sincronización
+        TokenRevocado.objects.create(
+            jti=payload['jti'], expira=datetime.fromtimestamp(payload['exp'], tz=dt_timezone.utc)
+        )
+        with override_settings(REVOCACION_SYNC_SEGUNDOS=0):
+            self.assertTrue(revocacion_tokens.esta_revocado(payload['jti'], payload['exp']))
+
+
+@override_settings(
+    LOGIN_THROTTLE_IP_CAPACIDAD=6, LOGIN_THROTTLE_IP_POR_MINUTO=1,
+    LOGIN_THROTTLE_EMAIL_CAPACIDAD=3, LOGIN_THROTTLE_EMAIL_POR_MINUTO=1,
+)
+class LoginThrottleTest(APITestCase):
+    """Cubetas de tokens por IP y por email delante del login"""
+
+    def setUp(self):
+        reiniciar_cubetas_login()
+        Usuario.objects.create(
+            email='throttle@test.com', contrasena=make_password('pass'), nombre='Throttle', apellido='User'
+        )
+        self.url = '/socios/login/'
+
+    def tearDown(self):
+        reiniciar_cubetas_login()
+
+    def test_email_bloqueado_sin_consultar_base_ni_hashear(self):
+        for _ in range(3):
+            response = self.client.post(self.url, {'email': 'throttle@test.com', 'contrasena': 'mal'})
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        with CaptureQueriesContext(connection) as consultas:
+            response = self.client.post(self.url, {'email': 'THROTTLE@test.com ', 'contrasena': 'pass'})
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertIn('Retry-After', response)
+        self.assertEqual(len(consultas.captured_queries), 0)
+
+    def test_ip_bloqueada_aunque_cambie_el_email(self):
+        for i in range(6):
+            response = self.client.post(self.url, {'email': f'otro{i}@test.com', 'contrasena': 'x'})
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.client.post(self.url, {'email': 'throttle@test.com', 'contrasena': 'pass'})
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+        # Desde otra IP la misma cuenta sigue pudiendo entrar
+        response = self.client.post(
+            self.url, {'email': 'throttle@test.com', 'contrasena': 'pass'}, REMOTE_ADDR='10.0.0.2'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_ip_no_se_reinicia_cambiando_x_forwarded_for(self):
+        for i in range(6):
+            response = self.client.post(
+                self.url, {'email': f'otro{i}@test.com', 'contrasena': 'x'}, HTTP_X_FORWARDED_FOR=f'203.0.113.{i}'
+            )
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.client.post(
+            self.url, {'email': 'throttle@test.com', 'contrasena': 'pass'}, HTTP_X_FORWARDED_FOR='198.51.100.7'
+        )
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+    def test_cubetas_se_recargan_y_estan_acotadas(self):
+        cubetas = CubetasEnMemoria(maximo=2)
+        self.assertEqual(cubetas.consumir('a', 1, 1000), (True, 0))
+        permitido, espera = cubetas.consumir('a', 1, 1000)
+        self.assertFalse(permitido)
+        self.assertLessEqual(espera, 0.001)
+
+        time.sleep(0.01)
+        self.assertTrue(cubetas.consumir('a', 1, 1000)[0])
+
+        cubetas.consumir('b', 1, 1)
+        cubetas.consumir('c', 1, 1)
+        self.assertEqual(len(cubetas), 2)  # 'a' fue la menos usada y se descartó
+
+    @override_settings(
+        LOGIN_THROTTLE_BACKEND='socios.throttling.CubetasEnCache',
+        CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'throttle'}},
+    )
+    def test_backend_compartido_en_cache(self):
+        for _ in range(3):
+            self.client.post(self.url, {'email': 'throttle@test.com', 'contrasena': 'mal'})
+        response = self.client.post(self.url, {'email': 'throttle@test.com', 'contrasena': 'pass'})
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
@@ -6,11 +6,34 @@ from django.utils import timezone
 from datetime import timedelta, datetime
 import jwt
 from django.conf import settings
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.contrib.auth.hashers import make_password
 from django_crud_api.settings import VALOR_CUOTA_BASE
+from socios.services.saldos import recalcular_saldos
+from socios.services.pagos import registrar_pagos
+from socios.services.notificaciones_pago import firma_de, procesar_notificaciones
+from socios.services.conciliacion_bancaria import conciliar_extracto, leer_extracto
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import override_settings
+from socios.services.facturacion import generar_cuotas_periodo, repartir_en_tramos, vencimiento_de_periodo
+from concurrent.futures import Future
+from socios.services.facturacion import generar_cuotas_historicas as generar_cuotas_historicas_servicio
+from socios.services.facturacion import _insertar_cuotas as insertar_cuotas
+import csv
+import json
+import tempfile
+import zipfile
+from pathlib import Path
+from datetime import date
+from decimal import Decimal
+from io import BytesIO, StringIO
+from unittest import mock
+from django.core.management import call_command
+from django.core.management.base import CommandError
 from socios.models import (
     Usuario, Rol, UsuarioRol, NivelSocio, SocioInfo, 
-    Cuota, Pago, Disciplina, Categoria
+    Cuota, Pago, Disciplina, Categoria, ElegibilidadAcceso, NotificacionPago
 )
 
 
@@ -207,6 +230,18 @@ class SocioSistemaTestCase(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
         self.assertEqual(response.data['deuda_total'], 45000.00)
         self.assertEqual(len(response.data['cuotas_pendientes']), 3)
+
+    def test_reactivar_socio_deuda_descuenta_pagos_parciales(self):
+        UsuarioRol.objects.create(usuario=self.usuario, rol=self.rol_socio)
+        SocioInfo.objects.create(usuario=self.usuario, nivel_socio=self.nivel_1, estado='inactivo')
+        cuota = Cuota.objects.create(usuario=self.usuario, periodo='2024-09', monto=VALOR_CUOTA_BASE, vencimiento=(timezone.now() - timedelta(days=15)).date())
+        Pago.objects.create(cuota=cuota, monto=5000, estado='completado', medio_pago='efectivo')
+        self._autenticar_cliente(self.usuario)
+
+        response = self.client.post(f'/socios/api/v1/usuarios/{self.usuario.id}/hacerse_socio/')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['deuda_total'], VALOR_CUOTA_BASE - 5000)
     
     # ==================== TESTS DE VALIDACIÓN ====================
     
@@ -475,6 +510,881 @@ class SocioSistemaTestCase(APITestCase):
 
 
 
+class CuotaListadoTestCase(APITestCase):
+    """El listado de cuotas resuelve 'pagada', usuario y categoría sin N+1"""
+
+    def setUp(self):
+        rol_admin, _ = Rol.objects.get_or_create(nombre='admin', defaults={'descripcion': 'Administrador'})
+        self.admin = Usuario.objects.create(email='admin-cuotas@test.com', nombre='Admin', apellido='Cuotas', contrasena=make_password('x'))
+        UsuarioRol.objects.create(usuario=self.admin, rol=rol_admin)
+        self.socio = Usuario.objects.create(email='socio-cuotas@test.com', nombre='Socio', apellido='Cuotas', contrasena=make_password('x'))
+        token = jwt.encode(
+            {'id': self.admin.id, 'email': self.admin.email, 'exp': datetime.utcnow() + timedelta(hours=1)},
+            settings.SECRET_KEY, algorithm='HS256'
+        )
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        self.url = '/socios/api/v1/cuotas/'
+
+    def _crear_cuotas(self, desde, cantidad):
+        for mes in range(desde, desde + cantidad):
+            cuota = Cuota.objects.create(
+                usuario=self.socio, periodo=f'2024-{mes:02d}', monto=VALOR_CUOTA_BASE,
+                vencimiento=timezone.now().date()
+            )
+            if mes % 2:
+                Pago.objects.create(cuota=cuota, monto=cuota.monto, estado='completado', medio_pago='efectivo')
+
+    def _consultas_del_listado(self):
+        self.client.get(self.url)  # Calienta la cache de autenticación
+        with CaptureQueriesContext(connection) as consultas:
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response, len(consultas.captured_queries)
+
+    def test_listado_con_cantidad_constante_de_consultas(self):
+        self._crear_cuotas(1, 2)
+        _, pocas = self._consultas_del_listado()
+        self._crear_cuotas(3, 8)
+        response, muchas = self._consultas_del_listado()
+
+        self.assertEqual(pocas, muchas)
+        pagadas = {c['periodo']: c['pagada'] for c in response.data}
+        self.assertTrue(pagadas['2024-01'])
+        self.assertFalse(pagadas['2024-02'])
+        self.assertEqual(response.data[0]['usuario_nombre'], 'Socio')
+
+    def test_filtro_por_estado_de_pago_guardado(self):
+        self._crear_cuotas(1, 4)
+        pendientes = self.client.get(self.url, {'estado': 'pendiente'}).data
+        pagadas = self.client.get(self.url, {'estado': 'pagada'}).data
+
+        self.assertEqual({c['periodo'] for c in pendientes}, {'2024-02', '2024-04'})
+        self.assertEqual({c['periodo'] for c in pagadas}, {'2024-01', '2024-03'})
+        self.assertTrue(all(c['pagada'] for c in pagadas))
+
+    def test_paginacion_por_cursor_en_orden_de_periodo(self):
+        self._crear_cuotas(1, 5)
+        response = self.client.get(self.url, {'page_size': 2})
+        periodos = [c['periodo'] for c in response.data['results']]
+        while response.data['next']:
+            response = self.client.get(response.data['next'])
+            periodos += [c['periodo'] for c in response.data['results']]
+        self.assertEqual(periodos, ['2024-01', '2024-02', '2024-03', '2024-04', '2024-05'])
+
+        self.assertEqual(self.client.get(self.url, {'cursor': 'no-es-un-cursor'}).status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_campos_seleccionados_y_totales(self):
+        self._crear_cuotas(1, 4)
+        response = self.client.get(self.url, {'fields': 'id,periodo,pagada', 'totals': '1', 'page_size': 3})
+
+        self.assertEqual(set(response.data['results'][0]), {'id', 'periodo', 'pagada'})
+        self.assertEqual(response.data['totales'], {
+            'cantidad': 4,
+            'monto_total': VALOR_CUOTA_BASE * 4,
+            'pendientes': 2,
+            'saldo_pendiente': VALOR_CUOTA_BASE * 2,
+        })
+
+        # Sin paginar, los totales acompañan a la lista completa
+        response = self.client.get(self.url, {'totals': '1', 'estado': 'pendiente'})
+        self.assertEqual(len(response.data['results']), 2)
+        self.assertEqual(response.data['totales']['pendientes'], 2)
+
+
+class SaldoCuotaTestCase(APITestCase):
+    """estado_pago y saldo de Cuota se mantienen con las altas, cambios y bajas de Pago"""
+
+    def setUp(self):
+        self.usuario = Usuario.objects.create(email='saldo@test.com', nombre='Saldo', apellido='Test', contrasena=make_password('x'))
+        self.cuota = Cuota.objects.create(
+            usuario=self.usuario, periodo='2024-05', monto=VALOR_CUOTA_BASE, vencimiento=timezone.now().date()
+        )
+
+    def _estado(self):
+        self.cuota.refresh_from_db()
+        return self.cuota.estado_pago, float(self.cuota.saldo)
+
+    def test_alta_de_cuota_queda_pendiente_con_saldo_completo(self):
+        self.assertEqual(self._estado(), ('pendiente', VALOR_CUOTA_BASE))
+
+    def test_pagos_parciales_completos_y_reembolso(self):
+        pago = Pago.objects.create(cuota=self.cuota, monto=5000, estado='completado', medio_pago='efectivo')
+        self.assertEqual(self._estado(), ('parcial', VALOR_CUOTA_BASE - 5000))
+
+        Pago.objects.create(cuota=self.cuota, monto=VALOR_CUOTA_BASE - 5000, estado='completado', medio_pago='efectivo')
+        self.assertEqual(self._estado(), ('pagada', 0))
+
+        pago.estado = 'reembolsado'
+        pago.save()
+        self.assertEqual(self._estado(), ('parcial', 5000))
+
+        Pago.objects.filter(cuota=self.cuota).delete()  # delete() en lote también dispara post_delete
+        self.assertEqual(self._estado(), ('pendiente', VALOR_CUOTA_BASE))
+
+    def test_pago_no_completado_no_cambia_el_estado(self):
+        Pago.objects.create(cuota=self.cuota, monto=VALOR_CUOTA_BASE, estado='iniciado', medio_pago='mercadopago')
+        self.assertEqual(self._estado(), ('pendiente', VALOR_CUOTA_BASE))
+
+    def test_recalcular_saldos_despues_de_bulk_create(self):
+        Pago.objects.bulk_create([
+            Pago(cuota=self.cuota, monto=VALOR_CUOTA_BASE, estado='completado', medio_pago='efectivo')
+        ])
+        self.assertEqual(self._estado(), ('pendiente', VALOR_CUOTA_BASE))  # Sin señales
+
+        self.assertEqual(recalcular_saldos(), 1)
+        self.assertEqual(self._estado(), ('pagada', 0))
+        self.assertEqual(recalcular_saldos([self.cuota.pk]), 0)  # Ya estaba al día
+
+    def test_simular_pago_de_cuota_parcial_cobra_solo_el_saldo(self):
+        Pago.objects.create(cuota=self.cuota, monto=5000, estado='completado', medio_pago='efectivo')
+        token = jwt.encode(
+            {'id': self.usuario.id, 'email': self.usuario.email, 'exp': datetime.utcnow() + timedelta(hours=1)},
+            settings.SECRET_KEY, algorithm='HS256'
+        )
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+        response = self.client.post(f'/socios/api/v1/cuotas/{self.cuota.id}/simular-pago-mp/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(float(Pago.objects.get(medio_pago='mercado_pago_simulado').monto), VALOR_CUOTA_BASE - 5000)
+        self.assertEqual(self._estado(), ('pagada', 0))
+
+        response = self.client.post(f'/socios/api/v1/cuotas/{self.cuota.id}/simular-pago-mp/')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class GenerarCuotasTestCase(APITestCase):
+    """Facturación mensual por lotes con INSERT ... SELECT"""
+
+    def setUp(self):
+        nivel_1, _ = NivelSocio.objects.get_or_create(nivel=1, defaults={'descuento': 0})
+        nivel_2, _ = NivelSocio.objects.get_or_create(nivel=2, defaults={'descuento': 10})
+        self.socios = []
+        for i, (nivel, estado) in enumerate([(nivel_1, 'activo'), (nivel_2, 'activo'), (None, 'activo'), (nivel_1, 'inactivo')]):
+            usuario = Usuario.objects.create(email=f'factura{i}@test.com', nombre=f'F{i}', apellido='Test', contrasena='x')
+            SocioInfo.objects.create(usuario=usuario, nivel_socio=nivel, estado=estado)
+            self.socios.append(usuario)
+
+    def _generar(self, periodo='2025-03', **opciones):
+        salida = StringIO()
+        call_command('generar_cuotas', periodo=periodo, stdout=salida, **opciones)
+        return salida.getvalue()
+
+    def test_genera_con_descuento_y_es_idempotente(self):
+        salida = self._generar(lote=2)
+        self.assertIn('3 cuotas generadas', salida)
+
+        montos = dict(Cuota.objects.filter(periodo='2025-03').values_list('usuario_id', 'monto'))
+        self.assertEqual(montos, {
+            self.socios[0].id: Decimal('15000.00'),
+            self.socios[1].id: Decimal('13500.00'),
+            self.socios[2].id: Decimal('15000.00'),
+        })
+        cuota = Cuota.objects.get(usuario=self.socios[1], periodo='2025-03')
+        self.assertEqual((cuota.vencimiento, cuota.estado_pago, cuota.saldo), (date(2025, 4, 5), 'pendiente', Decimal('13500.00')))
+        # La elegibilidad del molinete ya ve la cuota nueva (vencida, por ser de 2025)
+        self.assertEqual(ElegibilidadAcceso.objects.get(socio_id=self.socios[0].id).cuotas_vencidas, 1)
+
+        self.assertIn('0 cuotas generadas para 2025-03 (3 socio(s) ya la tenían)', self._generar())
+        self.assertEqual(Cuota.objects.filter(periodo='2025-03').count(), 3)
+
+    def test_motor_sin_insert_select_usa_bulk_create(self):
+        Cuota.objects.create(usuario=self.socios[0], periodo='2025-03', monto=1, vencimiento=date(2025, 4, 5))
+        with mock.patch.object(connection, 'vendor', 'mysql'):
+            resultado = generar_cuotas_periodo('2025-03', tamano_lote=2)
+        self.assertEqual((resultado.socios, resultado.creadas), (3, 2))
+        self.assertEqual(Cuota.objects.get(usuario=self.socios[1], periodo='2025-03').monto, Decimal('13500.00'))
+
+    def test_bulk_create_cuenta_solo_las_que_inserto(self):
+        def con_corrida_paralela(cuotas):
+            # Otra corrida confirma una de las cuotas entre la lectura de existentes y el INSERT
+            otra = cuotas[0]
+            Cuota.objects.create(usuario_id=otra.usuario_id, periodo=otra.periodo, monto=1, vencimiento=otra.vencimiento)
+            return insertar_cuotas(cuotas)
+
+        with mock.patch.object(connection, 'vendor', 'mysql'), \
+                mock.patch('socios.services.facturacion._insertar_cuotas', con_corrida_paralela):
+            resultado = generar_cuotas_periodo('2025-03', tamano_lote=3)
+        self.assertEqual((resultado.socios, resultado.creadas, resultado.existentes), (3, 2, 1))
+        self.assertEqual(Cuota.objects.filter(periodo='2025-03').count(), 3)
+
+    def test_vencimiento_depende_solo_del_periodo(self):
+        self.assertEqual(vencimiento_de_periodo('2025-03'), date(2025, 4, 5))
+        self.assertEqual(vencimiento_de_periodo('2024-12'), date(2025, 1, 5))
+        with override_settings(DIA_VENCIMIENTO_CUOTA=10):
+            self.assertEqual(vencimiento_de_periodo('2025-01'), date(2025, 2, 10))
+
+        # Correr la facturación a fin de mes no corre el vencimiento un mes más
+        fin_de_mes = timezone.make_aware(datetime(2025, 1, 30, 12, 0))
+        with mock.patch('django.utils.timezone.now', return_value=fin_de_mes):
+            salida = StringIO()
+            call_command('generar_cuotas', stdout=salida)
+        self.assertIn('Vencimiento establecido para: 05/02/2025', salida.getvalue())
+
+    def test_periodo_invalido(self):
+        with self.assertRaises(CommandError):
+            self._generar(periodo='2025-13')
+
+    def test_tramos_con_la_misma_cantidad_de_socios(self):
+        ids = sorted(u.id for u in self.socios[:3])  # El cuarto socio está inactivo
+        self.assertEqual(repartir_en_tramos(2), [(0, ids[0]), (ids[0], ids[2])])
+        self.assertEqual(len(repartir_en_tramos(10)), 3)  # No más tramos que socios
+
+    def test_workers_generan_cada_tramo_y_suman_el_resumen(self):
+        class EjecutorEnProceso:
+            """Corre cada tramo en el acto: los procesos reales no ven la base de los tests"""
+            def __init__(self, *args, **kwargs):
+                pass
+
+            def __enter__(self):
+                return self
+
+            def __exit__(self, *args):
+                return False
+
+            def submit(self, funcion, *args):
+                futuro = Future()
+                try:
+                    futuro.set_result(funcion(*args))
+                except Exception as e:
+                    futuro.set_exception(e)
+                return futuro
+
+        Cuota.objects.create(usuario=self.socios[2], periodo='2025-03', monto=1, vencimiento=date(2025, 4, 5))
+        with mock.patch('socios.services.facturacion.ProcessPoolExecutor', EjecutorEnProceso), \
+                mock.patch('socios.services.facturacion.connection.close'):
+            salida = self._generar(workers=2)
+
+        self.assertIn('2 cuotas generadas para 2025-03 (1 socio(s) ya la tenían)', salida)
+        self.assertEqual(salida.count('Tramo ID'), 2)
+        self.assertEqual(Cuota.objects.filter(periodo='2025-03').count(), 3)
+
+
+class CuotasHistoricasTestCase(APITestCase):
+    """Backfill de cuotas históricas por lotes, con checkpoint para retomar"""
+
+    def setUp(self):
+        self.socios = []
+        for i in range(5):
+            usuario = Usuario.objects.create(email=f'historica{i}@test.com', nombre=f'H{i}', apellido='Test', contrasena='x')
+            SocioInfo.objects.create(usuario=usuario, estado='activo')
+            self.socios.append(usuario)
+        Cuota.objects.create(usuario=self.socios[0], periodo='2024-02', monto=1, vencimiento=date(2024, 3, 5))
+        self.directorio = tempfile.TemporaryDirectory()
+        self.checkpoint = Path(self.directorio.name) / 'avance.json'
+
+    def tearDown(self):
+        self.directorio.cleanup()
+
+    def _backfill(self, **opciones):
+        salida = StringIO()
+        call_command(
+            'generar_cuotas_historicas', ano_inicio=2024, mes_inicio=1, ano_fin=2024, mes_fin=3,
+            forzar=True, checkpoint=str(self.checkpoint), stdout=salida, **opciones
+        )
+        return salida.getvalue()
+
+    def test_genera_por_lotes_sin_duplicar(self):
+        with CaptureQueriesContext(connection) as consultas:
+            salida = self._backfill(lote=6)  # 2 socios x 3 meses por lote
+
+        self.assertIn('Se generaron 14 cuotas', salida)
+        self.assertEqual(Cuota.objects.count(), 15)
+        self.assertEqual(Cuota.objects.filter(usuario=self.socios[0], periodo='2024-02').get().monto, 1)
+        # Una lectura de existentes por lote, no una por socio y mes
+        existentes = [
+            q for q in consultas.captured_queries
+            if q['sql'].startswith('SELECT "socios_cuota"."usuario_id" AS "usuario_id", "socios_cuota"."periodo"')
+        ]
+        self.assertEqual(len(existentes), 3)
+        self.assertFalse(self.checkpoint.exists())
+
+    def test_retoma_desde_el_checkpoint(self):
+        def cortar_en_el_segundo_lote(original):
+            llamadas = []
+
+            def al_confirmar(*args):
+                original(*args)
+                llamadas.append(args)
+                if len(llamadas) == 2:
+                    raise RuntimeError('corte de luz')
+            return al_confirmar
+
+        funcion = generar_cuotas_historicas_servicio
+
+        def con_corte(*args, al_confirmar_lote=None, **kwargs):
+            return funcion(*args, al_confirmar_lote=cortar_en_el_segundo_lote(al_confirmar_lote), **kwargs)
+
+        with mock.patch('socios.management.commands.generar_cuotas_historicas.generar_cuotas_historicas', con_corte):
+            with self.assertRaises(CommandError):
+                self._backfill(lote=6)
+
+        avance = json.loads(self.checkpoint.read_text())
+        self.assertEqual(avance['ultimo_usuario_id'], self.socios[3].id)
+        self.assertEqual(Cuota.objects.count(), 1 + 11)
+
+        salida = self._backfill(lote=6)
+        self.assertIn(f'Retomando desde el socio con ID > {self.socios[3].id}', salida)
+        self.assertIn('Se generaron 14 cuotas', salida)
+        self.assertEqual(Cuota.objects.count(), 15)
+
+    def test_checkpoint_de_otra_corrida(self):
+        self.checkpoint.write_text(json.dumps({'desde': '2020-01', 'hasta': '2020-12', 'usuario': None, 'ultimo_usuario_id': 1}))
+        with self.assertRaises(CommandError):
+            self._backfill()
+        self.assertIn('Se generaron 14 cuotas', self._backfill(reiniciar=True))
+
+    def test_no_cuenta_las_cuotas_que_creo_otra_corrida(self):
+        def con_corrida_paralela(cuotas):
+            # Otra corrida confirma una de las cuotas entre la lectura de existentes y el INSERT
+            # (fuera del savepoint del lote, que se revierte al chocar)
+            otra = cuotas[0]
+            Cuota.objects.create(usuario_id=otra.usuario_id, periodo=otra.periodo, monto=1, vencimiento=otra.vencimiento)
+            return insertar_cuotas(cuotas)
+
+        lotes = []
+        with mock.patch('socios.services.facturacion._insertar_cuotas', con_corrida_paralela):
+            creadas, existentes = generar_cuotas_historicas_servicio(
+                ['2024-01', '2024-02', '2024-03'], tamano_lote=15,
+                al_confirmar_lote=lambda *args: lotes.append(args)
+            )
+
+        self.assertEqual((creadas, existentes), (13, 2))
+        self.assertEqual(lotes, [(self.socios[-1].id, 13, 2)])
+        self.assertEqual(Cuota.objects.count(), 15)
+
+
+
+class PagosEnLoteTestCase(APITestCase):
+    """Registro de pagos por lote: un bulk_create, saldos y elegibilidad al día, totales desde SQL"""
+
+    def setUp(self):
+        rol_admin, _ = Rol.objects.get_or_create(nombre='admin', defaults={'descripcion': 'Administrador'})
+        self.admin = Usuario.objects.create(email='caja@test.com', nombre='Caja', apellido='Admin', contrasena=make_password('x'))
+        UsuarioRol.objects.create(usuario=self.admin, rol=rol_admin)
+        nivel, _ = NivelSocio.objects.get_or_create(nivel=1, defaults={'descuento': 0})
+        self.cuotas = []
+        for i in range(3):
+            socio = Usuario.objects.create(email=f'lote{i}@test.com', nombre='Lote', apellido=str(i), contrasena=make_password('x'))
+            SocioInfo.objects.create(usuario=socio, nivel_socio=nivel, estado='activo')
+            for mes in (1, 2):
+                self.cuotas.append(Cuota.objects.create(
+                    usuario=socio, periodo=f'2024-{mes:02d}', monto=VALOR_CUOTA_BASE,
+                    vencimiento=(timezone.now() - timedelta(days=10)).date()
+                ))
+        token = jwt.encode(
+            {'id': self.admin.id, 'email': self.admin.email, 'exp': datetime.utcnow() + timedelta(hours=1)},
+            settings.SECRET_KEY, algorithm='HS256'
+        )
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        self.url = '/socios/api/v1/cuotas/registrar-pagos/'
+
+    def test_lote_de_varios_socios(self):
+        # Una cuota con pago parcial: se cobra solo lo que falta
+        Pago.objects.create(cuota=self.cuotas[0], monto=5000, estado='completado', medio_pago='efectivo')
+
+        with CaptureQueriesContext(connection) as consultas:
+            lote = registrar_pagos([c.id for c in self.cuotas], 'efectivo', 'Caja #1')
+        inserts = [q for q in consultas.captured_queries if q['sql'].startswith(f'INSERT INTO "{Pago._meta.db_table}"')]
+
+        self.assertEqual(len(inserts), 1)
+        self.assertEqual((lote.pagos, lote.cuotas, lote.socios), (6, 6, 3))
+        self.assertEqual(lote.total, Decimal(VALOR_CUOTA_BASE * 6 - 5000))
+        self.assertFalse(Cuota.objects.exclude(estado_pago='pagada').exists())
+        self.assertEqual(ElegibilidadAcceso.objects.filter(cuotas_vencidas=0).count(), 3)
+
+    def test_cuotas_pagadas_se_saltean(self):
+        registrar_pagos([self.cuotas[0].id], 'efectivo')
+        lote = registrar_pagos([c.id for c in self.cuotas[:2]], 'efectivo')
+
+        self.assertEqual(lote.pagos, 1)
+        self.assertEqual(Pago.objects.filter(cuota=self.cuotas[0]).count(), 1)
+        self.assertTrue(registrar_pagos([self.cuotas[0].id], 'efectivo').vacio)
+
+    def test_endpoint_de_caja(self):
+        ids = [c.id for c in self.cuotas[:4]] + [999999]
+        response = self.client.post(self.url, {'cuota_ids': ids, 'medio_pago': 'efectivo'}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['pagos_registrados'], 4)
+        self.assertEqual(response.data['socios'], 2)
+        self.assertEqual(response.data['omitidas'], 1)
+
+        response = self.client.post(self.url, {'cuota_ids': ids[:4], 'medio_pago': 'efectivo'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_endpoint_de_caja_solo_admin(self):
+        token = jwt.encode(
+            {'id': self.cuotas[0].usuario_id, 'email': 'lote0@test.com', 'exp': datetime.utcnow() + timedelta(hours=1)},
+            settings.SECRET_KEY, algorithm='HS256'
+        )
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        response = self.client.post(self.url, {'cuota_ids': [self.cuotas[0].id], 'medio_pago': 'efectivo'}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertEqual(Pago.objects.count(), 0)
+
+
+@override_settings(PAGOS_WEBHOOK_SECRETO='secreto-de-prueba')
+class WebhookPagosTestCase(APITestCase):
+    """El webhook solo encola; procesar_notificaciones aplica la cola por lotes"""
+
+    def setUp(self):
+        self.usuario = Usuario.objects.create(email='webhook@test.com', nombre='Web', apellido='Hook', contrasena=make_password('x'))
+        self.cuotas = [
+            Cuota.objects.create(usuario=self.usuario, periodo=f'2024-0{mes}', monto=VALOR_CUOTA_BASE, vencimiento=timezone.now().date())
+            for mes in (1, 2)
+        ]
+        self.url = '/socios/api/pagos/webhook/'
+
+    def _notificar(self, firma=None, **datos):
+        cuerpo = json.dumps({'monto': VALOR_CUOTA_BASE, 'estado': 'approved', **datos}).encode()
+        return self.client.generic(
+            'POST', self.url, cuerpo, content_type='application/json',
+            HTTP_X_SIGNATURE=firma if firma is not None else f'sha256={firma_de(cuerpo)}',
+        )
+
+    def _estado_pago(self, cuota):
+        cuota.refresh_from_db()
+        return cuota.estado_pago
+
+    def test_firma_invalida(self):
+        response = self._notificar(firma='abc', referencia_externa='evt-1', cuota_id=self.cuotas[0].id)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertFalse(NotificacionPago.objects.exists())
+
+    def test_sin_secreto_configurado_rechaza_todo(self):
+        with override_settings(PAGOS_WEBHOOK_SECRETO=''):
+            response = self._notificar(referencia_externa='evt-1', cuota_id=self.cuotas[0].id)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertFalse(NotificacionPago.objects.exists())
+
+    def test_encola_y_deduplica_sin_tocar_los_pagos(self):
+        response = self._notificar(referencia_externa='evt-1', cuota_id=self.cuotas[0].id)
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+
+        response = self._notificar(referencia_externa='evt-1', cuota_id=self.cuotas[0].id)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['status'], 'duplicada')
+
+        self.assertEqual(NotificacionPago.objects.count(), 1)
+        self.assertFalse(Pago.objects.exists())
+
+        response = self._notificar(referencia_externa='evt-2', cuota_id=self.cuotas[0].id, estado='otro')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_procesar_aplica_pagos_y_reembolsos(self):
+        self._notificar(referencia_externa='evt-1', referencia_pago='pay-1', cuota_id=self.cuotas[0].id)
+        self._notificar(referencia_externa='evt-2', referencia_pago='pay-2', cuota_id=self.cuotas[1].id)
+        self._notificar(referencia_externa='evt-3', cuota_id=999999)
+
+        with CaptureQueriesContext(connection) as consultas:
+            resultado = procesar_notificaciones()
+        inserts = [q for q in consultas.captured_queries if q['sql'].startswith(f'INSERT INTO "{Pago._meta.db_table}"')]
+
+        self.assertEqual(resultado, (2, 1, 0, 0))
+        self.assertEqual(len(inserts), 1)
+        self.assertEqual([self._estado_pago(c) for c in self.cuotas], ['pagada', 'pagada'])
+        self.assertEqual(NotificacionPago.objects.get(referencia_externa='evt-3').estado, 'error')
+        self.assertEqual(procesar_notificaciones(), (0, 0, 0, 0))
+
+        # Una notificación nueva del mismo pago cambia su estado
+        self._notificar(referencia_externa='evt-4', referencia_pago='pay-1', cuota_id=self.cuotas[0].id, estado='refunded')
+        procesar_notificaciones()
+        self.assertEqual(Pago.objects.get(referencia_externa='pay-1').estado, 'reembolsado')
+        self.assertEqual(self._estado_pago(self.cuotas[0]), 'pendiente')
+
+    def test_notificaciones_de_un_pago_en_orden_entre_workers(self):
+        from socios.services.notificaciones_pago import _sin_anteriores_pendientes
+
+        self._notificar(referencia_externa='evt-1', referencia_pago='pay-1', cuota_id=self.cuotas[0].id)
+        self._notificar(referencia_externa='evt-2', referencia_pago='pay-1', cuota_id=self.cuotas[0].id, estado='refunded')
+        self._notificar(referencia_externa='evt-3', referencia_pago='pay-2', cuota_id=self.cuotas[1].id)
+
+        # Otro worker tiene la aprobación: el reembolso espera, el otro pago no
+        lote = list(NotificacionPago.objects.exclude(referencia_externa='evt-1').order_by('id'))
+        listas, diferidas = _sin_anteriores_pendientes(lote)
+        self.assertEqual(([n.referencia_externa for n in listas], diferidas), (['evt-3'], 1))
+
+        # En lotes de a uno, el reembolso actualiza el pago creado por la aprobación
+        while procesar_notificaciones(1).total:
+            pass
+        self.assertEqual(list(Pago.objects.filter(referencia_externa='pay-1').values_list('estado', flat=True)), ['reembolsado'])
+        self.assertEqual(self._estado_pago(self.cuotas[0]), 'pendiente')
+
+    @override_settings(PAGOS_NOTIFICACIONES_MAXIMO_INTENTOS=2)
+    def test_lote_fallido_se_reintenta_y_queda_en_error(self):
+        self._notificar(referencia_externa='evt-1', cuota_id=self.cuotas[0].id)
+
+        with mock.patch('socios.services.notificaciones_pago.actualizar_deuda', side_effect=RuntimeError('caída')):
+            for _ in range(2):
+                self.assertEqual(procesar_notificaciones(), (0, 0, 0, 1))
+
+        notificacion = NotificacionPago.objects.get()
+        self.assertEqual((notificacion.estado, notificacion.intentos, notificacion.error), ('error', 2, 'caída'))
+        self.assertFalse(Pago.objects.exists())
+
+    def test_notificacion_fallida_no_arrastra_al_resto_del_lote(self):
+        from socios.services.pagos import actualizar_deuda
+
+        self._notificar(referencia_externa='evt-1', referencia_pago='pay-1', cuota_id=self.cuotas[0].id)
+        self._notificar(referencia_externa='evt-2', referencia_pago='pay-1', cuota_id=self.cuotas[0].id, estado='refunded')
+        self._notificar(referencia_externa='evt-3', referencia_pago='pay-2', cuota_id=self.cuotas[1].id)
+
+        def falla_con_la_primera_cuota(cuota_ids, usuario_ids):
+            if self.cuotas[0].id in cuota_ids:
+                raise RuntimeError('caída')
+            actualizar_deuda(cuota_ids, usuario_ids)
+
+        with mock.patch('socios.services.notificaciones_pago.actualizar_deuda', side_effect=falla_con_la_primera_cuota):
+            resultado = procesar_notificaciones()
+
+        # evt-1 falla sola; evt-2 espera a evt-1 sin sumar intento; evt-3 se aplica
+        self.assertEqual(resultado, (1, 0, 1, 1))
+        intentos = dict(NotificacionPago.objects.values_list('referencia_externa', 'intentos'))
+        self.assertEqual(intentos, {'evt-1': 1, 'evt-2': 0, 'evt-3': 1})
+        self.assertEqual(NotificacionPago.objects.get(referencia_externa='evt-3').estado, 'procesada')
+        self.assertEqual(list(Pago.objects.values_list('referencia_externa', flat=True)), ['pay-2'])
+
+    def test_comando_vacia_la_cola(self):
+        for i, cuota in enumerate(self.cuotas):
+            self._notificar(referencia_externa=f'evt-{i}', cuota_id=cuota.id)
+
+        salida = StringIO()
+        call_command('procesar_notificaciones_pago', '--una-vez', '--lote', '1', stdout=salida)
+
+        self.assertIn('2 notificaciones aplicadas', salida.getvalue())
+        self.assertFalse(NotificacionPago.objects.filter(estado='pendiente').exists())
+
+
+class ExportacionCuotasTestCase(APITestCase):
+    """Exportación en streaming de cuotas y pagos, en CSV y XLSX"""
+
+    def setUp(self):
+        rol_admin, _ = Rol.objects.get_or_create(nombre='admin', defaults={'descripcion': 'Administrador'})
+        self.admin = Usuario.objects.create(email='tesoreria@test.com', nombre='Tesorería', apellido='Admin', contrasena=make_password('x'))
+        UsuarioRol.objects.create(usuario=self.admin, rol=rol_admin)
+        self.socio = Usuario.objects.create(email='exporta@test.com', nombre='José', apellido='Ñandú', contrasena=make_password('x'))
+        for mes in range(1, 6):
+            cuota = Cuota.objects.create(
+                usuario=self.socio, periodo=f'2024-{mes:02d}', monto=VALOR_CUOTA_BASE, vencimiento=timezone.now().date()
+            )
+            if mes <= 2:
+                Pago.objects.create(cuota=cuota, monto=cuota.monto, estado='completado', medio_pago='efectivo', comprobante=f'R-{mes}')
+        Cuota.objects.create(usuario=self.admin, periodo='2024-01', monto=VALOR_CUOTA_BASE, vencimiento=timezone.now().date())
+        self.url = '/socios/api/v1/cuotas/exportar/'
+
+    def _autenticar(self, usuario):
+        token = jwt.encode(
+            {'id': usuario.id, 'email': usuario.email, 'exp': datetime.utcnow() + timedelta(hours=1)},
+            settings.SECRET_KEY, algorithm='HS256'
+        )
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+    def _descargar(self, **params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        return response, b''.join(response.streaming_content)
+
+    def _filas_csv(self, contenido):
+        return list(csv.reader(StringIO(contenido.decode('utf-8-sig'))))
+
+    def test_csv_de_cuotas_con_filtros(self):
+        self._autenticar(self.admin)
+        response, contenido = self._descargar(usuario=self.socio.id, estado='pendiente')
+        filas = self._filas_csv(contenido)
+
+        self.assertIn('attachment; filename="cuotas_', response['Content-Disposition'])
+        self.assertEqual(filas[0][:3], ['ID', 'ID socio', 'Email'])
+        self.assertEqual([fila[5] for fila in filas[1:]], ['2024-03', '2024-04', '2024-05'])
+        self.assertEqual(filas[1][4], 'Ñandú')
+
+    def test_textos_con_formula_se_exportan_como_texto(self):
+        self.socio.nombre = '=HYPERLINK("http://example.com","clic")'
+        self.socio.save()
+        Pago.objects.filter(comprobante='R-1').update(comprobante='+1234')
+        self._autenticar(self.admin)
+
+        filas = self._filas_csv(self._descargar(usuario=self.socio.id)[1])
+        self.assertEqual(filas[1][3], '\'=HYPERLINK("http://example.com","clic")')
+        pagos = self._filas_csv(self._descargar(tipo='pagos')[1])
+        self.assertIn("'+1234", {fila[-1] for fila in pagos[1:]})
+
+        # En el XLSX son cadenas en línea (Excel no las evalúa): el valor queda tal cual
+        hoja = zipfile.ZipFile(BytesIO(self._descargar(formato='xlsx')[1])).read('xl/worksheets/sheet1.xml').decode()
+        self.assertIn('<t xml:space="preserve">=HYPERLINK(', hoja)
+        self.assertNotIn("'=HYPERLINK(", hoja)
+        hoja = zipfile.ZipFile(BytesIO(self._descargar(formato='xlsx', tipo='pagos')[1])).read('xl/worksheets/sheet1.xml').decode()
+        self.assertIn('<t xml:space="preserve">+1234</t>', hoja)
+
+    def test_csv_de_pagos(self):
+        self._autenticar(self.admin)
+        _, contenido = self._descargar(tipo='pagos')
+        filas = self._filas_csv(contenido)
+
+        self.assertEqual(len(filas), 1 + 2)
+        self.assertEqual({fila[-1] for fila in filas[1:]}, {'R-1', 'R-2'})
+
+    def test_xlsx(self):
+        self._autenticar(self.admin)
+        response, contenido = self._descargar(formato='xlsx')
+        archivo = zipfile.ZipFile(BytesIO(contenido))
+        hoja = archivo.read('xl/worksheets/sheet1.xml').decode()
+
+        self.assertIsNone(archivo.testzip())
+        self.assertIn('spreadsheetml', response['Content-Type'])
+        self.assertEqual(hoja.count('<row>'), 1 + Cuota.objects.count())
+        self.assertIn('exporta@test.com', hoja)
+
+    def test_socio_solo_exporta_lo_suyo(self):
+        self._autenticar(self.socio)
+        _, contenido = self._descargar()
+        self.assertEqual(len(self._filas_csv(contenido)), 1 + 5)
+
+    def test_formato_invalido(self):
+        self._autenticar(self.admin)
+        response = self.client.get(self.url, {'formato': 'pdf'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class ConciliacionBancariaTestCase(APITestCase):
+    """Importación de extractos bancarios: código de cuota, DNI o monto único"""
+
+    def setUp(self):
+        self.ana = Usuario.objects.create(email='ana@test.com', nombre='Ana', apellido='Banco', nro_documento='30.111.222', contrasena=make_password('x'))
+        self.beto = Usuario.objects.create(email='beto@test.com', nombre='Beto', apellido='Banco', contrasena=make_password('x'))
+        vencimiento = timezone.now().date()
+        self.ana_1 = Cuota.objects.create(usuario=self.ana, periodo='2024-01', monto=10000, vencimiento=vencimiento - timedelta(days=30))
+        self.ana_2 = Cuota.objects.create(usuario=self.ana, periodo='2024-02', monto=10000, vencimiento=vencimiento)
+        self.beto_1 = Cuota.objects.create(usuario=self.beto, periodo='2024-01', monto=12345, vencimiento=vencimiento)
+        self.beto_2 = Cuota.objects.create(usuario=self.beto, periodo='2024-02', monto=15000, vencimiento=vencimiento)
+        self.extracto = (
+            'Fecha;Concepto;Referencia;Importe\n'
+            f'01/03/2024;TRANSFERENCIA CUOTA {self.beto_2.id};TRF-1;15.000,00\n'
+            '02/03/2024;TRANSF DNI 30.111.222;TRF-2;20.000,00\n'
+            '03/03/2024;TRANSFERENCIA RECIBIDA;TRF-3;12.345,00\n'
+            '04/03/2024;TRANSFERENCIA RECIBIDA;TRF-4;999,00\n'
+            '05/03/2024;COMISION MANTENIMIENTO;TRF-5;-1.500,00\n'
+            '06/03/2024;TRANSFERENCIA;TRF-6;abc\n'
+        )
+
+    def _conciliar(self, texto, formato='csv', **kwargs):
+        return conciliar_extracto(leer_extracto(StringIO(texto), formato), **kwargs)
+
+    def test_concilia_por_codigo_dni_y_monto(self):
+        with CaptureQueriesContext(connection) as consultas:
+            resultado = self._conciliar(self.extracto)
+        inserts = [q for q in consultas.captured_queries if q['sql'].startswith(f'INSERT INTO "{Pago._meta.db_table}"')]
+
+        self.assertEqual(len(inserts), 1)
+        self.assertEqual((resultado.lineas, resultado.conciliadas, resultado.pagos, resultado.ignoradas), (6, 3, 4, 1))
+        self.assertEqual(resultado.total, Decimal('47345.00'))
+        self.assertEqual([(l.linea, l.referencia) for l in resultado.sin_conciliar], [(5, 'TRF-4'), (7, 'TRF-6')])
+        self.assertFalse(Cuota.objects.exclude(estado_pago='pagada').exists())
+        self.assertEqual(Pago.objects.filter(detalle__referencia='TRF-2').count(), 2)
+
+    def test_reimportar_no_duplica(self):
+        self._conciliar(self.extracto)
+        resultado = self._conciliar(self.extracto)
+
+        self.assertEqual((resultado.ya_registradas, resultado.pagos), (3, 0))
+        self.assertEqual(Pago.objects.count(), 4)
+
+    def test_reimportar_renombrado_o_acumulado_no_duplica(self):
+        sin_referencia = 'fecha,concepto,importe\n03/03/2024,TRANSFERENCIA RECIBIDA,"12.345,00"\n'
+        self._conciliar(sin_referencia, nombre_archivo='marzo.csv')
+
+        # Mismo movimiento en otro archivo y en otra línea, con un movimiento nuevo antes
+        acumulado = (
+            'fecha,concepto,importe\n'
+            f'01/03/2024,CUOTA {self.beto_2.id},"15.000,00"\n'
+            '03/03/2024,TRANSFERENCIA RECIBIDA,"12.345,00"\n'
+        )
+        resultado = self._conciliar(acumulado, nombre_archivo='marzo (1).csv')
+
+        self.assertEqual((resultado.ya_registradas, resultado.conciliadas), (1, 1))
+        self.assertEqual(Pago.objects.count(), 2)
+
+    def test_referencia_generica_no_saltea_creditos_distintos(self):
+        extracto = (
+            'fecha;concepto;referencia;importe\n'
+            f'01/03/2024;CUOTA {self.beto_1.id};TRANSFERENCIA;12.345,00\n'
+            f'01/03/2024;CUOTA {self.beto_2.id};TRANSFERENCIA;15.000,00\n'
+        )
+        resultado = self._conciliar(extracto)
+
+        self.assertEqual((resultado.ya_registradas, resultado.conciliadas), (0, 2))
+        self.assertEqual(Pago.objects.values('comprobante').distinct().count(), 2)
+
+    def test_numeros_sueltos_no_son_dni(self):
+        extracto = (
+            'fecha;concepto;referencia;importe\n'
+            '01/03/2024;TRANSFERENCIA OP 45678912 CBU 0170099220000067;TRF-1;12.345,00\n'
+            '02/03/2024;TRANSFERENCIA DNI 99.888.777;TRF-2;15.000,00\n'
+        )
+        resultado = self._conciliar(extracto)
+
+        # Sin DNI válido se concilia por monto único
+        self.assertEqual((resultado.conciliadas, resultado.sin_conciliar), (2, []))
+        self.assertEqual(Pago.objects.get(detalle__referencia='TRF-1').cuota_id, self.beto_1.id)
+        self.assertEqual(Pago.objects.get(detalle__referencia='TRF-2').cuota_id, self.beto_2.id)
+
+    def test_simular_no_registra_y_monto_ambiguo(self):
+        resultado = self._conciliar('monto\n10000\n', simular=False)
+        self.assertIn('ambiguo', resultado.sin_conciliar[0].motivo)
+
+        resultado = self._conciliar(self.extracto, simular=True)
+        self.assertEqual(resultado.pagos, 4)
+        self.assertFalse(Pago.objects.exists())
+
+    def test_ofx(self):
+        ofx = (
+            'OFXHEADER:100\nDATA:OFXSGML\n<OFX><BANKMSGSRSV1><STMTTRNRS><STMTRS><BANKTRANLIST>\n'
+            f'<STMTTRN>\n<TRNTYPE>CREDIT\n<DTPOSTED>20240301\n<TRNAMT>15000.00\n<FITID>F1\n<MEMO>Cuota #{self.beto_2.id}\n</STMTTRN>\n'
+            '<STMTTRN><TRNTYPE>DEBIT<DTPOSTED>20240302<TRNAMT>-100.00<FITID>F2<NAME>Comision</STMTTRN>\n'
+            '</BANKTRANLIST></STMTRS></STMTTRNRS></BANKMSGSRSV1></OFX>\n'
+        )
+        resultado = self._conciliar(ofx, formato='ofx')
+
+        self.assertEqual((resultado.lineas, resultado.conciliadas, resultado.ignoradas), (2, 1, 1))
+        pago = Pago.objects.get()
+        self.assertEqual(pago.detalle['referencia'], 'F1')
+        self.assertTrue(pago.comprobante.startswith('banco:'))
+
+    def test_endpoint_y_comando(self):
+        rol_admin, _ = Rol.objects.get_or_create(nombre='admin', defaults={'descripcion': 'Administrador'})
+        UsuarioRol.objects.create(usuario=self.ana, rol=rol_admin)
+        token = jwt.encode(
+            {'id': self.ana.id, 'email': self.ana.email, 'exp': datetime.utcnow() + timedelta(hours=1)},
+            settings.SECRET_KEY, algorithm='HS256'
+        )
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        archivo = SimpleUploadedFile('marzo.csv', self.extracto.encode('utf-8'), content_type='text/csv')
+        response = self.client.post('/socios/api/v1/cuotas/conciliar-extracto/', {'archivo': archivo, 'simular': '1'}, format='multipart')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual((response.data['conciliadas'], response.data['sin_conciliar_total']), (3, 2))
+        self.assertFalse(Pago.objects.exists())
+
+        with tempfile.TemporaryDirectory() as directorio:
+            ruta = Path(directorio) / 'marzo.csv'
+            ruta.write_text(self.extracto, encoding='utf-8')
+            reporte = Path(directorio) / 'sin_conciliar.csv'
+            salida = StringIO()
+            call_command('conciliar_extracto', str(ruta), '--reporte', str(reporte), stdout=salida)
+
+            self.assertIn('3 de 6 movimientos conciliados', salida.getvalue())
+            self.assertEqual(len(reporte.read_text(encoding='utf-8').splitlines()), 1 + 2)
+        self.assertEqual(Pago.objects.count(), 4)
+
+
+class BorrarCuotasTestCase(APITestCase):
+    """borrar_todas_las_cuotas: borrado por lotes, con filtros y en modo truncar"""
+
+    def setUp(self):
+        nivel, _ = NivelSocio.objects.get_or_create(nivel=1, defaults={'descuento': 0})
+        self.socio = Usuario.objects.create(email='purga@test.com', nombre='Purga', apellido='Test', contrasena=make_password('x'))
+        SocioInfo.objects.create(usuario=self.socio, nivel_socio=nivel, estado='activo')
+        vencida = (timezone.now() - timedelta(days=30)).date()
+        for mes in range(1, 7):
+            cuota = Cuota.objects.create(usuario=self.socio, periodo=f'2024-{mes:02d}', monto=VALOR_CUOTA_BASE, vencimiento=vencida)
+            if mes % 2:
+                Pago.objects.create(cuota=cuota, monto=cuota.monto, estado='completado', medio_pago='efectivo')
+
+    def _borrar(self, *args):
+        salida = StringIO()
+        call_command('borrar_todas_las_cuotas', '--forzar', *args, stdout=salida)
+        return salida.getvalue()
+
+    def test_por_lotes_con_filtro(self):
+        salida = self._borrar('--antes-de', '2024-05', '--batch-size', '3')
+
+        self.assertIn('4/4 cuotas', salida)
+        self.assertEqual(salida.count('... hasta la cuota ID'), 2)
+        self.assertEqual(list(Cuota.objects.order_by('periodo').values_list('periodo', flat=True)), ['2024-05', '2024-06'])
+        self.assertEqual(Pago.objects.count(), 1)
+        # La elegibilidad se recalcula aunque el DELETE directo no dispare señales
+        self.assertEqual(ElegibilidadAcceso.objects.get(socio_id=self.socio.id).cuotas_vencidas, 1)
+
+    def test_periodo_sin_cargar_objetos(self):
+        with CaptureQueriesContext(connection) as consultas:
+            self._borrar('--periodo', '2024-03')
+        selects_de_pagos = [
+            q for q in consultas.captured_queries
+            if q['sql'].startswith('SELECT') and f'"{Pago._meta.db_table}"."medio_pago"' in q['sql']
+        ]
+
+        self.assertEqual(selects_de_pagos, [])
+        self.assertFalse(Cuota.objects.filter(periodo='2024-03').exists())
+        self.assertEqual(Cuota.objects.count(), 5)
+
+    def test_truncar(self):
+        self.assertIn('Cuotas eliminadas: 6', self._borrar('--truncar'))
+        self.assertFalse(Cuota.objects.exists() or Pago.objects.exists())
+        self.assertEqual(ElegibilidadAcceso.objects.get(socio_id=self.socio.id).cuotas_vencidas, 0)
+
+    def test_argumentos_invalidos(self):
+        with self.assertRaises(CommandError):
+            self._borrar('--truncar', '--periodo', '2024-01')
+        with self.assertRaises(CommandError):
+            self._borrar('--antes-de', '2024-13')
+        self.assertEqual(Cuota.objects.count(), 6)
+
 
 # Para ejecutar los tests:
-# python manage.py test socios.tests.test_socios
\ No newline at end of file
+# python manage.py test socios.tests.test_socios
+
+class RegistradorAccesosTestCase(APITestCase):
+    """Registros del molinete: escritura en lote, escaneos sin conexión e historial"""
+
+    def test_lote_fallido_se_reintenta_de_a_uno(self):
+        from socios.models.registro_acceso import RegistroAcceso
+        from socios.services.registro_accesos import RegistradorAccesos
+
+        registrador = RegistradorAccesos(tamano_lote=10)
+        with registrador.en_primer_plano():
+            registrador.registrar(None, 'denegado', 'no encontrado', 'x' * 300)
+            registrador.registrar(None, 'denegado', 'no encontrado', '12345678')
+            with mock.patch.object(RegistroAcceso.objects, 'bulk_create', side_effect=RuntimeError('caída')):
+                registrador.flush()
+
+        self.assertEqual(RegistroAcceso.objects.count(), 2)
+        self.assertEqual(len(RegistroAcceso.objects.order_by('id').first().datos_ingresados), 100)
+        self.assertEqual((registrador.escritos, registrador.descartados, registrador.errores), (2, 0, 1))
+
+    def test_reenvio_de_escaneos_sin_conexion_no_duplica(self):
+        from socios.models.registro_acceso import RegistroAcceso, ResumenAccesoDia
+        from socios.services.acceso import conciliar_escaneos
+
+        escaneos = [('99999999', '2024-03-01T18:30:00'), ('99999999', '2024-03-01T18:31:00')]
+        conciliar_escaneos(escaneos)
+        # El molinete reenvía el lote tras un timeout, con un escaneo repetido y uno nuevo
+        resultados = conciliar_escaneos(escaneos + [('99999999', '2024-03-01T18:31:00'), ('99999999', '2024-03-01T18:32:00')])
+
+        self.assertEqual([r['ya_registrado'] for r in resultados], [True, True, True, False])
+        self.assertEqual(RegistroAcceso.objects.count(), 3)
+        self.assertEqual(sum(ResumenAccesoDia.objects.values_list('cantidad', flat=True)), 3)
+
+    def test_historial_paginado_por_cursor(self):
+        from socios.models.registro_acceso import RegistroAcceso
+
+        usuario = Usuario.objects.create(email='molinete@test.com', nombre='Mo', apellido='Linete', contrasena=make_password('x'))
+        inicio = timezone.now() - timedelta(hours=1)
+        RegistroAcceso.objects.bulk_create([
+            RegistroAcceso(estado='aprobado', datos_ingresados=str(i), fecha_hora=inicio + timedelta(minutes=i % 3))
+            for i in range(5)
+        ])
+        token = jwt.encode(
+            {'id': usuario.id, 'email': usuario.email, 'exp': datetime.utcnow() + timedelta(hours=1)},
+            settings.SECRET_KEY, algorithm='HS256'
+        )
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+        vistos, url = [], '/socios/api/control-acceso/historial/?page_size=2'
+        while url:
+            response = self.client.get(url)
+            vistos += [fila['datos_ingresados'] for fila in response.data['results']]
+            url = response.data['next']
+
+        esperados = RegistroAcceso.objects.order_by('-fecha_hora', '-id').values_list('datos_ingresados', flat=True)
+        self.assertEqual(vistos, list(esperados))
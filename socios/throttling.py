@@ -0,0 +1,154 @@
+# socios/throttling.py
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.module_loading import import_string
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+
+class CubetasEnMemoria:
+    """
+    Cubetas de tokens en memoria, locales al proceso.
+
+    Cada clave arranca llena ('capacidad' tokens), cada intento consume uno y se
+    recargan 'por_segundo' tokens de forma continua. Se guardan como mucho
+    LOGIN_THROTTLE_MAXIMO claves: al pasarse se descartan las menos usadas (LRU).
+    """
+
+    def __init__(self, maximo=None):
+        self._lock = threading.Lock()
+        self._cubetas = OrderedDict()  # {clave: (tokens, actualizado_en)}
+        self._maximo = maximo
+
+    def consumir(self, clave, capacidad, por_segundo):
+        """Devuelve (permitido, segundos hasta el próximo token)."""
+        ahora = time.monotonic()
+        maximo = self._maximo or getattr(settings, 'LOGIN_THROTTLE_MAXIMO', 100000)
+        with self._lock:
+            tokens, actualizado_en = self._cubetas.pop(clave, (capacidad, ahora))
+            tokens = min(capacidad, tokens + (ahora - actualizado_en) * por_segundo)
+            permitido = tokens >= 1
+            if permitido:
+                tokens -= 1
+            self._cubetas[clave] = (tokens, ahora)
+            while len(self._cubetas) > maximo:
+                self._cubetas.popitem(last=False)
+        return permitido, 0 if permitido else (1 - tokens) / por_segundo
+
+    def limpiar(self):
+        with self._lock:
+            self._cubetas.clear()
+
+    def __len__(self):
+        return len(self._cubetas)
+
+
+class CubetasEnCache:
+    """
+    Cubetas de tokens en la cache de Django (LOGIN_THROTTLE_CACHE), para compartirlas
+    entre procesos cuando la cache es Redis o Memcached.
+    La lectura y escritura no son atómicas: con mucha concurrencia sobre la misma
+    clave se puede dejar pasar algún intento de más.
+    """
+
+    def __init__(self, alias=None):
+        self._alias = alias
+        self._version = 0
+
+    def consumir(self, clave, capacidad, por_segundo):
+        cache = caches[self._alias or getattr(settings, 'LOGIN_THROTTLE_CACHE', 'default')]
+        clave = f'login_throttle:{self._version}:{clave}'
+        ahora = time.time()
+
+        tokens, actualizado_en = cache.get(clave) or (capacidad, ahora)
+        tokens = min(capacidad, tokens + max(0, ahora - actualizado_en) * por_segundo)
+        permitido = tokens >= 1
+        if permitido:
+            tokens -= 1
+        # Pasado este tiempo la cubeta estaría llena de nuevo: no hace falta guardarla
+        cache.set(clave, (tokens, ahora), timeout=int(capacidad / por_segundo) + 1)
+        return permitido, 0 if permitido else (1 - tokens) / por_segundo
+
+    def limpiar(self):
+        """Deja de ver las cubetas guardadas (solo en este proceso)."""
+        self._version += 1
+
+
+_cubetas = None
+_cubetas_lock = threading.Lock()
+
+
+def cubetas_login():
+    """Backend de cubetas configurado en LOGIN_THROTTLE_BACKEND (uno por proceso)."""
+    global _cubetas
+    ruta = getattr(settings, 'LOGIN_THROTTLE_BACKEND', 'socios.throttling.CubetasEnMemoria')
+    with _cubetas_lock:
+        if _cubetas is None or _cubetas[0] != ruta:
+            _cubetas = (ruta, import_string(ruta)())
+        return _cubetas[1]
+
+
+def reiniciar_cubetas_login():
+    """Vacía las cubetas del login (útil en tests)."""
+    cubetas_login().limpiar()
+
+
+class CubetaLoginThrottle(BaseThrottle):
+    """
+    Throttle de cubeta de tokens para el login. Corre antes de la vista, así que un
+    intento rechazado no consulta la base ni calcula ningún hash.
+    Las subclases definen 'ambito' y cómo se obtiene la clave del request.
+    """
+    ambito = None
+    capacidad = None  # Valores por defecto de LOGIN_THROTTLE_<AMBITO>_CAPACIDAD / _POR_MINUTO
+    por_minuto = None
+
+    def get_clave(self, request):
+        raise NotImplementedError
+
+    def allow_request(self, request, view):
+        clave = self.get_clave(request)
+        if not clave:
+            return True
+        prefijo = f'LOGIN_THROTTLE_{self.ambito.upper()}'
+        capacidad = getattr(settings, f'{prefijo}_CAPACIDAD', self.capacidad)
+        por_minuto = getattr(settings, f'{prefijo}_POR_MINUTO', self.por_minuto)
+        permitido, self.espera = cubetas_login().consumir(
+            f'{self.ambito}:{clave}', capacidad, por_minuto / 60
+        )
+        return permitido
+
+    def wait(self):
+        return self.espera
+
+
+class LoginIPThrottle(CubetaLoginThrottle):
+    """
+    Limita los intentos de login por IP de origen.
+    La IP es REMOTE_ADDR: X-Forwarded-For lo elige el cliente y rotarlo daría una cubeta
+    nueva en cada intento. Detrás de proxies de confianza hay que declarar cuántos son en
+    REST_FRAMEWORK['NUM_PROXIES'] y entonces se toma la IP que agregó el último de ellos.
+    """
+    ambito = 'ip'
+    capacidad = 30
+    por_minuto = 10
+
+    def get_clave(self, request):
+        if api_settings.NUM_PROXIES is None:
+            return request.META.get('REMOTE_ADDR')
+        return self.get_ident(request)
+
+
+class LoginEmailThrottle(CubetaLoginThrottle):
+    """Limita los intentos de login contra una misma cuenta, vengan de donde vengan."""
+    ambito = 'email'
+    capacidad = 5
+    por_minuto = 1
+
+    def get_clave(self, request):
+        email = request.data.get('email') if hasattr(request.data, 'get') else None
+        return str(email).strip().lower() if email else None
@@ -8,12 +8,15 @@ from drf_spectacular.views import (
 
 # Importamos las vistas y ViewSets
 from socios.views import (
-    LoginView, RegisterView, UsuarioViewSet, RolesViewSet,
+    LoginView, RegisterView, RefreshTokenView, LogoutView, UsuarioViewSet, RolesViewSet,
     EventoViewSet, NivelSocioViewSet, SocioInfoViewSet,
     DisciplinaViewSet, CategoriaViewSet, CuotaViewSet, 
     HorarioEntrenamientoViewSet, SesionEntrenamientoViewSet, 
 )
-from socios.views.acceso import validar_acceso, HistorialAccesoView
+from socios.views.acceso import (
+    validar_acceso, validar_accesos_lote, HistorialAccesoView, EstadisticasAccesoView, EstadoRegistroAccesosView
+)
+from socios.views.pagos import webhook_pagos
 
 router = routers.DefaultRouter()
 router.register(r'usuarios', UsuarioViewSet, 'usuarios')
@@ -39,8 +42,16 @@ urlpatterns = [
     # Autenticación
     path("login/", LoginView.as_view(), name="login"),
     path("register/", RegisterView.as_view(), name="register"),
+    path("auth/refresh/", RefreshTokenView.as_view(), name="auth_refresh"),
+    path("auth/logout/", LogoutView.as_view(), name="auth_logout"),
 
     # Control de Acceso
     path('api/control-acceso/', validar_acceso, name='control_acceso'),
+    path('api/control-acceso/lote/', validar_accesos_lote, name='control_acceso_lote'),
+    path('api/control-acceso/estadisticas/', EstadisticasAccesoView.as_view(), name='estadisticas_acceso'),
     path('api/control-acceso/historial/', HistorialAccesoView.as_view(), name='historial_acceso'),
+    path('api/control-acceso/registro/estado/', EstadoRegistroAccesosView.as_view(), name='estado_registro_accesos'),
+
+    # Pagos
+    path('api/pagos/webhook/', webhook_pagos, name='webhook_pagos'),
 ]
\ No newline at end of file
@@ -1,4 +1,4 @@
-from .auth import LoginView, RegisterView
+from .auth import LoginView, RegisterView, RefreshTokenView, LogoutView
 from .usuario import UsuarioViewSet
 from .rol import RolesViewSet
 from .evento import EventoViewSet
@@ -9,6 +9,8 @@ from .disciplina import DisciplinaViewSet, CategoriaViewSet, HorarioEntrenamient
 __all__ = [
     'LoginView',
     'RegisterView',
+    'RefreshTokenView',
+    'LogoutView',
     'UsuarioViewSet',
     'RolesViewSet',
     'EventoViewSet',
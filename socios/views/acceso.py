@@ -1,21 +1,35 @@
 from rest_framework import generics
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
+from rest_framework.exceptions import ValidationError
+from django.conf import settings
 from django.utils import timezone
-from django.db.models import Q
-from datetime import datetime, time 
+from django.utils.dateparse import parse_date, parse_datetime
+from datetime import datetime, time, timedelta
 
 # Modelos
-from ..models.socio import SocioInfo
-from ..models.usuario import Usuario
-from ..models.cuota import Cuota
-from ..models.evento import Evento
 from ..models.registro_acceso import RegistroAcceso
 
+# Servicios
+from ..services.credenciales import indice_credenciales
+from ..services.registro_accesos import registrador_accesos
+from ..services.acceso import limpiar_codigo, evaluar_acceso, conciliar_escaneos
+from ..services.eventos_proximos import eventos_proximos
+from ..services.resumen_accesos import estadisticas_accesos
+from ..services.archivo_accesos import HistorialArchivado
+
 # Serializers
 from ..serializers.registro_acceso import RegistroAccesoSerializer
+from ..permissions import RolePermission
+from ..pagination import HistorialAccesoPagination
+
+DIAS_ES = {
+    0: "lunes", 1: "martes", 2: "miércoles", 3: "jueves",
+    4: "viernes", 5: "sábado", 6: "domingo"
+}
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
@@ -27,26 +41,23 @@ def validar_acceso(request):
             return Response({'error': 'Código vacío'}, status=status.HTTP_400_BAD_REQUEST)
 
         # Limpieza de datos
-        qr_data_limpio = qr_data.replace("'", "-").replace('"', '-').strip()
-        usuario = None
+        qr_data_limpio = limpiar_codigo(qr_data)
 
         # --- Función auxiliar para registrar en BD y responder ---
-        def registrar_y_responder(estado, mensaje, motivo_bd, motivo_front, usuario_obj=None, tts=None):
-            try:
-                RegistroAcceso.objects.create(
-                    usuario=usuario_obj,
-                    estado=estado,
-                    motivo=motivo_bd,
-                    datos_ingresados=qr_data_limpio
-                )
-            except Exception as ex:
-                print(f"Error guardando registro de acceso: {ex}")
+        def registrar_y_responder(veredicto, credencial=None, tts=None):
+            # El INSERT se hace en segundo plano, fuera del camino de la respuesta
+            registrador_accesos.registrar(
+                usuario_id=credencial.usuario_id if credencial else None,
+                estado=veredicto.estado,
+                motivo=veredicto.motivo_bd,
+                datos_ingresados=qr_data_limpio
+            )
 
             respuesta = {
-                'estado': estado,
-                'mensaje': mensaje,
-                'socio': f"{usuario_obj.nombre} {usuario_obj.apellido}" if usuario_obj else 'Desconocido',
-                'motivo': motivo_front
+                'estado': veredicto.estado,
+                'mensaje': veredicto.mensaje,
+                'socio': credencial.nombre_completo if credencial else 'Desconocido',
+                'motivo': veredicto.motivo_front
             }
             if tts:
                 respuesta['texto_tts'] = tts
@@ -54,107 +65,33 @@ def validar_acceso(request):
             return Response(respuesta)
         # ---------------------------------------------------------
 
-        # 1. Búsqueda del usuario (QR Token, DNI o ID)
-        try:
-            usuario = Usuario.objects.get(qr_token=qr_data_limpio)
-        except (Usuario.DoesNotExist, ValueError):
-            try:
-                usuario = Usuario.objects.get(nro_documento=qr_data_limpio)
-            except Usuario.DoesNotExist:
-                if str(qr_data_limpio).isdigit():
-                    try:
-                        usuario = Usuario.objects.get(id=qr_data_limpio)
-                    except Usuario.DoesNotExist:
-                        pass
-
-        if not usuario:
-            return registrar_y_responder(
-                'denegado', 
-                f'Usuario NO ENCONTRADO (Leído: {qr_data_limpio})', 
-                'Usuario no encontrado', 
-                'error'
-            )
-
-        nombre_completo = f"{usuario.nombre} {usuario.apellido}"
+        # 1. Búsqueda del usuario (QR Token, DNI o ID) en el índice en memoria
+        credencial = indice_credenciales.buscar(qr_data_limpio)
 
-        # 2. Verificar si es Socio
-        try:
-            socio_info = usuario.socioinfo
-        except SocioInfo.DoesNotExist:
-            return registrar_y_responder(
-                'denegado', 
-                'NO ES SOCIO', 
-                'No es socio', 
-                'no_socio', 
-                usuario
-            )
-
-        # 3. Verificar si está Activo
-        if socio_info.estado != 'activo':
-            return registrar_y_responder(
-                'denegado', 
-                f'Socio {socio_info.get_estado_display().upper()}', 
-                'Socio inactivo', 
-                'inactivo', 
-                usuario
-            )
-
-        # 4. Verificar Cuotas Vencidas
+        # 2. Si venció otra cuota desde el último cálculo, se recalcula la fila del socio
         hoy = timezone.now().date()
-        
-        cuotas_impagas = Cuota.objects.filter(
-            usuario=usuario,
-            vencimiento__lt=hoy
-        ).exclude(
-            pago__estado='completado'
-        )
+        if credencial and not credencial.deuda_vigente(hoy):
+            credencial = indice_credenciales.actualizar_usuario(credencial.usuario_id) or credencial
 
-        if cuotas_impagas.exists():
-            cantidad = cuotas_impagas.count()
-            return registrar_y_responder(
-                'denegado', 
-                f'ACCESO DENEGADO: Debe {cantidad} cuota(s)', 
-                'Deuda de cuotas', 
-                'deuda', 
-                usuario
-            )
+        # 3. Reglas: socio, activo y sin cuotas vencidas
+        veredicto = evaluar_acceso(qr_data_limpio, credencial)
+        if veredicto.estado != 'aprobado':
+            return registrar_y_responder(veredicto, credencial)
 
-        # 5. Acceso Permitido
-        mensaje_voz = f"Hola {usuario.nombre}." 
+        # 4. Acceso Permitido
+        mensaje_voz = f"Hola {credencial.nombre}." 
         
         try:
-            inicio_rango = timezone.make_aware(datetime.combine(hoy, time.min))
-            fin_rango = inicio_rango + timezone.timedelta(days=7)
-
-            eventos_proximos = Evento.objects.filter(
-                fecha_inicio__gte=inicio_rango,
-                fecha_inicio__lte=fin_rango
-            ).filter(
-                Q(categoria__isnull=True) | 
-                Q(categoria=socio_info.categoria)
-            ).order_by('fecha_inicio')
-
-            evento_cercano = eventos_proximos.first()
+            evento_cercano = eventos_proximos.proximo(credencial.categoria_id, hoy)
 
             if evento_cercano:
-                dias_es = {
-                    0: "lunes", 1: "martes", 2: "miércoles", 3: "jueves", 
-                    4: "viernes", 5: "sábado", 6: "domingo"
-                }
-                dia_semana = dias_es[evento_cercano.fecha_inicio.weekday()]
-                mensaje_voz = f"Hola {usuario.nombre}. Recuerda: {evento_cercano.titulo}, el próximo {dia_semana}."
+                dia_semana = DIAS_ES[evento_cercano.fecha_inicio.weekday()]
+                mensaje_voz = f"Hola {credencial.nombre}. Recuerda: {evento_cercano.titulo}, el próximo {dia_semana}."
 
         except Exception as e:
             print(f"Error buscando eventos para TTS: {e}")
 
-        return registrar_y_responder(
-            'aprobado', 
-            'BIENVENIDO', 
-            'Cuota al día', 
-            'ok', 
-            usuario, 
-            tts=mensaje_voz
-        )
+        return registrar_y_responder(veredicto, credencial, tts=mensaje_voz)
 
     except Exception as e:
         print(f"❌ Error en validación de acceso: {str(e)}")
@@ -164,8 +101,146 @@ def validar_acceso(request):
             'socio': 'Sistema'
         }, status=status.HTTP_200_OK)
 
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def validar_accesos_lote(request):
+    """
+    Concilia escaneos que el molinete tomó sin conexión.
+    Espera: { "escaneos": [{"qr_data": "...", "fecha_hora": "2025-03-01T18:30:00"}, ...] }
+    (también acepta pares ["qr_data", "fecha_hora"]).
+    Reenviar el mismo lote no duplica el historial: cada escaneo se identifica por código y hora.
+    """
+    escaneos = request.data.get('escaneos')
+    if not isinstance(escaneos, list) or not escaneos:
+        return Response({'error': 'Debe enviar una lista de escaneos.'}, status=status.HTTP_400_BAD_REQUEST)
+
+    maximo = getattr(settings, 'CONTROL_ACCESO_LOTE_MAXIMO', 10000)
+    if len(escaneos) > maximo:
+        return Response(
+            {'error': f'El lote supera el máximo de {maximo} escaneos.'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    pares = []
+    for escaneo in escaneos:
+        if isinstance(escaneo, dict):
+            pares.append((escaneo.get('qr_data'), escaneo.get('fecha_hora')))
+        elif isinstance(escaneo, (list, tuple)) and len(escaneo) == 2:
+            pares.append((escaneo[0], escaneo[1]))
+        else:
+            pares.append((None, None))
+
+    resultados = conciliar_escaneos(pares)
+    return Response({
+        'procesados': len(resultados),
+        'aprobados': sum(1 for r in resultados if r['estado'] == 'aprobado'),
+        'denegados': sum(1 for r in resultados if r['estado'] == 'denegado'),
+        'invalidos': sum(1 for r in resultados if r['estado'] == 'invalido'),
+        'ya_registrados': sum(1 for r in resultados if r.get('ya_registrado')),
+        'resultados': resultados,
+    })
+
 # Vista para el Historial
 class HistorialAccesoView(generics.ListAPIView):
-    queryset = RegistroAcceso.objects.all().order_by('-fecha_hora') 
+    """
+    Historial del molinete, paginado por cursor (más recientes primero).
+    Incluye los meses archivados que toque el rango pedido.
+    Filtros: ?desde=AAAA-MM-DD&hasta=AAAA-MM-DD (o fecha y hora ISO), ?estado=, ?usuario=<id>
+    """
     serializer_class = RegistroAccesoSerializer
-    permission_classes = [IsAuthenticated]
\ No newline at end of file
+    permission_classes = [IsAuthenticated]
+    pagination_class = HistorialAccesoPagination
+
+    def get_queryset(self):
+        params = self.request.query_params
+        filtros = {'desde': None, 'hasta': None, 'estado': params.get('estado') or None, 'usuario_id': None}
+
+        if params.get('desde'):
+            filtros['desde'], _ = _parsear_limite(params['desde'], 'desde')
+
+        if params.get('hasta'):
+            # Límite excluido. Con una fecha sola se incluye el día completo
+            limite, solo_fecha = _parsear_limite(params['hasta'], 'hasta')
+            filtros['hasta'] = limite + (timedelta(days=1) if solo_fecha else timedelta(microseconds=1))
+
+        usuario = params.get('usuario')
+        if usuario:
+            if not usuario.isdigit():
+                raise ValidationError({'usuario': 'Debe ser el ID del usuario.'})
+            filtros['usuario_id'] = int(usuario)
+
+        # Los meses archivados del rango se leen de sus archivos (ver HistorialAccesoPagination)
+        self.historial_archivado = HistorialArchivado(**filtros)
+
+        queryset = RegistroAcceso.objects.select_related('usuario')
+        if filtros['desde']:
+            queryset = queryset.filter(fecha_hora__gte=filtros['desde'])
+        if filtros['hasta']:
+            queryset = queryset.filter(fecha_hora__lt=filtros['hasta'])
+        if filtros['estado']:
+            queryset = queryset.filter(estado=filtros['estado'])
+        if filtros['usuario_id']:
+            queryset = queryset.filter(usuario_id=filtros['usuario_id'])
+        return queryset
+
+
+class EstadisticasAccesoView(APIView):
+    """
+    Datos para el tablero de ocupación, leídos de los resúmenes (no del historial crudo).
+    Parámetros: ?desde=AAAA-MM-DD&hasta=AAAA-MM-DD&agrupacion=hora|dia
+    Por defecto, los últimos 7 días agrupados por día.
+    """
+    permission_classes = [IsAuthenticated]
+    MAXIMO_DIAS = {'hora': 31, 'dia': 366}
+
+    def get(self, request):
+        hoy = timezone.now().date()
+        try:
+            hasta = parse_date(request.query_params.get('hasta') or '') or hoy
+            desde = parse_date(request.query_params.get('desde') or '') or hasta - timedelta(days=6)
+        except ValueError:
+            return Response({'error': 'Fechas inválidas. Use AAAA-MM-DD.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        agrupacion = request.query_params.get('agrupacion', 'dia')
+        if agrupacion not in self.MAXIMO_DIAS:
+            return Response({'error': "La agrupación debe ser 'hora' o 'dia'."}, status=status.HTTP_400_BAD_REQUEST)
+        if desde > hasta:
+            return Response({'error': "'desde' no puede ser posterior a 'hasta'."}, status=status.HTTP_400_BAD_REQUEST)
+        if (hasta - desde).days + 1 > self.MAXIMO_DIAS[agrupacion]:
+            return Response(
+                {'error': f'El rango máximo para la agrupación por {agrupacion} es de {self.MAXIMO_DIAS[agrupacion]} días.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        return Response(estadisticas_accesos(desde, hasta, agrupacion))
+
+
+def _parsear_limite(valor, parametro):
+    """
+    Acepta 'AAAA-MM-DD' (inicio del día) o una fecha y hora ISO.
+    Devuelve (fecha_hora, solo_fecha).
+    """
+    try:
+        # La fecha sola va primero: parse_datetime también la acepta (como medianoche)
+        fecha = parse_date(valor)
+        solo_fecha = fecha is not None
+        if solo_fecha:
+            fecha_hora = datetime.combine(fecha, time.min)
+        else:
+            fecha_hora = parse_datetime(valor)
+            if fecha_hora is None:
+                raise ValidationError({parametro: 'Formato inválido. Use AAAA-MM-DD o fecha y hora ISO.'})
+    except ValueError:
+        raise ValidationError({parametro: 'Fecha inexistente.'})
+    if timezone.is_naive(fecha_hora):
+        fecha_hora = timezone.make_aware(fecha_hora)
+    return fecha_hora, solo_fecha
+
+
+class EstadoRegistroAccesosView(APIView):
+    """Estado de la cola de registros de acceso de este proceso (pendientes, descartados...)."""
+    permission_classes = [RolePermission]
+    required_roles = ['admin']
+
+    def get(self, request):
+        return Response(registrador_accesos.estadisticas())
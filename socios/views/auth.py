@@ -1,19 +1,30 @@
 import jwt
-from datetime import datetime, timedelta
 from django.conf import settings
-from django.contrib.auth.hashers import check_password
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
-from rest_framework.permissions import AllowAny
+from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.exceptions import Throttled
 
 from socios.models import Usuario
+from socios.authentication import emitir_tokens
+from socios.services.revocacion import revocacion_tokens
+from socios.services.contrasenas import (
+    PoolContrasenasSaturado, hashear_contrasena, verificar_contrasena,
+)
 from socios.serializers import RegisterSerializer, UsuarioSerializer
+from socios.throttling import LoginIPThrottle, LoginEmailThrottle
 
 
 class LoginView(APIView):
     """Vista para autenticación de usuarios"""
     permission_classes = [AllowAny]
+    authentication_classes = []  # Un token vencido o desactualizado no debe impedir el login
+    # Se evalúan antes de post(): un intento rechazado no llega a la base ni al hash
+    throttle_classes = [LoginIPThrottle, LoginEmailThrottle]
+
+    def throttled(self, request, wait):
+        raise Throttled(wait, detail="Demasiados intentos de inicio de sesión. Intente más tarde.")
 
     def post(self, request):
         email = request.data.get("email")
@@ -33,30 +44,96 @@ class LoginView(APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        if not check_password(contrasena, usuario.contrasena):
+        # El PBKDF2 corre en el pool de procesos, no en el hilo del request
+        try:
+            valida, necesita_rehash = verificar_contrasena(contrasena, usuario.contrasena)
+        except PoolContrasenasSaturado:
+            return Response(
+                {"error": "Demasiados inicios de sesión simultáneos. Intente nuevamente."},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE
+            )
+
+        if not valida:
             return Response(
                 {"error": "Contraseña incorrecta"},
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        roles = list(usuario.roles.values_list('nombre', flat=True))
-        payload = {
-            "id": usuario.id,
-            "email": usuario.email,
-            "roles": roles,
-            "exp": datetime.utcnow() + timedelta(hours=2),
-        }
-        token = jwt.encode(payload, settings.SECRET_KEY, algorithm="HS256")
+        if necesita_rehash:
+            # Cambió el costo configurado: se guarda el hash nuevo de forma transparente
+            Usuario.objects.filter(pk=usuario.pk).update(contrasena=hashear_contrasena(contrasena))
+
+        # Token de acceso corto + refresh token para renovarlo sin volver a hashear
+        tokens = emitir_tokens(usuario)
         # El serializer se encarga de construir el objeto JSON correctamente,
         # incluyendo el campo anidado 'socioinfo'.
         serializer = UsuarioSerializer(usuario)
 
         return Response({
-            "token": token,
+            **tokens,
             "usuario": serializer.data
         })
 
 
+class RefreshTokenView(APIView):
+    """
+    Emite un token de acceso nuevo a partir de un refresh token, sin verificar la contraseña.
+    El refresh token usado se revoca y se entrega uno nuevo (rotación).
+    """
+    permission_classes = [AllowAny]
+    authentication_classes = []
+
+    def post(self, request):
+        refresh = request.data.get("refresh")
+        if not refresh:
+            return Response(
+                {"error": "Refresh token requerido"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            payload = jwt.decode(refresh, settings.SECRET_KEY, algorithms=['HS256'])
+        except jwt.ExpiredSignatureError:
+            return Response({"error": "Refresh token expirado"}, status=status.HTTP_401_UNAUTHORIZED)
+        except jwt.InvalidTokenError:
+            return Response({"error": "Refresh token inválido"}, status=status.HTTP_401_UNAUTHORIZED)
+
+        if payload.get("typ") != "refresh" or "jti" not in payload:
+            return Response({"error": "Refresh token inválido"}, status=status.HTTP_401_UNAUTHORIZED)
+        if revocacion_tokens.esta_revocado(payload["jti"], payload["exp"]):
+            return Response({"error": "Refresh token revocado"}, status=status.HTTP_401_UNAUTHORIZED)
+
+        usuario = Usuario.objects.filter(id=payload.get("id")).first()
+        if usuario is None:
+            return Response({"error": "Usuario no encontrado"}, status=status.HTTP_401_UNAUTHORIZED)
+
+        # Revocar es el chequeo definitivo: de dos refresh simultáneos con el mismo token
+        # solo uno lo revoca; el otro cuenta como reuso
+        if not revocacion_tokens.revocar(payload["jti"], payload["exp"]):
+            return Response({"error": "Refresh token revocado"}, status=status.HTTP_401_UNAUTHORIZED)
+
+        # El token nuevo lleva los roles vigentes, aunque hayan cambiado desde el login
+        return Response(emitir_tokens(usuario))
+
+
+class LogoutView(APIView):
+    """Revoca el token de acceso actual y, si se envía, el refresh token."""
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        for token in (request.auth, request.data.get("refresh")):
+            if not token:
+                continue
+            try:
+                payload = jwt.decode(token, settings.SECRET_KEY, algorithms=['HS256'])
+            except jwt.InvalidTokenError:
+                continue
+            if "jti" in payload and payload.get("id") == request.user.id:
+                revocacion_tokens.revocar(payload["jti"], payload["exp"])
+
+        return Response({"message": "Sesión cerrada."})
+
+
 class RegisterView(APIView):
     """Vista para registro de nuevos usuarios"""
     permission_classes = [AllowAny]
@@ -64,7 +141,13 @@ class RegisterView(APIView):
     def post(self, request):
         serializer = RegisterSerializer(data=request.data)
         if serializer.is_valid():
-            serializer.save()
+            try:
+                serializer.save()
+            except PoolContrasenasSaturado:
+                return Response(
+                    {"error": "Demasiados registros simultáneos. Intente nuevamente."},
+                    status=status.HTTP_503_SERVICE_UNAVAILABLE
+                )
             return Response(
                 {"message": "Usuario registrado correctamente."},
                 status=status.HTTP_201_CREATED
@@ -4,11 +4,18 @@ from rest_framework import viewsets, status
 from rest_framework.permissions import IsAuthenticated
 from socios.models import Cuota, Pago 
 from socios.serializers import CuotaSerializer
-from socios.permissions import RolePermission
+from socios.permissions import RolePermission, roles_de
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from django.utils import timezone
 from django.db import transaction
+from django.db.models import Count, Q, Sum
+from socios.pagination import CuotaCursorPagination
+from socios.services.pagos import registrar_pagos
+from socios.services.exportacion import exportacion, csv_en_stream, xlsx_en_stream
+from socios.services.conciliacion_bancaria import conciliar_extracto, formato_de, leer_extracto
+from django.http import StreamingHttpResponse
+import io
 
 class CuotaViewSet(viewsets.ModelViewSet):
     """
@@ -18,9 +25,18 @@ class CuotaViewSet(viewsets.ModelViewSet):
     - /cuotas/?estado=pendiente
     - /cuotas/?estado=pagada
     - /cuotas/?periodo=YYYY-MM
+
+    Opcionales para listados grandes:
+    - ?cursor=... / ?page_size=N  paginación por cursor sobre (periodo, id)
+    - ?fields=id,periodo,pagada   solo esos campos en cada cuota
+    - ?totals=1                   totales del filtro (monto, pendientes, saldo) calculados en SQL
+
+    Para contabilidad: /cuotas/exportar/?tipo=cuotas|pagos&formato=csv|xlsx
+    (con los mismos filtros) descarga todo el historial en streaming.
     """
     serializer_class = CuotaSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = CuotaCursorPagination
 
     def get_queryset(self):
         """
@@ -32,7 +48,7 @@ class CuotaViewSet(viewsets.ModelViewSet):
         # --- PASO 1: Establecer el queryset base según el rol ---
         
         roles_de_gestion = ['admin', 'dirigente', 'profesor']
-        es_gestion = user.roles.filter(nombre__in=roles_de_gestion).exists()
+        es_gestion = any(rol in roles_de_gestion for rol in roles_de(user))
         
         if es_gestion:
             # El personal de gestión puede ver todo por defecto
@@ -41,6 +57,10 @@ class CuotaViewSet(viewsets.ModelViewSet):
             # Los usuarios normales solo ven lo suyo
             queryset = Cuota.objects.filter(usuario=user)
 
+        # El estado de pago es una columna de Cuota y usuario/categoría vienen en un JOIN:
+        # el listado cuesta una sola consulta, sin importar cuántas cuotas tenga
+        queryset = queryset.select_related('usuario', 'categoria')
+
         # --- PASO 2: Aplicar filtros desde los query params de la URL ---
 
         # Obtener los parámetros de la URL, por ej: /api/v1/cuotas/?usuario=15&estado=pendiente
@@ -58,15 +78,12 @@ class CuotaViewSet(viewsets.ModelViewSet):
         # Filtrar por estado de la cuota (pendiente o pagada)
         estado = params.get('estado', None)
         if estado:
-            # Obtenemos los IDs de las cuotas que tienen un pago 'completado'
-            pagadas_ids = Pago.objects.filter(estado='completado').values_list('cuota_id', flat=True)
-            
             if estado.lower() == 'pendiente':
                 # Excluimos las cuotas que ya están pagadas
-                queryset = queryset.exclude(id__in=pagadas_ids)
+                queryset = queryset.exclude(estado_pago='pagada')
             elif estado.lower() == 'pagada':
                 # Incluimos solo las cuotas que están pagadas
-                queryset = queryset.filter(id__in=pagadas_ids)
+                queryset = queryset.filter(estado_pago='pagada')
 
         # Filtrar por período (ej: ?periodo=2025-01)
         periodo = params.get('periodo', None)
@@ -76,20 +93,164 @@ class CuotaViewSet(viewsets.ModelViewSet):
         # --- PASO 3: Devolver el queryset final ordenado ---
         return queryset.order_by('-periodo')
 
+    def get_serializer(self, *args, **kwargs):
+        campos = self.request.query_params.get('fields') if self.request else None
+        if campos and self.request.method == 'GET':
+            kwargs['campos'] = [c.strip() for c in campos.split(',') if c.strip()]
+        return super().get_serializer(*args, **kwargs)
+
+    def paginate_queryset(self, queryset):
+        # Sin 'cursor' ni 'page_size' se mantiene la respuesta de siempre: la lista completa
+        params = self.request.query_params
+        if 'cursor' not in params and 'page_size' not in params:
+            return None
+        return super().paginate_queryset(queryset)
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        totales = self._totales(queryset) if request.query_params.get('totals') == '1' else None
+
+        pagina = self.paginate_queryset(queryset)
+        if pagina is not None:
+            response = self.get_paginated_response(self.get_serializer(pagina, many=True).data)
+            if totales is not None:
+                response.data['totales'] = totales
+            return response
+
+        data = self.get_serializer(queryset, many=True).data
+        if totales is not None:
+            return Response({'results': data, 'totales': totales})
+        return Response(data)
+
+    def _totales(self, queryset):
+        """Una sola consulta agregada sobre todo el filtro, no solo sobre la página."""
+        impagas = ~Q(estado_pago='pagada')
+        totales = queryset.order_by().aggregate(
+            cantidad=Count('id'),
+            monto_total=Sum('monto'),
+            pendientes=Count('id', filter=impagas),
+            saldo_pendiente=Sum('saldo', filter=impagas),
+        )
+        for clave in ('monto_total', 'saldo_pendiente'):
+            totales[clave] = float(totales[clave] or 0)
+        return totales
+
     def get_permissions(self):
-        """Solo admins pueden crear/modificar/eliminar cuotas"""
-        if self.action in ['create', 'update', 'partial_update', 'destroy']:
+        """Solo admins pueden crear/modificar/eliminar cuotas y cobrar en caja"""
+        if self.action in ['create', 'update', 'partial_update', 'destroy', 'registrar_pagos', 'conciliar_extracto']:
             permission_classes = [RolePermission]
             self.required_roles = ['admin']
         else:
             permission_classes = [IsAuthenticated]
         return [permission() for permission in permission_classes]
     
+    @action(detail=False, methods=['get'], url_path='exportar')
+    def exportar(self, request):
+        """
+        Exporta las cuotas del filtro, o sus pagos, como CSV o XLSX.
+        Las filas se leen con un cursor por lotes y se escriben a medida que salen,
+        así la memoria no crece con el tamaño del historial.
+        """
+        tipo = request.query_params.get('tipo', 'cuotas')
+        formato = request.query_params.get('formato', 'csv')
+        if tipo not in ('cuotas', 'pagos'):
+            return Response({"error": "'tipo' debe ser 'cuotas' o 'pagos'."}, status=status.HTTP_400_BAD_REQUEST)
+        if formato not in ('csv', 'xlsx'):
+            return Response({"error": "'formato' debe ser 'csv' o 'xlsx'."}, status=status.HTTP_400_BAD_REQUEST)
+
+        encabezados, filas = exportacion(self.get_queryset(), tipo)
+        if formato == 'csv':
+            response = StreamingHttpResponse(csv_en_stream(encabezados, filas), content_type='text/csv; charset=utf-8')
+        else:
+            response = StreamingHttpResponse(
+                xlsx_en_stream(encabezados, filas, hoja=tipo.capitalize()),
+                content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+            )
+        nombre = f"{tipo}_{timezone.localdate():%Y%m%d}.{formato}"
+        response['Content-Disposition'] = f'attachment; filename="{nombre}"'
+        return response
+
+    @action(detail=False, methods=['post'], url_path='registrar-pagos')
+    def registrar_pagos(self, request):
+        """
+        Carga masiva de caja: registra el pago de cuotas de uno o muchos socios a la vez.
+        Espera: {
+            "cuota_ids": [1, 2, 35, 40],
+            "medio_pago": "efectivo",
+            "comprobante": "..."
+        }
+        Las cuotas que no existen o ya están pagadas se saltean.
+        """
+        cuota_ids = request.data.get('cuota_ids', [])
+        medio_pago = request.data.get('medio_pago')
+        comprobante = request.data.get('comprobante')
+
+        if not cuota_ids or not isinstance(cuota_ids, list):
+            return Response({"error": "No se seleccionaron cuotas para pagar."}, status=status.HTTP_400_BAD_REQUEST)
+        if not medio_pago:
+            return Response({"error": "Debe especificar el medio de pago."}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            cuota_ids = [int(cuota_id) for cuota_id in cuota_ids]
+        except (ValueError, TypeError):
+            return Response({"error": "'cuota_ids' debe ser una lista de IDs numéricos."}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            lote = registrar_pagos(cuota_ids, medio_pago, comprobante)
+        except Exception as e:
+            return Response({"error": f"Error al registrar pagos: {str(e)}"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+        if lote.vacio:
+            return Response({"error": "Las cuotas seleccionadas no existen o ya están pagadas."}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response({
+            "message": "Pagos registrados exitosamente.",
+            "pagos_registrados": lote.pagos,
+            "cuotas_pagadas": lote.cuotas,
+            "socios": lote.socios,
+            "total_pagado": lote.total,
+            "omitidas": len(set(cuota_ids)) - lote.cuotas,
+        }, status=status.HTTP_200_OK)
+
+    @action(detail=False, methods=['post'], url_path='conciliar-extracto')
+    def conciliar_extracto(self, request):
+        """
+        Sube un extracto bancario (multipart, campo 'archivo', .csv u .ofx) y registra
+        los pagos por transferencia que se pueden conciliar con cuotas pendientes.
+        Con 'simular=1' solo informa el resultado. Devuelve las líneas sin conciliar.
+        """
+        archivo = request.FILES.get('archivo')
+        if not archivo:
+            return Response({"error": "Debe adjuntar el extracto en el campo 'archivo'."}, status=status.HTTP_400_BAD_REQUEST)
+
+        simular = str(request.data.get('simular', '')).lower() in ('1', 'true')
+        try:
+            formato = formato_de(archivo.name)
+            # Se lee del archivo subido línea por línea, sin cargarlo entero
+            lineas = io.TextIOWrapper(archivo.file, encoding='utf-8-sig', newline='')
+            resultado = conciliar_extracto(leer_extracto(lineas, formato), simular=simular, nombre_archivo=archivo.name)
+        except (ValueError, UnicodeDecodeError) as e:
+            return Response({"error": f"No se pudo leer el extracto: {e}"}, status=status.HTTP_400_BAD_REQUEST)
+
+        maximo = 1000
+        return Response({
+            "message": "Simulación de conciliación." if simular else "Extracto conciliado.",
+            "lineas": resultado.lineas,
+            "conciliadas": resultado.conciliadas,
+            "ya_registradas": resultado.ya_registradas,
+            "ignoradas": resultado.ignoradas,
+            "pagos_registrados": 0 if simular else resultado.pagos,
+            "total_pagado": resultado.total,
+            "sin_conciliar_total": len(resultado.sin_conciliar),
+            "sin_conciliar": [linea._asdict() for linea in resultado.sin_conciliar[:maximo]],
+        }, status=status.HTTP_200_OK)
+
     @action(detail=True, methods=['post'], url_path='simular-pago-mp')
     def simular_pago_mp(self, request, pk=None):
         """
         SIMULACIÓN: Registra un pago para una cuota como si viniera de Mercado Pago.
-        Esta acción es para desarrollo y debe ser reemplazada por un webhook real.
+        Esta acción es para desarrollo; los pagos reales llegan por el webhook
+        (/socios/api/pagos/webhook/, ver views/pagos.py).
         """
         try:
             # Obtener la cuota y verificar permisos y estado
@@ -100,18 +261,18 @@ class CuotaViewSet(viewsets.ModelViewSet):
                     status=status.HTTP_403_FORBIDDEN
                 )
             
-            if Pago.objects.filter(cuota=cuota, estado='completado').exists():
+            if cuota.estado_pago == 'pagada':
                 return Response(
                     {"error": "Esta cuota ya ha sido pagada."},
                     status=status.HTTP_400_BAD_REQUEST
                 )
 
-            # Crear el registro de Pago
+            # Crear el registro de Pago por lo que falta cobrar (una cuota parcial no se paga dos veces)
             # Usamos una transacción para asegurar la integridad de los datos
             with transaction.atomic():
                 Pago.objects.create(
                     cuota=cuota,
-                    monto=cuota.monto,
+                    monto=cuota.saldo,
                     estado='completado',
                     medio_pago='mercado_pago_simulado', # Usamos un nombre claro
                     fecha=timezone.now(),
@@ -0,0 +1,46 @@
+# socios/views/pagos.py
+
+import json
+
+from rest_framework import status
+from rest_framework.decorators import api_view, authentication_classes, permission_classes
+from rest_framework.permissions import AllowAny
+from rest_framework.response import Response
+
+from socios.services.notificaciones_pago import NotificacionInvalida, encolar_notificacion, firma_valida
+
+
+@api_view(['POST'])
+@authentication_classes([])
+@permission_classes([AllowAny])
+def webhook_pagos(request):
+    """
+    Webhook del proveedor de pagos. Espera el cuerpo firmado con HMAC-SHA256
+    (PAGOS_WEBHOOK_SECRETO) en el header X-Signature:
+    {
+        "referencia_externa": "evt-123",   # ID de la notificación (clave de deduplicación)
+        "referencia_pago": "pay-456",      # ID del pago (opcional, por defecto la anterior)
+        "cuota_id": 10,
+        "monto": 15000,
+        "estado": "approved"
+    }
+    Solo valida y encola: el pago se aplica después con procesar_notificaciones_pago,
+    así el proveedor recibe la respuesta enseguida aunque lleguen muchas juntas.
+    """
+    # La firma se calcula sobre los bytes tal cual llegaron, antes de parsear
+    cuerpo = request.body
+    if not firma_valida(cuerpo, request.headers.get('X-Signature')):
+        return Response({"error": "Firma inválida."}, status=status.HTTP_401_UNAUTHORIZED)
+
+    try:
+        creada = encolar_notificacion(json.loads(cuerpo))
+    except (ValueError, UnicodeDecodeError) as e:
+        # NotificacionInvalida y JSON mal formado
+        mensaje = str(e) if isinstance(e, NotificacionInvalida) else "El cuerpo no es un JSON válido."
+        return Response({"error": mensaje}, status=status.HTTP_400_BAD_REQUEST)
+
+    # Una notificación repetida también se confirma: si no, el proveedor la sigue reenviando
+    return Response(
+        {"status": "encolada" if creada else "duplicada"},
+        status=status.HTTP_202_ACCEPTED if creada else status.HTTP_200_OK,
+    )
@@ -3,13 +3,17 @@
 from datetime import timedelta
 from django.utils import timezone
 from django.db import transaction
+from django.db.models import Sum
+from django.db.models.functions import Coalesce
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
-from socios.models import Usuario, UsuarioRol, Rol, NivelSocio, SocioInfo, Cuota, Pago, HistorialEstado
+from socios.models import Usuario, UsuarioRol, Rol, NivelSocio, SocioInfo, Cuota, HistorialEstado
 from socios.serializers import UsuarioSerializer, SocioInfoSerializer, CuotaSerializer
 from socios.permissions import RolePermission
+from socios.authentication import generar_token
+from socios.services.pagos import registrar_pagos
 
 
 class UsuarioViewSet(viewsets.ModelViewSet):
@@ -49,14 +53,16 @@ class UsuarioViewSet(viewsets.ModelViewSet):
                 socio_info = usuario.socioinfo
                 if socio_info.estado == 'inactivo':
                     # Verificar si tiene cuotas sin pagar para bloquear la reactivación
-                    cuotas_pendientes = Cuota.objects.filter(usuario=usuario).exclude(
-                        id__in=Pago.objects.filter(estado='completado').values_list('cuota_id', flat=True)
-                    )
+                    cuotas_pendientes = Cuota.objects.filter(usuario=usuario).exclude(estado_pago='pagada')
                     
                     if cuotas_pendientes.exists():
-                        deuda_total = sum(c.monto for c in cuotas_pendientes)
+                        # Lo que falta pagar: con pagos parciales es el saldo, no el monto
+                        deuda_total = cuotas_pendientes.aggregate(total=Sum(Coalesce('saldo', 'monto')))['total']
                         # Serializamos las cuotas pendientes para incluirlas en la respuesta
-                        serializer = CuotaSerializer(cuotas_pendientes, many=True)
+                        serializer = CuotaSerializer(
+                            cuotas_pendientes.select_related('usuario', 'categoria'),
+                            many=True
+                        )
                         
                         return Response({
                             "error": "No puedes reactivarte como socio. Tienes cuotas pendientes de pago.",
@@ -111,10 +117,15 @@ class UsuarioViewSet(viewsets.ModelViewSet):
 
         UsuarioRol.objects.create(usuario=usuario, rol=rol_socio)
 
-        return Response({
+        respuesta = {
             "message": "El usuario ahora es socio.",
             "socio_info": SocioInfoSerializer(socio_info).data,
-        }, status=status.HTTP_201_CREATED)
+        }
+        if request.user.pk == usuario.pk:
+            # Cambiaron sus roles: el token anterior deja de valer, se emite uno nuevo
+            usuario.refresh_from_db(fields=['roles_version'])
+            respuesta["token"] = generar_token(usuario)
+        return Response(respuesta, status=status.HTTP_201_CREATED)
 
 
     @action(detail=True, methods=['post'], permission_classes=[RolePermission], url_path='inactivar-socio')
@@ -217,17 +228,8 @@ class UsuarioViewSet(viewsets.ModelViewSet):
         
         try:
             with transaction.atomic():
-                cuotas_pendientes = Cuota.objects.filter(usuario=usuario).exclude(
-                    id__in=Pago.objects.filter(estado='completado').values_list('cuota_id', flat=True)
-                )
-                pagos_creados = []
-                if cuotas_pendientes.exists():
-                    for cuota in cuotas_pendientes:
-                        pago = Pago.objects.create(
-                            cuota=cuota, monto=cuota.monto, estado='completado',
-                            medio_pago=medio_pago, comprobante=comprobante, fecha=timezone.now()
-                        )
-                        pagos_creados.append(pago)
+                # Todas las cuotas impagas en un solo lote: bloqueo, un INSERT y totales en SQL
+                lote = registrar_pagos(Cuota.objects.filter(usuario=usuario), medio_pago, comprobante)
                 
                 # Guardar Historial
                 HistorialEstado.objects.create(
@@ -245,8 +247,8 @@ class UsuarioViewSet(viewsets.ModelViewSet):
             
             return Response({
                 "message": "Socio activado exitosamente.",
-                "pagos_registrados": len(pagos_creados),
-                "deuda_cancelada": len(pagos_creados) > 0,
+                "pagos_registrados": lote.pagos,
+                "deuda_cancelada": not lote.vacio,
                 "socio_info": SocioInfoSerializer(socio_info).data,
             }, status=status.HTTP_200_OK)
         except Exception as e:
@@ -291,34 +293,17 @@ class UsuarioViewSet(viewsets.ModelViewSet):
             return Response({"error": "Debe especificar el medio de pago."}, status=status.HTTP_400_BAD_REQUEST)
 
         try:
-            with transaction.atomic():
-                # Filtramos las cuotas que pertenecen a este usuario y están en la lista de IDs
-                cuotas_a_pagar = Cuota.objects.filter(
-                    id__in=cuota_ids, 
-                    usuario=usuario
-                ).exclude(
-                    id__in=Pago.objects.filter(estado='completado').values_list('cuota_id', flat=True)
-                )
-
-                if not cuotas_a_pagar.exists():
-                    return Response({"error": "Las cuotas seleccionadas no existen o ya están pagadas."}, status=status.HTTP_400_BAD_REQUEST)
-
-                pagos_creados = []
-                for cuota in cuotas_a_pagar:
-                    pago = Pago.objects.create(
-                        cuota=cuota,
-                        monto=cuota.monto,
-                        estado='completado',
-                        medio_pago=medio_pago,
-                        comprobante=comprobante,
-                        fecha=timezone.now()
-                    )
-                    pagos_creados.append(pago)
+            # Solo las cuotas de este usuario; las ya pagadas se saltean dentro del lote
+            lote = registrar_pagos(
+                Cuota.objects.filter(id__in=cuota_ids, usuario=usuario), medio_pago, comprobante
+            )
+            if lote.vacio:
+                return Response({"error": "Las cuotas seleccionadas no existen o ya están pagadas."}, status=status.HTTP_400_BAD_REQUEST)
 
             return Response({
                 "message": "Pago registrado exitosamente.",
-                "pagos_registrados": len(pagos_creados),
-                "total_pagado": sum(p.monto for p in pagos_creados)
+                "pagos_registrados": lote.pagos,
+                "total_pagado": lote.total
             }, status=status.HTTP_200_OK)
 
         except Exception as e:
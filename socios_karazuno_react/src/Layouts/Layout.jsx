@@ -8,14 +8,12 @@ import Navigation from "../components/Navigation.jsx";
 import Footer from "../components/Footer/Footer.jsx"; 
 
 export default function Layout() { 
-    const { user, setUser } = useContext(UserContext);
+    const { user, logout } = useContext(UserContext);
     const navigate = useNavigate();
     const [mobileMenuOpen, setMobileMenuOpen] = useState(false); 
 
     const handleLogout = () => {
-        localStorage.removeItem("authToken");
-        localStorage.removeItem("usuario");
-        setUser(null);
+        logout();
         navigate("/login");
     };
 
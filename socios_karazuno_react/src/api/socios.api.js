@@ -190,4 +190,4 @@ export const registrarPagoCuotas = async (usuarioId, cuotas, datosPago) => {
     console.error("❌ Error registrando pago:", error.response?.status, error.response?.data);
     throw error;
   }
-};
\ No newline at end of file
+};
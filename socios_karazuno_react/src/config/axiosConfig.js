@@ -28,6 +28,35 @@ api.interceptors.request.use(
   }
 );
 
+// Renovación del token de acceso con el refresh token.
+// Si varias peticiones reciben 401 a la vez, comparten la misma renovación.
+let renovacionEnCurso = null;
+
+const renovarToken = () => {
+  if (!renovacionEnCurso) {
+    const refreshToken = localStorage.getItem('refreshToken');
+    // Se usa axios directo para no pasar por estos interceptores
+    renovacionEnCurso = axios
+      .post(`${api.defaults.baseURL}/socios/auth/refresh/`, { refresh: refreshToken })
+      .then(({ data }) => {
+        localStorage.setItem('authToken', data.token);
+        localStorage.setItem('refreshToken', data.refresh);
+        return data.token;
+      })
+      .finally(() => {
+        renovacionEnCurso = null;
+      });
+  }
+  return renovacionEnCurso;
+};
+
+const cerrarSesion = () => {
+  localStorage.removeItem('authToken');
+  localStorage.removeItem('refreshToken');
+  localStorage.removeItem('usuario');
+  window.location.href = '/login';
+};
+
 // Interceptor para manejar errores de autenticación
 
 api.interceptors.response.use(
@@ -35,12 +64,27 @@ api.interceptors.response.use(
     console.log('✅ Respuesta exitosa:', response.config.url);
     return response;
   },
-  (error) => {
-    if (error.response?.status === 401 || error.response?.status === 403) {
-      console.error('❌ Error de autenticación:', error.response?.status, error.config?.url);
+  async (error) => {
+    const original = error.config;
+    const status = error.response?.status;
+
+    if (status === 401 && original && !original._sinRefresco && !original._reintento
+        && localStorage.getItem('refreshToken')) {
+      original._reintento = true;
+      try {
+        const token = await renovarToken();
+        original.headers.Authorization = `Bearer ${token}`;
+        return api(original);
+      } catch (errorRenovacion) {
+        console.error('❌ No se pudo renovar la sesión:', errorRenovacion.response?.status);
+        cerrarSesion();
+        return Promise.reject(error);
+      }
+    }
 
-      localStorage.removeItem('authToken');
-      window.location.href = '/login';
+    if ((status === 401 || status === 403) && !original?._sinRefresco) {
+      console.error('❌ Error de autenticación:', status, original?.url);
+      cerrarSesion();
     }
     return Promise.reject(error);
   }
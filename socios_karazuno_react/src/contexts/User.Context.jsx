@@ -1,5 +1,6 @@
 import React, { createContext, useState, useEffect } from "react";
 import { getMe } from "../api/usuarios.api";
+import api from "../config/axiosConfig";
 
 export const UserContext = createContext();
 
@@ -18,6 +19,7 @@ export function UserProviderWrapper({ children }) {
         setUser(parsedUser);
       } catch (error) {
         localStorage.removeItem("authToken");
+        localStorage.removeItem("refreshToken");
         localStorage.removeItem("usuario");
       }
     }
@@ -25,14 +27,28 @@ export function UserProviderWrapper({ children }) {
     setIsAuthLoaded(true);
   }, []);
 
-  const login = (token, userData) => {
+  const login = (token, userData, refreshToken) => {
     localStorage.setItem("authToken", token);
+    if (refreshToken) {
+      localStorage.setItem("refreshToken", refreshToken);
+    }
     localStorage.setItem("usuario", JSON.stringify(userData)); 
     setUser(userData); 
   };
 
   const logout = () => {
+    const token = localStorage.getItem("authToken");
+    const refreshToken = localStorage.getItem("refreshToken");
+    if (token && refreshToken) {
+      // Revoca los tokens en el backend; si falla, igual se cierra la sesión local
+      api.post(
+        "/socios/auth/logout/",
+        { refresh: refreshToken },
+        { headers: { Authorization: `Bearer ${token}` }, _sinRefresco: true }
+      ).catch(() => {});
+    }
     localStorage.removeItem("authToken");
+    localStorage.removeItem("refreshToken");
     localStorage.removeItem("usuario");
     setUser(null);
   };
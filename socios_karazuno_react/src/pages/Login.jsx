@@ -35,8 +35,8 @@ function Login() {
         contrasena: formData.contrasena,
       });
 
-      const { token, usuario } = response.data;
-      login(token, usuario);
+      const { token, refresh, usuario } = response.data;
+      login(token, usuario, refresh);
 
       setStatus("success");
       setMessage("¡Bienvenido de nuevo!");
@@ -66,7 +66,11 @@ function HacerseSocioPage() {
 
     try {
       // --- PASO 1: Actualizar datos personales del Usuario ---
-      await hacerseSocio(user.id, formData);
+      const respuestaSocio = await hacerseSocio(user.id, formData);
+      // Al cambiar los roles el token anterior deja de valer: el backend envía uno nuevo
+      if (respuestaSocio?.token) {
+        localStorage.setItem("authToken", respuestaSocio.token);
+      }
       
       // --- PASO 2: Intentar crear el registro de SocioInfo ---
       try {